@@ -0,0 +1,211 @@
+"""Batch runner: research many briefs concurrently in one process.
+
+Input is a JSON lines file with one brief per line:
+    {"id": "coffee-sf", "query": "Best specialty coffee shops in San Francisco"}
+("id" is optional and defaults to the line number.)
+
+Every brief runs the full deep research graph on its own thread
+("batch-<run id>-<id>"), scoped to the batch run: a later batch reusing brief ids
+starts new threads instead of adding its requests to the finished ones.
+All briefs share the same resources instead of each opening their own:
+- the agents' model clients (built once per process by models.get_model) and the
+  LLM response cache
+- the MCP session pool
+- the research scheduler (MAX_GLOBAL_RESEARCHERS) and the in-flight model call
+  limit (MAX_INFLIGHT_LLM_CALLS), so the batch as a whole stays within the
+  provider's limits however many briefs run at once
+- the SQLite checkpointer
+
+One result line is appended to the output file as soon as a brief finishes:
+    {"id": ..., "query": ..., "thread_id": ..., "status": "completed" | "clarification" | "error",
+     "report": ..., "error": ..., "seconds": ...}
+
+Resume: briefs already in the output file (completed or waiting on a clarification)
+are skipped and failed ones are retried. Given the run id of an interrupted batch
+(--resume, printed when a batch starts), a brief interrupted in the middle of its
+research continues from its last checkpoint, and one that finished before its
+result was written is not run again.
+
+Usage:
+    python batch.py briefs.jsonl reports.jsonl --concurrency 8
+    python batch.py briefs.jsonl reports.jsonl --resume <run id>
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from pathlib import Path
+
+from config import config
+from workflow import build_deep_research_agent
+
+# Statuses that count as done when resuming - errors are retried
+FINISHED_STATUSES = ("completed", "clarification")
+
+
+def read_briefs(path: Path) -> list[dict]:
+    """Read the briefs, giving the ones without an id their line number."""
+    briefs = []
+    for line_number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        brief = json.loads(line)
+        brief["id"] = str(brief.get("id", line_number))
+        briefs.append(brief)
+    return briefs
+
+
+def read_finished_ids(path: Path) -> set[str]:
+    """Ids of the briefs already finished in an existing output file."""
+    if not path.exists():
+        return set()
+    finished = set()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            result = json.loads(line)
+        except json.JSONDecodeError:
+            # a line cut short by a crash - that brief runs again
+            continue
+        if result.get("status") in FINISHED_STATUSES:
+            finished.add(str(result["id"]))
+    return finished
+
+
+class ResultWriter:
+    """Appends one JSON line per finished brief, flushed right away."""
+
+    def __init__(self, path: Path):
+        """Open the results file for appending, creating its directory if needed."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open("a", encoding="utf-8")
+        self._lock = asyncio.Lock()
+
+    async def write(self, result: dict) -> None:
+        """Append the result of one brief - concurrent briefs write whole lines."""
+        async with self._lock:
+            self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the results file."""
+        self._file.close()
+
+
+async def run_brief(agent, brief: dict, run_id: str, callbacks: list | None = None) -> dict:
+    """Research one brief to completion (or to a clarification question) on its thread of the batch run."""
+    from langchain_core.messages import HumanMessage
+
+    thread_id = f"batch-{run_id}-{brief['id']}"
+    thread = {"configurable": {"thread_id": thread_id}}
+    if callbacks:
+        thread["callbacks"] = callbacks
+
+    snapshot = await agent.aget_state(thread)
+    start = time.perf_counter()
+    try:
+        if snapshot.next:
+            # continue an interrupted run of this brief from its last checkpoint
+            values = await agent.ainvoke(None, config=thread)
+        elif snapshot.values:
+            # finished before its result was written - a new message would start a second request
+            values = snapshot.values
+        else:
+            values = await agent.ainvoke({"messages": [HumanMessage(content=brief["query"])]}, config=thread)
+    except Exception as e:
+        return {
+            "id": brief["id"],
+            "query": brief["query"],
+            "thread_id": thread_id,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": round(time.perf_counter() - start, 2),
+        }
+
+    if values.get("final_report"):
+        status, report = "completed", values["final_report"]
+    else:
+        # the brief was too vague - the last message is the clarification question
+        status, report = "clarification", values["messages"][-1].content
+    return {
+        "id": brief["id"],
+        "query": brief["query"],
+        "thread_id": thread_id,
+        "status": status,
+        "report": report,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+async def run_batch(briefs: list[dict], output_path: Path, concurrency: int, run_id: str | None = None) -> dict[str, int]:
+    """Run the briefs, at most `concurrency` at a time, writing each result as it finishes.
+
+    Args:
+        briefs: briefs to research (read_briefs)
+        output_path: JSON lines file the results are appended to
+        concurrency: briefs researched at the same time
+        run_id: id of an interrupted batch run to resume (None = a new run)
+
+    Returns:
+        Number of briefs per status
+    """
+    # LangGraph, the agents and the MCP SDK load here, not when the module is imported
+    from checkpointing import open_checkpointer
+    from mcp_pool import close_mcp_pool
+    from tracing import build_tracing_handler
+
+    finished_ids = read_finished_ids(output_path)
+    pending = [brief for brief in briefs if brief["id"] not in finished_ids]
+    counts = {"skipped": len(briefs) - len(pending)}
+    if counts["skipped"]:
+        print(f"[batch] skipping {counts['skipped']} briefs already in {output_path}", flush=True)
+    if run_id is None:
+        run_id = uuid.uuid4().hex
+        print(f"[batch] run {run_id} (resume with --resume {run_id})", flush=True)
+
+    tracing_handler = build_tracing_handler()
+    callbacks = [tracing_handler] if tracing_handler is not None else None
+    slots = asyncio.Semaphore(max(1, concurrency))
+    writer = ResultWriter(output_path)
+    done = 0
+
+    try:
+        async with open_checkpointer() as checkpointer:
+            agent = build_deep_research_agent(checkpointer)
+
+            async def worker(brief: dict) -> None:
+                nonlocal done
+                async with slots:
+                    result = await run_brief(agent, brief, run_id, callbacks)
+                await writer.write(result)
+                done += 1
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                print(f"[batch] {done}/{len(pending)} {result['status']}: {brief['id']} ({result['seconds']}s)", flush=True)
+
+            await asyncio.gather(*(worker(brief) for brief in pending))
+    finally:
+        writer.close()
+        await close_mcp_pool()
+        if tracing_handler is not None:
+            # the last spans are written by the exporter's thread
+            await asyncio.to_thread(tracing_handler.close)
+    return counts
+
+
+async def main():
+    """Research the briefs of the input file and append their results to the output file."""
+    parser = argparse.ArgumentParser(description="Research a JSON lines file of briefs concurrently")
+    parser.add_argument("input", help="JSON lines file of briefs: {\"id\": ..., \"query\": ...}")
+    parser.add_argument("output", help="JSON lines file the results are appended to (resumable)")
+    parser.add_argument("--concurrency", type=int, default=config.get_batch_concurrency(), help="briefs researched at the same time")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None, help="continue the briefs left unfinished by this batch run")
+    args = parser.parse_args()
+
+    briefs = read_briefs(Path(args.input))
+    counts = await run_batch(briefs, Path(args.output), args.concurrency, run_id=args.resume)
+    print(f"[batch] done: {counts}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,359 @@
+"""Offline benchmark harness for the deep research pipeline.
+
+Runs the full deep_research_agent graph (or the supervisor / researcher subgraph
+alone) without OpenAI and without npx:
+- every agent's model is replaced by one ScriptedChatModel (fake_llm.py) with
+  configurable latency and output size
+- the researchers' MCP pool points at fake_mcp_server.py, serving a generated
+  corpus from a temporary directory
+
+Reported per scenario: wall time, per-node latency, model calls, tokens and tool
+calls (from the tracing spans), peak concurrency (researchers and model calls)
+and prompt/completion token totals, so performance regressions
+can be caught on a laptop. For the full graph, the scope step (everything before
+the supervisor subgraph) is also reported on its own, and `--scope-mode all`
+runs every SCOPE_MODE and prints their scope latency and tokens side by side.
+
+Model routing profiles: `single` runs every step on one (strong) fake model;
+`tiered` routes reflection turns, findings compression and report section drafts
+to a second, faster fake model (--fast-latency), as REFLECTION_MODEL /
+COMPRESSION_MODEL / REPORT_SECTION_MODEL would. Cost is estimated from the tokens
+of each model and its price (--strong-price / --fast-price), and
+`--routing-profile all` compares the profiles' latency and cost.
+
+Usage:
+    python benchmark.py --graph full --latency 0.2 --topics 3 --repeat 3
+    python benchmark.py --graph researcher --json researcher.json
+    python benchmark.py --graph supervisor --topics 2 --rounds 3
+    python benchmark.py --graph researcher --compression-mode incremental --seconds-per-prompt-token 0.0001
+    python benchmark.py --graph full --scope-mode speculative
+    python benchmark.py --graph full --scope-mode all   # compare the scope modes
+    python benchmark.py --graph full --routing-profile all   # compare the model routing profiles
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import HumanMessage
+
+import research_agent
+import research_supervisor_agent
+from config import Config
+from fake_llm import RESEARCH_TOPICS, ScriptedChatModel
+from mcp_pool import MCPSessionPool, close_mcp_pool, set_mcp_pool
+from models import set_model_override
+from tracing import Span, TracingCallbackHandler, summarize_spans
+from workflow import SCOPE_MODES, build_deep_research_agent
+
+GRAPHS = ("full", "supervisor", "researcher")
+FAKE_MCP_SERVER = str(Path(__file__).resolve().parent / "fake_mcp_server.py")
+ROUTING_PROFILES = ("single", "tiered")
+# Step types routed to the fast model in the tiered profile
+FAST_ROLES = ("reflection", "compress", "report_section")
+# Nodes of the full graph that scope the request, in every SCOPE_MODE
+# (speculative_scope also includes the supervisor's first plan)
+SCOPE_NODES = ("clarify_with_user", "write_research_brief", "speculative_scope", "merged_scope")
+
+
+def max_overlap(spans: list[Span]) -> int:
+    """Peak number of spans running at the same time."""
+    events = sorted(
+        [(span.start_time_unix_nano, 1) for span in spans] + [(span.end_time_unix_nano, -1) for span in spans],
+        key=lambda event: (event[0], event[1]),
+    )
+    running = peak = 0
+    for _, delta in events:
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+
+def write_corpus(directory: Path, documents: int, paragraphs: int) -> None:
+    """Generate a corpus of markdown documents covering the benchmark research topics."""
+    for i in range(documents):
+        topic = RESEARCH_TOPICS[i % len(RESEARCH_TOPICS)]
+        body = "\n\n".join(
+            f"Paragraph {p} of document {i} about {topic}. " + " ".join([f"finding{i}_{p}"] * 40)
+            for p in range(paragraphs)
+        )
+        (directory / f"doc_{i}.md").write_text(f"# {topic}\n\n{body}\n", encoding="utf-8")
+
+
+def install_fake_model(model: ScriptedChatModel, fast_model: ScriptedChatModel | None = None) -> None:
+    """Replace every agent's model with the fake model (and the fast step types' with fast_model)."""
+    set_model_override(model, {role: fast_model for role in FAST_ROLES} if fast_model is not None else None)
+
+
+def model_usage(model: ScriptedChatModel, price_per_million: float) -> dict:
+    """Call and token counts of a fake model, with their estimated cost."""
+    stats = model.stats.as_dict()
+    stats["cost"] = round((stats["prompt_tokens"] + stats["completion_tokens"]) * price_per_million / 1e6, 6)
+    return stats
+
+
+async def run_graph(graph: str, run_config: dict) -> None:
+    """Run the benchmarked graph once on the fake corpus."""
+    if graph == "full":
+        agent = build_deep_research_agent()
+        await agent.ainvoke(
+            {"messages": [HumanMessage(content="Research the benchmark topics in the local files.")]},
+            config=run_config,
+        )
+    elif graph == "supervisor":
+        brief = "Research the benchmark topics in the local research files."
+        await research_supervisor_agent.supervisor_agent.ainvoke(
+            {"research_brief": brief, "supervisor_messages": [HumanMessage(content=brief)]},
+            config=run_config,
+        )
+    else:
+        await research_agent.researcher_agent.ainvoke(
+            {"researcher_messages": [HumanMessage(content=RESEARCH_TOPICS[0])]},
+            config=run_config,
+        )
+
+
+def summarize_scope(nodes: dict[str, dict], repeat: int) -> dict:
+    """Latency and model usage of the scope nodes, per run."""
+    scope_nodes = [node for name, node in nodes.items() if name in SCOPE_NODES]
+    return {
+        "mean_seconds": round(sum(node["total_seconds"] for node in scope_nodes) / repeat, 4),
+        "model_calls": sum(node["model_calls"] for node in scope_nodes) / repeat,
+        "input_tokens": sum(node["input_tokens"] for node in scope_nodes) / repeat,
+        "output_tokens": sum(node["output_tokens"] for node in scope_nodes) / repeat,
+    }
+
+
+def summarize(values: list[float]) -> dict:
+    """Count, total, mean and max of a list of durations in seconds."""
+    return {
+        "count": len(values),
+        "total_seconds": round(sum(values), 4),
+        "mean_seconds": round(statistics.mean(values), 4),
+        "max_seconds": round(max(values), 4),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    """Run one benchmark scenario and collect its measurements."""
+    # the response cache and the research memo would turn repeated runs into cache hits
+    set_llm_cache(None)
+    Config.RESEARCH_MEMO_ENABLED = False
+
+    model = ScriptedChatModel(
+        latency_seconds=args.latency,
+        seconds_per_prompt_token=args.seconds_per_prompt_token,
+        seconds_per_output_token=args.seconds_per_token,
+        output_tokens=args.output_tokens,
+        research_topics=args.topics,
+        research_rounds=args.rounds,
+    )
+    fast_model = None
+    if args.routing_profile == "tiered":
+        # faster per call and per token, by the same ratio
+        speedup = args.fast_latency / args.latency if args.latency else 1.0
+        fast_model = ScriptedChatModel(
+            model_name="scripted-fake-fast",
+            latency_seconds=args.fast_latency,
+            seconds_per_prompt_token=args.seconds_per_prompt_token * speedup,
+            seconds_per_output_token=args.seconds_per_token * speedup,
+            output_tokens=args.output_tokens,
+            research_topics=args.topics,
+            research_rounds=args.rounds,
+        )
+    install_fake_model(model, fast_model)
+    if args.scope_mode:
+        Config.SCOPE_MODE = args.scope_mode
+    if args.compression_mode:
+        Config.RESEARCH_COMPRESSION_MODE = args.compression_mode
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        write_corpus(Path(corpus_dir), args.documents, args.paragraphs)
+        Config.RESEARCH_FILES_DIR = corpus_dir
+        set_mcp_pool(MCPSessionPool(
+            {"filesystem": {
+                "command": sys.executable,
+                "args": [FAKE_MCP_SERVER, corpus_dir, str(args.mcp_latency)],
+                "transport": "stdio",
+            }},
+            size=Config.get_max_concurrent_researchers(),
+        ))
+
+        tracing_handler = TracingCallbackHandler()
+        wall_times = []
+        run_windows = []
+        try:
+            for i in range(args.repeat):
+                run_config = {"configurable": {"thread_id": f"benchmark-{i}"}, "callbacks": [tracing_handler]}
+                start = time.perf_counter()
+                start_ns = time.time_ns()
+                await run_graph(args.graph, run_config)
+                wall_times.append(time.perf_counter() - start)
+                run_windows.append((start_ns, time.time_ns()))
+        finally:
+            await close_mcp_pool()
+
+    researcher_spans = [span for span in tracing_handler.spans if span.kind == "node" and span.name == "run_researcher"]
+    # time from the start of a run until its first researcher starts
+    first_research_times = []
+    for start_ns, end_ns in run_windows:
+        starts = [span.start_time_unix_nano for span in researcher_spans if start_ns <= span.start_time_unix_nano <= end_ns]
+        if starts:
+            first_research_times.append((min(starts) - start_ns) / 1e9)
+    nodes = summarize_spans(tracing_handler.spans)
+    models = {"strong": model_usage(model, args.strong_price)}
+    if fast_model is not None:
+        models["fast"] = model_usage(fast_model, args.fast_price)
+    return {
+        "graph": args.graph,
+        "scope_mode": Config.get_scope_mode(),
+        "compression_mode": Config.get_research_compression_mode(),
+        "repeat": args.repeat,
+        "wall_time": summarize(wall_times),
+        "time_to_first_research": summarize(first_research_times) if first_research_times else None,
+        "scope": summarize_scope(nodes, args.repeat) if args.graph == "full" else None,
+        "nodes": nodes,
+        "max_concurrent_researchers": max_overlap(researcher_spans),
+        "routing_profile": args.routing_profile,
+        "models": models,
+        "model": {
+            key: (max if key == "max_concurrent_calls" else sum)(usage[key] for usage in models.values())
+            for key in ("calls", "prompt_tokens", "completion_tokens", "max_concurrent_calls", "cost")
+        },
+    }
+
+
+def print_report(result: dict) -> None:
+    """Print the result of one benchmark configuration."""
+    print(
+        f"graph={result['graph']} scope_mode={result['scope_mode']} "
+        f"compression_mode={result['compression_mode']} repeat={result['repeat']}"
+    )
+    wall = result["wall_time"]
+    print(f"wall time: mean {wall['mean_seconds']:.3f}s  max {wall['max_seconds']:.3f}s")
+    first_research = result["time_to_first_research"]
+    if first_research:
+        print(f"time to first research: mean {first_research['mean_seconds']:.3f}s  max {first_research['max_seconds']:.3f}s")
+    scope = result["scope"]
+    if scope:
+        print(
+            f"scope: mean {scope['mean_seconds']:.3f}s  {scope['model_calls']:g} model calls  "
+            f"{scope['input_tokens']:g} in / {scope['output_tokens']:g} out tokens per run"
+        )
+    print(f"{'node':<28}{'runs':>6}{'max s':>9}{'total s':>9}{'calls':>7}{'in tok':>9}{'out tok':>9}{'tools':>7}")
+    for name, node in result["nodes"].items():
+        print(
+            f"{name:<28}{node['runs']:>6}{node['max_seconds']:>9.3f}{node['total_seconds']:>9.3f}"
+            f"{node['model_calls']:>7}{node['input_tokens']:>9}{node['output_tokens']:>9}{node['tool_calls']:>7}"
+        )
+    model = result["model"]
+    print(f"concurrency: {result['max_concurrent_researchers']} researchers, {model['max_concurrent_calls']} model calls")
+    print(f"model calls: {model['calls']}  prompt tokens: {model['prompt_tokens']}  completion tokens: {model['completion_tokens']}")
+    print(
+        f"routing {result['routing_profile']}: "
+        + ", ".join(f"{name} {usage['calls']} calls ${usage['cost']:.4f}" for name, usage in result["models"].items())
+        + f"  (total ${model['cost']:.4f})"
+    )
+
+
+def print_scope_comparison(results: list[dict]) -> None:
+    """Scope latency and tokens of each SCOPE_MODE, against the first (sequential) one."""
+    baseline = results[0]["scope"]
+    print(f"{'scope mode':<14}{'scope s':>9}{'calls':>7}{'in tok':>9}{'out tok':>9}{'first research s':>18}")
+    for result in results:
+        scope = result["scope"]
+        first_research = result["time_to_first_research"]
+        print(
+            f"{result['scope_mode']:<14}{scope['mean_seconds']:>9.3f}{scope['model_calls']:>7g}"
+            f"{scope['input_tokens']:>9g}{scope['output_tokens']:>9g}"
+            f"{first_research['mean_seconds'] if first_research else float('nan'):>18.3f}"
+        )
+    for result in results[1:]:
+        scope = result["scope"]
+        print(
+            f"{result['scope_mode']} vs {results[0]['scope_mode']}: "
+            f"{baseline['mean_seconds'] - scope['mean_seconds']:+.3f}s scope latency saved, "
+            f"{baseline['input_tokens'] + baseline['output_tokens'] - scope['input_tokens'] - scope['output_tokens']:+g} tokens saved per run"
+        )
+
+
+def print_routing_comparison(results: list[dict]) -> None:
+    """Latency and estimated cost of each routing profile."""
+    print(f"{'routing':<10}{'wall s':>9}{'calls':>7}{'fast calls':>12}{'tokens':>10}{'cost $':>10}")
+    for result in results:
+        model = result["model"]
+        fast_calls = result["models"].get("fast", {}).get("calls", 0)
+        print(
+            f"{result['routing_profile']:<10}{result['wall_time']['mean_seconds']:>9.3f}{model['calls']:>7}"
+            f"{fast_calls:>12}{model['prompt_tokens'] + model['completion_tokens']:>10}{model['cost']:>10.4f}"
+        )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse the benchmark command line."""
+    parser = argparse.ArgumentParser(description="Offline benchmark of the deep research pipeline")
+    parser.add_argument("--graph", choices=GRAPHS, default="full", help="graph to run")
+    parser.add_argument("--scope-mode", choices=(*SCOPE_MODES, "all"), default=None, help="SCOPE_MODE of the full graph, or all to compare them (default: from the environment)")
+    parser.add_argument("--routing-profile", choices=(*ROUTING_PROFILES, "all"), default="single", help="model routing profile, or all to compare them")
+    parser.add_argument("--fast-latency", type=float, default=0.05, help="latency per call of the fast model (tiered routing)")
+    parser.add_argument("--strong-price", type=float, default=2.0, help="strong model price per million tokens")
+    parser.add_argument("--fast-price", type=float, default=0.4, help="fast model price per million tokens")
+    parser.add_argument("--repeat", type=int, default=1, help="number of runs")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency per call (seconds)")
+    parser.add_argument("--seconds-per-token", type=float, default=0.0, help="extra fake model latency per output token")
+    parser.add_argument("--seconds-per-prompt-token", type=float, default=0.0, help="extra fake model latency per prompt token")
+    parser.add_argument("--compression-mode", choices=("final", "incremental"), default=None, help="RESEARCH_COMPRESSION_MODE (default: from the environment)")
+    parser.add_argument("--output-tokens", type=int, default=200, help="fake model output size for text answers")
+    parser.add_argument("--topics", type=int, default=3, help="ConductResearch calls issued by the supervisor per round")
+    parser.add_argument("--rounds", type=int, default=1, help="supervisor iterations issuing ConductResearch calls")
+    parser.add_argument("--documents", type=int, default=12, help="documents in the generated corpus")
+    parser.add_argument("--paragraphs", type=int, default=8, help="paragraphs per generated document")
+    parser.add_argument("--mcp-latency", type=float, default=0.0, help="fake MCP server latency per tool call (seconds)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+async def run_benchmarks(args) -> dict | list[dict]:
+    """Run the benchmark - once per routing profile or scope mode when comparing them - and print the reports."""
+    if args.routing_profile == "all":
+        results = []
+        for routing_profile in ROUTING_PROFILES:
+            result = await run_benchmark(argparse.Namespace(**{**vars(args), "routing_profile": routing_profile}))
+            print_report(result)
+            print()
+            results.append(result)
+        print_routing_comparison(results)
+        return results
+
+    if args.scope_mode != "all":
+        result = await run_benchmark(args)
+        print_report(result)
+        return result
+
+    results = []
+    for scope_mode in SCOPE_MODES:
+        result = await run_benchmark(argparse.Namespace(**{**vars(args), "graph": "full", "scope_mode": scope_mode}))
+        print_report(result)
+        print()
+        results.append(result)
+    print_scope_comparison(results)
+    return results
+
+
+def main():
+    """Run the benchmarks and write their results as JSON if asked to."""
+    args = parse_args()
+    results = asyncio.run(run_benchmarks(args))
+    if args.json:
+        # written once the event loop is closed
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Content-addressed blob store for raw research notes.
+
+A researcher's raw notes are its whole transcript joined into one string. They
+used to be carried by value through the researcher, supervisor and agent states,
+so every checkpoint of a long multi-researcher run held another copy of all of
+them. Large notes are now stored once, here, and the states carry a short
+reference instead:
+
+    blob:sha256:<digest> (<n> bytes)
+
+Blobs are zlib-compressed files under BLOB_STORE_DIR, named by the SHA-256 of the
+note, so the same notes (a reused or re-run researcher) are stored once, and a
+resumed run in another process still finds them. Notes smaller than
+RAW_NOTES_SPILL_BYTES stay inline in the state (0 = always inline).
+
+Readers of raw_notes resolve references with resolve_notes (load_notes from async
+code) - the graph's own nodes never read them, only the callers of the graph do.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import zlib
+from pathlib import Path
+
+from config import config
+
+BLOB_PREFIX = "blob:sha256:"
+
+_REFERENCE_PATTERN = re.compile(r"^blob:sha256:([0-9a-f]{64}) \(\d+ bytes\)$")
+
+
+def is_blob_reference(note: str) -> bool:
+    """Tell whether a raw note is a blob store reference rather than the note itself."""
+    return note.startswith(BLOB_PREFIX) and _REFERENCE_PATTERN.match(note) is not None
+
+
+class BlobStore:
+    """zlib-compressed blobs on disk, addressed by the SHA-256 of their content.
+
+    Args:
+        root: directory of the blob files (created on first write)
+    """
+
+    def __init__(self, root: Path):
+        """Use the blob files under root."""
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        # two-level fan-out keeps directories small
+        return self.root / digest[:2] / f"{digest}.z"
+
+    def put(self, data: bytes) -> str:
+        """Store the data (once per content) and return its SHA-256 digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, so a crash never leaves a truncated blob under its final name
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(zlib.compress(data, 6))
+            os.replace(temp_path, path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes | None:
+        """Return the stored data, None if there is no such blob."""
+        try:
+            return zlib.decompress(self._path(digest).read_bytes())
+        except FileNotFoundError:
+            return None
+
+
+# Global blob store - created lazily
+_blob_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """Get the process-wide blob store (BLOB_STORE_DIR)."""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore(Path(config.get_blob_store_dir()))
+    return _blob_store
+
+
+def store_note(note: str) -> str:
+    """Return a reference to the note in the blob store, or the note itself when small (or already a reference)."""
+    spill_bytes = config.get_raw_notes_spill_bytes()
+    if spill_bytes <= 0 or is_blob_reference(note):
+        return note
+    data = note.encode("utf-8")
+    if len(data) < spill_bytes:
+        return note
+    return f"{BLOB_PREFIX}{get_blob_store().put(data)} ({len(data)} bytes)"
+
+
+def resolve_note(note: str) -> str:
+    """Return the text of a note, loading it from the blob store if it is a reference."""
+    match = _REFERENCE_PATTERN.match(note) if note.startswith(BLOB_PREFIX) else None
+    if match is None:
+        return note
+    data = get_blob_store().get(match.group(1))
+    if data is None:
+        return f"[raw notes unavailable: {note} is missing from {get_blob_store().root}]"
+    return data.decode("utf-8")
+
+
+def resolve_notes(notes: list[str]) -> list[str]:
+    """resolve_note for each note."""
+    return [resolve_note(note) for note in notes]
+
+
+async def load_notes(notes: list[str]) -> list[str]:
+    """resolve_notes, off the event loop."""
+    return await asyncio.to_thread(resolve_notes, notes)
+
+
+async def store_notes(notes: list[str]) -> list[str]:
+    """store_note for each note, off the event loop."""
+    return await asyncio.to_thread(lambda: [store_note(note) for note in notes])
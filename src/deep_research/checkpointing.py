@@ -0,0 +1,118 @@
+"""Durable checkpointing for the deep research graph.
+
+Checkpoints are stored in a local SQLite file, so a run that crashes in the
+supervisor after minutes of research - or a conversation waiting on a
+clarification answer - can be picked up again by another process using the
+same thread_id.
+
+A supervisor step is checkpointed once all of its researchers are done, so the
+results of the researchers that finished before a crash are kept separately, in
+the same file (ResearchResultStore), until the step is checkpointed.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from config import config
+
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncIterator[AsyncSqliteSaver]:
+    """Open the SQLite checkpointer configured by CHECKPOINT_PATH."""
+    checkpoint_path = config.get_checkpoint_path()
+    Path(checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(checkpoint_path) as checkpointer:
+        yield checkpointer
+
+
+class ResearchResultStore:
+    """Results of the researchers that finished in a supervisor step not yet checkpointed.
+
+    Results are keyed by thread, supervisor iteration and research question - not by
+    the order the researchers were launched in - so a resumed step gets each
+    question's own findings back, even when deduplication or the research memo
+    plan its calls differently the second time. They are dropped when the run's
+    research is complete.
+
+    The store is synchronous (sqlite3) - async callers go through asyncio.to_thread.
+
+    Args:
+        database_path: SQLite file to keep the results in (the checkpoint file)
+    """
+
+    def __init__(self, database_path: str):
+        """Open (and create if needed) the results table in the database file."""
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # used from asyncio.to_thread workers, next to the checkpointer's own connection
+        self._conn = sqlite3.connect(database_path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS research_results ("
+            " thread_id TEXT NOT NULL, iteration INTEGER NOT NULL, research_question TEXT NOT NULL,"
+            " result TEXT NOT NULL, PRIMARY KEY (thread_id, iteration, research_question))"
+        )
+        self._conn.commit()
+
+    def lookup(self, thread_id: str, iteration: int, research_question: str) -> dict | None:
+        """Return the result of a researcher that already finished this question in this step, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM research_results WHERE thread_id = ? AND iteration = ? AND research_question = ?",
+                (thread_id, iteration, research_question),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def store(self, thread_id: str, iteration: int, research_question: str, result: dict) -> None:
+        """Keep a finished researcher's result (JSON-serializable) until its step is checkpointed."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_results (thread_id, iteration, research_question, result)"
+                " VALUES (?, ?, ?, ?)",
+                (thread_id, iteration, research_question, json.dumps(result)),
+            )
+            self._conn.commit()
+
+    def clear(self, thread_id: str) -> None:
+        """Drop the results kept for a thread."""
+        with self._lock:
+            self._conn.execute("DELETE FROM research_results WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+
+# Global result store - opened lazily, on CHECKPOINT_PATH
+_result_store: ResearchResultStore | None = None
+
+
+def get_research_result_store() -> ResearchResultStore:
+    """Get the process-wide researcher result store (on CHECKPOINT_PATH)."""
+    global _result_store
+    if _result_store is None:
+        _result_store = ResearchResultStore(config.get_checkpoint_path())
+    return _result_store
+
+
+async def recall_research_result(thread_id: str | None, iteration: int, research_question: str) -> dict | None:
+    """Return the result of a researcher already finished in this step of the thread (None without a thread)."""
+    if thread_id is None:
+        return None
+    store = get_research_result_store()
+    return await asyncio.to_thread(store.lookup, thread_id, iteration, research_question)
+
+
+async def keep_research_result(thread_id: str | None, iteration: int, research_question: str, result: dict) -> None:
+    """Keep a finished researcher's result until its step is checkpointed (nothing to do without a thread)."""
+    if thread_id is not None:
+        await asyncio.to_thread(get_research_result_store().store, thread_id, iteration, research_question, result)
+
+
+async def drop_research_results(thread_id: str | None) -> None:
+    """Drop the results kept for the thread, once its research is complete."""
+    if thread_id is not None:
+        await asyncio.to_thread(get_research_result_store().clear, thread_id)
@@ -7,6 +7,7 @@ reading model configurations from environment variables.
 
 import os
 from dotenv import load_dotenv
+from utils import get_current_dir
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,8 +21,143 @@ class Config:
     # Model configurations for different agents
     SCOPE_AGENT_MODEL = os.getenv("SCOPE_AGENT_MODEL", "openai:gpt-4.1")
     RESEARCH_AGENT_MODEL = os.getenv("RESEARCH_AGENT_MODEL", "openai:gpt-4.1")
+    # Prompt token budget for the research agent - older tool outputs are compacted above it
+    RESEARCH_CONTEXT_TOKEN_BUDGET = int(os.getenv("RESEARCH_CONTEXT_TOKEN_BUDGET", "32000"))
+    # Number of most recent tool outputs always sent verbatim to the research agent
+    RESEARCH_CONTEXT_KEEP_RECENT_TOOL_RESULTS = int(os.getenv("RESEARCH_CONTEXT_KEEP_RECENT_TOOL_RESULTS", "2"))
+    # How a researcher's findings are compressed:
+    # - final: one compression call over the whole transcript once the researcher is done
+    # - incremental: each step's tool results are folded into running notes while the
+    #   researcher plans its next step, and the final compression only formats those notes
+    RESEARCH_COMPRESSION_MODE = os.getenv("RESEARCH_COMPRESSION_MODE", "final")
     SUPERVISOR_AGENT_MODEL = os.getenv("SUPERVISOR_AGENT_MODEL", "openai:gpt-4.1")
     FINAL_REPORT_AGENT_MODEL = os.getenv("FINAL_REPORT_AGENT_MODEL", "openai:gpt-4.1")
+    # Model routing per step type, so the bulk of the calls can run on a faster model
+    # (each defaults to the model of its agent):
+    # researcher turns reading fresh tool results - mostly think_tool reflections
+    REFLECTION_MODEL = os.getenv("REFLECTION_MODEL", RESEARCH_AGENT_MODEL)
+    # compression of a researcher's findings (compress_research_finding, fold_findings)
+    COMPRESSION_MODEL = os.getenv("COMPRESSION_MODEL", RESEARCH_AGENT_MODEL)
+    # section drafts of a map-reduce report (the final merge stays on FINAL_REPORT_AGENT_MODEL)
+    REPORT_SECTION_MODEL = os.getenv("REPORT_SECTION_MODEL", FINAL_REPORT_AGENT_MODEL)
+    # Findings larger than this (tokens) are drafted section by section in parallel, then merged
+    REPORT_MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("REPORT_MAP_REDUCE_THRESHOLD_TOKENS", "60000"))
+    # Maximum findings tokens per section draft in map-reduce mode
+    REPORT_SECTION_TOKEN_BUDGET = int(os.getenv("REPORT_SECTION_TOKEN_BUDGET", "20000"))
+
+    # How the request is scoped before research starts:
+    # - sequential: clarify_with_user, then write_research_brief, then the supervisor's first plan
+    # - speculative: brief and first plan are drafted while clarification is decided (cancelled if needed)
+    # - merged: one structured call returns both the clarification decision and the brief
+    SCOPE_MODE = os.getenv("SCOPE_MODE", "sequential")
+
+    # Maximum number of research agents the supervisor runs in parallel
+    # The MCP session pool is sized to this, one session per concurrent researcher
+    MAX_CONCURRENT_RESEARCHERS = int(os.getenv("MAX_CONCURRENT_RESEARCHERS", "3"))
+    # Research budgets (0 = unlimited), enforced by research_budget:
+    # supervisor iterations (think_tool + ConductResearch turns) per run
+    SUPERVISOR_MAX_ITERATIONS = int(os.getenv("SUPERVISOR_MAX_ITERATIONS", "6"))
+    # per researcher: model turns, tool calls, model tokens and wall time
+    RESEARCHER_MAX_ITERATIONS = int(os.getenv("RESEARCHER_MAX_ITERATIONS", "10"))
+    RESEARCHER_MAX_TOOL_CALLS = int(os.getenv("RESEARCHER_MAX_TOOL_CALLS", "12"))
+    RESEARCHER_MAX_TOKENS = int(os.getenv("RESEARCHER_MAX_TOKENS", "0"))
+    RESEARCHER_MAX_SECONDS = float(os.getenv("RESEARCHER_MAX_SECONDS", "0"))
+    # per run, across its supervisor and all its researchers
+    RUN_MAX_TOOL_CALLS = int(os.getenv("RUN_MAX_TOOL_CALLS", "0"))
+    RUN_MAX_TOKENS = int(os.getenv("RUN_MAX_TOKENS", "0"))
+    RUN_MAX_SECONDS = float(os.getenv("RUN_MAX_SECONDS", "0"))
+    # A researcher stops after this many steps in a row whose tool results are less than
+    # RESEARCH_NOVELTY_THRESHOLD (0-1) new compared to its earlier results (0 = never)
+    RESEARCH_NOVELTY_THRESHOLD = float(os.getenv("RESEARCH_NOVELTY_THRESHOLD", "0.15"))
+    RESEARCH_NOVELTY_PATIENCE = int(os.getenv("RESEARCH_NOVELTY_PATIENCE", "2"))
+
+    # Maximum number of research agents running at once across all runs in the process
+    MAX_GLOBAL_RESEARCHERS = int(os.getenv("MAX_GLOBAL_RESEARCHERS", "12"))
+    # Maximum number of model calls in flight across all runs in the process
+    MAX_INFLIGHT_LLM_CALLS = int(os.getenv("MAX_INFLIGHT_LLM_CALLS", "16"))
+    # Provider rate limits per model, applied to every model call (0 = unlimited)
+    # Defaults for every model, in requests per minute and tokens per minute
+    MODEL_RPM_LIMIT = int(os.getenv("MODEL_RPM_LIMIT", "0"))
+    MODEL_TPM_LIMIT = int(os.getenv("MODEL_TPM_LIMIT", "0"))
+    # Per-model overrides as model=rpm/tpm, e.g. "openai:gpt-4.1=500/30000,openai:gpt-4.1-mini=500/200000"
+    MODEL_RATE_LIMITS = os.getenv("MODEL_RATE_LIMITS", "")
+    # Retries of a model call failing with a rate limit (429), server (5xx) or connection error
+    MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", "5"))
+    # Exponential backoff with full jitter between retries, capped at MODEL_RETRY_MAX_SECONDS
+    MODEL_RETRY_BASE_SECONDS = float(os.getenv("MODEL_RETRY_BASE_SECONDS", "1"))
+    MODEL_RETRY_MAX_SECONDS = float(os.getenv("MODEL_RETRY_MAX_SECONDS", "60"))
+    # Halve a model's concurrency on rate limit / server errors and grow it back on success
+    MODEL_ADAPTIVE_CONCURRENCY = os.getenv("MODEL_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+    # Model calls taking longer than this are abandoned (0 = no timeout): they go to the
+    # model's fallback in MODEL_FALLBACKS ("model=fallback,..."), or are retried without one
+    MODEL_TIMEOUT_SECONDS = float(os.getenv("MODEL_TIMEOUT_SECONDS", "0"))
+    # Per role timeouts ("role=seconds,...") overriding MODEL_TIMEOUT_SECONDS: the report roles
+    # write up to 32k tokens, so by default they are never abandoned
+    MODEL_TIMEOUTS = os.getenv("MODEL_TIMEOUTS", "report_section=0,final_report=0")
+    MODEL_FALLBACKS = os.getenv("MODEL_FALLBACKS", "")
+
+    # ConductResearch questions at least this similar (0-1) to an earlier or sibling task,
+    # with the same numbers and names, reuse its findings instead of starting another
+    # researcher (0 = off)
+    RESEARCH_DEDUP_THRESHOLD = float(os.getenv("RESEARCH_DEDUP_THRESHOLD", "0.9"))
+
+    # Findings of earlier supervisor iterations are shown to the supervisor model as
+    # digests of this many tokens, the latest ones in full (0 = always in full)
+    SUPERVISOR_DIGEST_TOKENS = int(os.getenv("SUPERVISOR_DIGEST_TOKENS", "300"))
+
+    # Batch runner (batch.py): number of briefs researched at the same time
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+    # Directory with the research documents (served by the filesystem MCP server and indexed for search)
+    RESEARCH_FILES_DIR = os.getenv("RESEARCH_FILES_DIR", str(get_current_dir() / "files"))
+    # Chunked reader tools (read_document): largest chunk returned per call, and the
+    # size of the page cache shared by every researcher
+    READER_CHUNK_CHARS = int(os.getenv("READER_CHUNK_CHARS", "4000"))
+    READER_CACHE_MB = int(os.getenv("READER_CACHE_MB", "64"))
+
+    # Local directory for on-disk state (response cache, checkpoints, traces, ...)
+    DATA_DIR = os.getenv("DEEP_RESEARCH_DATA_DIR", str(get_current_dir() / ".deep_research"))
+
+    # LLM response cache shared by all agents: none, memory or sqlite
+    LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "none")
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.sqlite"))
+    # Entries older than this are not reused (0 = never expire)
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "0"))
+    # Least recently used entries are evicted above this size
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+    # Raw research notes of at least this many bytes are stored once in the blob store
+    # (zlib-compressed files under BLOB_STORE_DIR) and referenced from the graph state (0 = inline)
+    RAW_NOTES_SPILL_BYTES = int(os.getenv("RAW_NOTES_SPILL_BYTES", "4096"))
+    BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(DATA_DIR, "blobs"))
+
+    # SQLite file holding the graph checkpoints (resumable runs)
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(DATA_DIR, "checkpoints.sqlite"))
+
+    # Memo of researcher findings across runs, keyed by question and research files fingerprint
+    RESEARCH_MEMO_ENABLED = os.getenv("RESEARCH_MEMO_ENABLED", "true").lower() == "true"
+    RESEARCH_MEMO_PATH = os.getenv("RESEARCH_MEMO_PATH", os.path.join(DATA_DIR, "research_memo.sqlite"))
+    # Findings older than this are researched again (0 = reuse until the files change)
+    RESEARCH_MEMO_TTL_SECONDS = float(os.getenv("RESEARCH_MEMO_TTL_SECONDS", "0"))
+
+    # Tracing of graph nodes, model calls and tool calls
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+    # Finished spans are appended to this JSON lines file
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(DATA_DIR, "traces.jsonl"))
+    # Also record the spans with OpenTelemetry (requires opentelemetry-sdk and a configured exporter)
+    TRACING_OTEL = os.getenv("TRACING_OTEL", "false").lower() == "true"
+
+    # Concurrent tool execution inside a researcher turn
+    # Global cap on in-flight tool calls across all researchers in the process
+    TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+    # Per-tool caps, e.g. "read_file=4,search_files=2" (tools not listed use only the global cap)
+    TOOL_CONCURRENCY_LIMITS = os.getenv("TOOL_CONCURRENCY_LIMITS", "")
+    # Timeout for a single tool call in seconds
+    TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "60"))
+
+    # Fail the run if any callback blocks the event loop for longer than this many
+    # seconds (0 disables the guard). Every node must use async model calls.
+    ASYNC_BLOCKING_GUARD_SECONDS = float(os.getenv("ASYNC_BLOCKING_GUARD_SECONDS", "0"))
     
     @classmethod
     def get_scope_agent_model(cls) -> str:
@@ -32,6 +168,21 @@ class Config:
     def get_research_agent_model(cls) -> str:
         """Get the model configuration for the research agent."""
         return cls.RESEARCH_AGENT_MODEL
+
+    @classmethod
+    def get_research_context_token_budget(cls) -> int:
+        """Get the prompt token budget for the research agent."""
+        return cls.RESEARCH_CONTEXT_TOKEN_BUDGET
+
+    @classmethod
+    def get_research_context_keep_recent_tool_results(cls) -> int:
+        """Get the number of recent tool outputs never compacted in the research agent's prompt."""
+        return cls.RESEARCH_CONTEXT_KEEP_RECENT_TOOL_RESULTS
+
+    @classmethod
+    def get_research_compression_mode(cls) -> str:
+        """Get how a researcher's findings are compressed: final or incremental."""
+        return cls.RESEARCH_COMPRESSION_MODE
     
     @classmethod
     def get_supervisor_agent_model(cls) -> str:
@@ -43,5 +194,279 @@ class Config:
         """Get the model configuration for the final report agent."""
         return cls.FINAL_REPORT_AGENT_MODEL
 
+    @classmethod
+    def get_report_map_reduce_threshold_tokens(cls) -> int:
+        """Get the findings size (tokens) above which the report is generated map-reduce style."""
+        return cls.REPORT_MAP_REDUCE_THRESHOLD_TOKENS
+
+    @classmethod
+    def get_report_section_token_budget(cls) -> int:
+        """Get the maximum findings tokens per section draft."""
+        return cls.REPORT_SECTION_TOKEN_BUDGET
+
+    @classmethod
+    def get_scope_mode(cls) -> str:
+        """Get how the request is scoped before research: sequential, speculative or merged."""
+        return cls.SCOPE_MODE
+
+    @classmethod
+    def get_max_concurrent_researchers(cls) -> int:
+        """Get the maximum number of concurrent research agents."""
+        return cls.MAX_CONCURRENT_RESEARCHERS
+
+    @classmethod
+    def get_max_global_researchers(cls) -> int:
+        """Get the maximum number of research agents running across all runs."""
+        return cls.MAX_GLOBAL_RESEARCHERS
+
+    @classmethod
+    def get_max_inflight_llm_calls(cls) -> int:
+        """Get the maximum number of model calls in flight across all runs."""
+        return cls.MAX_INFLIGHT_LLM_CALLS
+
+    @classmethod
+    def get_model_rate_limits(cls, model: str) -> tuple[int, int]:
+        """Get the (requests per minute, tokens per minute) limits of a model, 0 meaning unlimited.
+
+        Models are matched with or without their provider prefix ("openai:gpt-4.1" or "gpt-4.1").
+        """
+        for item in cls.MODEL_RATE_LIMITS.split(","):
+            if "=" not in item:
+                continue
+            name, limits = item.rsplit("=", 1)
+            name = name.strip()
+            if model in (name, name.split(":", 1)[-1]):
+                rpm, _, tpm = limits.partition("/")
+                return int(rpm or 0), int(tpm or 0)
+        return cls.MODEL_RPM_LIMIT, cls.MODEL_TPM_LIMIT
+
+    @classmethod
+    def get_reflection_model(cls) -> str:
+        """Get the model of the researcher turns reading fresh tool results."""
+        return cls.REFLECTION_MODEL
+
+    @classmethod
+    def get_compression_model(cls) -> str:
+        """Get the model compressing researcher findings."""
+        return cls.COMPRESSION_MODEL
+
+    @classmethod
+    def get_report_section_model(cls) -> str:
+        """Get the model drafting the sections of a map-reduce report."""
+        return cls.REPORT_SECTION_MODEL
+
+    @classmethod
+    def get_model_timeout_seconds(cls, role: str | None = None) -> float:
+        """Get the time after which a model call of a role is abandoned (0 = never).
+
+        MODEL_TIMEOUTS overrides MODEL_TIMEOUT_SECONDS for the roles it names.
+        """
+        for item in cls.MODEL_TIMEOUTS.split(","):
+            if "=" not in item:
+                continue
+            name, seconds = (part.strip() for part in item.split("=", 1))
+            if name == role and seconds:
+                return float(seconds)
+        return cls.MODEL_TIMEOUT_SECONDS
+
+    @classmethod
+    def get_model_fallback(cls, model: str) -> str | None:
+        """Get the model taking over the calls of a model that time out, None if it has none.
+
+        Models are matched with or without their provider prefix ("openai:gpt-4.1" or "gpt-4.1").
+        """
+        for item in cls.MODEL_FALLBACKS.split(","):
+            if "=" not in item:
+                continue
+            name, fallback = (part.strip() for part in item.split("=", 1))
+            if model in (name, name.split(":", 1)[-1]) and fallback:
+                return fallback
+        return None
+
+    @classmethod
+    def get_model_max_retries(cls) -> int:
+        """Get the number of retries of a model call failing with a retryable error."""
+        return cls.MODEL_MAX_RETRIES
+
+    @classmethod
+    def get_model_retry_base_seconds(cls) -> float:
+        """Get the base delay of the exponential backoff between model call retries."""
+        return cls.MODEL_RETRY_BASE_SECONDS
+
+    @classmethod
+    def get_model_retry_max_seconds(cls) -> float:
+        """Get the maximum delay between model call retries."""
+        return cls.MODEL_RETRY_MAX_SECONDS
+
+    @classmethod
+    def get_model_adaptive_concurrency(cls) -> bool:
+        """Get whether each model's concurrency adapts to rate limit and server errors."""
+        return cls.MODEL_ADAPTIVE_CONCURRENCY
+
+    @classmethod
+    def get_supervisor_max_iterations(cls) -> int:
+        """Get the maximum number of supervisor iterations per run."""
+        return cls.SUPERVISOR_MAX_ITERATIONS
+
+    @classmethod
+    def get_researcher_max_iterations(cls) -> int:
+        """Get the model turn budget of one researcher, think_tool turns included (0 = unlimited)."""
+        return cls.RESEARCHER_MAX_ITERATIONS
+
+    @classmethod
+    def get_researcher_max_tool_calls(cls) -> int:
+        """Get the tool call budget of one researcher (0 = unlimited)."""
+        return cls.RESEARCHER_MAX_TOOL_CALLS
+
+    @classmethod
+    def get_researcher_max_tokens(cls) -> int:
+        """Get the model token budget of one researcher (0 = unlimited)."""
+        return cls.RESEARCHER_MAX_TOKENS
+
+    @classmethod
+    def get_researcher_max_seconds(cls) -> float:
+        """Get the wall time budget of one researcher in seconds (0 = unlimited)."""
+        return cls.RESEARCHER_MAX_SECONDS
+
+    @classmethod
+    def get_run_max_tool_calls(cls) -> int:
+        """Get the tool call budget of one run (0 = unlimited)."""
+        return cls.RUN_MAX_TOOL_CALLS
+
+    @classmethod
+    def get_run_max_tokens(cls) -> int:
+        """Get the model token budget of one run (0 = unlimited)."""
+        return cls.RUN_MAX_TOKENS
+
+    @classmethod
+    def get_run_max_seconds(cls) -> float:
+        """Get the research wall time budget of one run in seconds (0 = unlimited)."""
+        return cls.RUN_MAX_SECONDS
+
+    @classmethod
+    def get_research_novelty_threshold(cls) -> float:
+        """Get the novelty below which a researcher's step counts as bringing little new information."""
+        return cls.RESEARCH_NOVELTY_THRESHOLD
+
+    @classmethod
+    def get_research_novelty_patience(cls) -> int:
+        """Get the number of low novelty steps in a row after which a researcher stops (0 = never)."""
+        return cls.RESEARCH_NOVELTY_PATIENCE
+
+    @classmethod
+    def get_research_dedup_threshold(cls) -> float:
+        """Get the question similarity above which research tasks are deduplicated."""
+        return cls.RESEARCH_DEDUP_THRESHOLD
+
+    @classmethod
+    def get_supervisor_digest_tokens(cls) -> int:
+        """Get the size of the digests of earlier findings in the supervisor's prompt."""
+        return cls.SUPERVISOR_DIGEST_TOKENS
+
+    @classmethod
+    def get_batch_concurrency(cls) -> int:
+        """Get the number of briefs the batch runner researches at the same time."""
+        return cls.BATCH_CONCURRENCY
+
+    @classmethod
+    def get_research_files_dir(cls) -> str:
+        """Get the directory holding the research documents."""
+        return cls.RESEARCH_FILES_DIR
+
+    @classmethod
+    def get_raw_notes_spill_bytes(cls) -> int:
+        """Get the size above which raw notes are kept in the blob store instead of the state."""
+        return cls.RAW_NOTES_SPILL_BYTES
+
+    @classmethod
+    def get_blob_store_dir(cls) -> str:
+        """Get the directory of the raw notes blob store."""
+        return cls.BLOB_STORE_DIR
+
+    @classmethod
+    def get_reader_chunk_chars(cls) -> int:
+        """Get the largest chunk of a file returned by one read_document call."""
+        return cls.READER_CHUNK_CHARS
+
+    @classmethod
+    def get_reader_cache_mb(cls) -> int:
+        """Get the size of the reader's shared page cache in megabytes."""
+        return cls.READER_CACHE_MB
+
+    @classmethod
+    def get_llm_cache_backend(cls) -> str:
+        """Get the LLM response cache backend (none, memory or sqlite)."""
+        return cls.LLM_CACHE_BACKEND.lower()
+
+    @classmethod
+    def get_llm_cache_path(cls) -> str:
+        """Get the SQLite file used by the sqlite LLM response cache."""
+        return cls.LLM_CACHE_PATH
+
+    @classmethod
+    def get_llm_cache_ttl_seconds(cls) -> float | None:
+        """Get the LLM response cache TTL in seconds, None if entries never expire."""
+        return cls.LLM_CACHE_TTL_SECONDS or None
+
+    @classmethod
+    def get_llm_cache_max_entries(cls) -> int:
+        """Get the maximum number of LLM response cache entries."""
+        return cls.LLM_CACHE_MAX_ENTRIES
+
+    @classmethod
+    def get_checkpoint_path(cls) -> str:
+        """Get the SQLite file used to checkpoint graph runs."""
+        return cls.CHECKPOINT_PATH
+
+    @classmethod
+    def get_research_memo_enabled(cls) -> bool:
+        """Get whether researcher findings are memoized across runs."""
+        return cls.RESEARCH_MEMO_ENABLED
+
+    @classmethod
+    def get_research_memo_path(cls) -> str:
+        """Get the SQLite file holding the research memo."""
+        return cls.RESEARCH_MEMO_PATH
+
+    @classmethod
+    def get_research_memo_ttl_seconds(cls) -> float | None:
+        """Get the research memo TTL in seconds, None if findings are reused until the files change."""
+        return cls.RESEARCH_MEMO_TTL_SECONDS or None
+
+    @classmethod
+    def get_tracing_enabled(cls) -> bool:
+        """Get whether runs are traced."""
+        return cls.TRACING_ENABLED
+
+    @classmethod
+    def get_trace_export_path(cls) -> str:
+        """Get the JSON lines file receiving the finished spans."""
+        return cls.TRACE_EXPORT_PATH
+
+    @classmethod
+    def get_tracing_otel(cls) -> bool:
+        """Get whether spans are also recorded with OpenTelemetry."""
+        return cls.TRACING_OTEL
+
+    @classmethod
+    def get_tool_max_concurrency(cls) -> int:
+        """Get the global cap on concurrent tool calls."""
+        return cls.TOOL_MAX_CONCURRENCY
+
+    @classmethod
+    def get_tool_concurrency_limits(cls) -> dict[str, int]:
+        """Get the per-tool concurrency caps parsed from TOOL_CONCURRENCY_LIMITS."""
+        limits = {}
+        for item in cls.TOOL_CONCURRENCY_LIMITS.split(","):
+            if "=" in item:
+                name, limit = item.split("=", 1)
+                limits[name.strip()] = int(limit)
+        return limits
+
+    @classmethod
+    def get_tool_call_timeout(cls) -> float:
+        """Get the timeout in seconds for a single tool call."""
+        return cls.TOOL_CALL_TIMEOUT_SECONDS
+
 # Create a global config instance
 config = Config()
\ No newline at end of file
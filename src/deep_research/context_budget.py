@@ -0,0 +1,107 @@
+"""Token-budgeted view of the researcher's message history.
+
+llm_call resends the whole researcher_messages history on every iteration, and
+most of it is tool output (whole files read verbatim), so prompt size - and
+latency - grow with every step. Before each model call the history is compacted:
+token counts are tracked per message, and while the prompt is over the budget the
+oldest tool outputs are replaced by a short excerpt plus a reference to the tool
+call that produced them. The most recent tool outputs are always kept verbatim.
+
+Only the prompt view is compacted; the state keeps the full messages, so
+compress_research_finding and raw_notes still see everything.
+"""
+
+from collections import OrderedDict
+from typing import Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+# Characters of the original output kept in a compacted tool message
+EXCERPT_CHARS = 400
+
+# Token counts per message and compacted replacements per tool call, reused across
+# iterations (the history only grows, so earlier messages are never re-counted)
+_MAX_CACHED = 10000
+_token_counts: OrderedDict[str, int] = OrderedDict()
+_compacted_contents: OrderedDict[str, str] = OrderedDict()
+
+
+def _remember(cache: OrderedDict, key: str, value) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > _MAX_CACHED:
+        cache.popitem(last=False)
+
+
+def count_message_tokens(message: BaseMessage) -> int:
+    """Approximate token count of a message, cached by message id."""
+    if message.id and message.id in _token_counts:
+        return _token_counts[message.id]
+    tokens = count_tokens_approximately([message])
+    if message.id:
+        _remember(_token_counts, message.id, tokens)
+    return tokens
+
+
+def _compacted_content(message: ToolMessage, tool_call: dict, tokens: int) -> str:
+    if message.tool_call_id in _compacted_contents:
+        return _compacted_contents[message.tool_call_id]
+    content = str(message.content)
+    excerpt = content[:EXCERPT_CHARS].rstrip()
+    call = f"{tool_call['name']}({tool_call['args']})" if tool_call else message.name
+    compacted = (
+        f"[Earlier output of {call}, ~{tokens} tokens, compacted to save context. "
+        f"Call the tool again if you need the full content.]\n{excerpt}"
+        + ("..." if len(content) > len(excerpt) else "")
+    )
+    _remember(_compacted_contents, message.tool_call_id, compacted)
+    return compacted
+
+
+def compact_messages(
+    messages: Sequence[BaseMessage],
+    token_budget: int,
+    keep_recent_tool_results: int = 2,
+    reserved_tokens: int = 0,
+) -> list[BaseMessage]:
+    """Fit the message history into a token budget by compacting old tool outputs.
+
+    Args:
+        messages: full message history
+        token_budget: target size of the prompt in tokens
+        keep_recent_tool_results: number of most recent tool outputs never compacted
+        reserved_tokens: tokens already used by the rest of the prompt (system prompt)
+
+    Returns:
+        The messages to send, with the oldest tool outputs replaced by excerpts
+        until the prompt fits the budget (or nothing else can be compacted)
+    """
+    messages = list(messages)
+    token_counts = [count_message_tokens(message) for message in messages]
+    total = reserved_tokens + sum(token_counts)
+    if total <= token_budget:
+        return messages
+
+    tool_calls_by_id = {
+        tool_call["id"]: tool_call
+        for message in messages if isinstance(message, AIMessage)
+        for tool_call in message.tool_calls
+    }
+    tool_positions = [i for i, message in enumerate(messages) if isinstance(message, ToolMessage)]
+    compactable = tool_positions[:-keep_recent_tool_results] if keep_recent_tool_results else tool_positions
+
+    # Oldest tool outputs first
+    for i in compactable:
+        if total <= token_budget:
+            break
+        message = messages[i]
+        compacted = message.model_copy(
+            update={"content": _compacted_content(message, tool_calls_by_id.get(message.tool_call_id), token_counts[i])}
+        )
+        compacted_tokens = count_tokens_approximately([compacted])
+        if compacted_tokens < token_counts[i]:
+            total -= token_counts[i] - compacted_tokens
+            messages[i] = compacted
+
+    return messages
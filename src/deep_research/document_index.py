@@ -0,0 +1,195 @@
+"""In-process BM25 full-text index over the research files directory.
+
+Through the filesystem MCP server the researcher has to list directories and read
+whole files turn by turn to find anything. This index splits every file into
+passages and ranks them with BM25, so a single search_documents call returns the
+most relevant snippets (with their file) in one round-trip.
+
+The index is refreshed before each search: only files whose mtime or size changed
+are re-indexed, and deleted files are dropped.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import config
+
+# BM25 parameters (standard defaults)
+K1 = 1.5
+B = 0.75
+
+# Passages are built from paragraphs, packed up to this many characters
+PASSAGE_CHARS = 800
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def split_passages(text: str, passage_chars: int = PASSAGE_CHARS) -> list[str]:
+    """Split a document into passages of whole paragraphs of up to passage_chars."""
+    passages, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > passage_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+        # a single very long paragraph is cut into fixed-size pieces
+        while len(current) > passage_chars * 2:
+            passages.append(current[:passage_chars])
+            current = current[passage_chars:]
+    if current:
+        passages.append(current)
+    return passages
+
+
+@dataclass
+class SearchResult:
+    """A passage matching a search: its file, BM25 score and a snippet of its text."""
+
+    path: str
+    score: float
+    snippet: str
+
+
+@dataclass
+class _Passage:
+    path: str
+    text: str
+    length: int
+
+
+class DocumentIndex:
+    """Incrementally updated BM25 index over a directory of text files.
+
+    Args:
+        root: directory to index (recursively)
+    """
+
+    def __init__(self, root: Path):
+        """Start an empty index of root - files are indexed on the first search."""
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        # file path -> (mtime, size) at indexing time, and its passage ids
+        self._file_stamps: dict[str, tuple[float, int]] = {}
+        self._file_passages: dict[str, list[int]] = {}
+        self._passages: dict[int, _Passage] = {}
+        # inverted index: term -> {passage id: term frequency}
+        self._postings: dict[str, dict[int, int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+
+    def _remove_file(self, path: str) -> None:
+        for passage_id in self._file_passages.pop(path, []):
+            passage = self._passages.pop(passage_id)
+            self._total_length -= passage.length
+            for term in set(tokenize(passage.text)):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(passage_id, None)
+                    if not postings:
+                        del self._postings[term]
+        self._file_stamps.pop(path, None)
+
+    def _add_file(self, path: str, text: str, stamp: tuple[float, int]) -> None:
+        passage_ids = []
+        for passage_text in split_passages(text):
+            tokens = tokenize(passage_text)
+            if not tokens:
+                continue
+            passage_id = self._next_id
+            self._next_id += 1
+            self._passages[passage_id] = _Passage(path=path, text=passage_text, length=len(tokens))
+            self._total_length += len(tokens)
+            for term, frequency in Counter(tokens).items():
+                self._postings.setdefault(term, {})[passage_id] = frequency
+            passage_ids.append(passage_id)
+        self._file_passages[path] = passage_ids
+        self._file_stamps[path] = stamp
+
+    def refresh(self) -> int:
+        """Re-index new and changed files, drop deleted ones.
+
+        Returns:
+            Number of files (re-)indexed or removed
+        """
+        with self._lock:
+            current = {}
+            if self.root.is_dir():
+                for file_path in self.root.rglob("*"):
+                    if file_path.is_file():
+                        stat = file_path.stat()
+                        current[str(file_path.relative_to(self.root))] = (stat.st_mtime, stat.st_size)
+
+            changed = 0
+            for path in list(self._file_stamps):
+                if path not in current:
+                    self._remove_file(path)
+                    changed += 1
+            for path, stamp in current.items():
+                if self._file_stamps.get(path) == stamp:
+                    continue
+                self._remove_file(path)
+                try:
+                    text = (self.root / path).read_text(encoding="utf-8")
+                except (UnicodeDecodeError, OSError):
+                    # binary or unreadable file: remember it so it isn't retried until it changes
+                    self._file_stamps[path] = stamp
+                    self._file_passages[path] = []
+                    continue
+                self._add_file(path, text, stamp)
+                changed += 1
+            return changed
+
+    def search(self, query: str, max_results: int = 5) -> list[SearchResult]:
+        """Rank passages against the query with BM25."""
+        with self._lock:
+            if not self._passages:
+                return []
+            passage_count = len(self._passages)
+            average_length = self._total_length / passage_count
+            scores: dict[int, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (passage_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for passage_id, frequency in postings.items():
+                    length = self._passages[passage_id].length
+                    scores[passage_id] = scores.get(passage_id, 0.0) + idf * (
+                        frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average_length))
+                    )
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:max_results]
+            return [
+                SearchResult(
+                    path=self._passages[passage_id].path,
+                    score=score,
+                    snippet=self._passages[passage_id].text,
+                )
+                for passage_id, score in ranked
+            ]
+
+
+# Global index over the research files - built lazily on first search, and rebuilt
+# when RESEARCH_FILES_DIR points somewhere else
+_index: DocumentIndex | None = None
+
+
+def get_document_index() -> DocumentIndex:
+    """Get the process-wide index of the research files (RESEARCH_FILES_DIR)."""
+    global _index
+    root = Path(config.get_research_files_dir()).resolve()
+    if _index is None or _index.root != root:
+        _index = DocumentIndex(root)
+    return _index
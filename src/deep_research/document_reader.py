@@ -0,0 +1,235 @@
+"""Chunked reader over the research files, backed by a shared LRU page cache.
+
+Through the filesystem MCP server, read_file returns a whole file: a long document
+becomes one huge ToolMessage, carried in every later prompt of the researcher and
+in its raw notes - and every parallel researcher reading the same file reads it
+from disk and sends it again. The reader tools let the model pull only what it
+needs:
+
+- document_outline: size and markdown sections (with their byte ranges) of a file
+- read_document: one section by heading, or a byte range (offset / length),
+  capped at READER_CHUNK_CHARS, with the offset to continue from
+
+Files are read through memory maps, in fixed-size pages kept in an LRU cache
+(READER_CACHE_MB) shared by every researcher of the process. Pages are keyed by
+the file's mtime and size, so a changed file is never served from stale pages.
+Paths are resolved inside the research files directory only.
+"""
+
+import mmap
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import config
+
+# Size of a cached page
+PAGE_SIZE = 64 * 1024
+
+# Outlines kept in memory (they are small, and rebuilt from cached pages anyway)
+MAX_OUTLINES = 256
+
+_HEADING_PATTERN = re.compile(rb"^(#{1,6})[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class FileStamp:
+    """A file as of its last change - cached pages and outlines of older versions no longer match."""
+
+    path: str
+    mtime_ns: int
+    size: int
+
+
+@dataclass
+class Section:
+    """A Markdown section of a file: its heading, level and byte range."""
+
+    heading: str
+    level: int
+    start: int
+    end: int
+
+
+class PageCache:
+    """Thread-safe LRU cache of file pages, bounded in bytes.
+
+    Missing pages are read through a memory map of the file, only the requested
+    ones are copied out.
+    """
+
+    def __init__(self, max_bytes: int, page_size: int = PAGE_SIZE):
+        """Start an empty cache of pages of page_size bytes, max_bytes in total."""
+        self.max_bytes = max_bytes
+        self.page_size = page_size
+        self._pages: OrderedDict[tuple[FileStamp, int], bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: tuple[FileStamp, int]) -> bytes | None:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def _put(self, key: tuple[FileStamp, int], page: bytes) -> None:
+        with self._lock:
+            if key in self._pages:
+                return
+            self._pages[key] = page
+            self._bytes += len(page)
+            while self._bytes > self.max_bytes and len(self._pages) > 1:
+                _, evicted = self._pages.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def read(self, stamp: FileStamp, offset: int, length: int) -> bytes:
+        """Bytes [offset, offset + length) of the file, clipped to its size."""
+        end = min(stamp.size, offset + length)
+        if offset >= end:
+            return b""
+        first_page, last_page = offset // self.page_size, (end - 1) // self.page_size
+        pages = {number: self._get((stamp, number)) for number in range(first_page, last_page + 1)}
+
+        missing = [number for number, page in pages.items() if page is None]
+        if missing:
+            with open(stamp.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for number in missing:
+                    page = mapped[number * self.page_size:(number + 1) * self.page_size]
+                    pages[number] = page
+                    self._put((stamp, number), page)
+
+        data = b"".join(pages[number] for number in range(first_page, last_page + 1))
+        start = offset - first_page * self.page_size
+        return data[start:start + end - offset]
+
+
+class DocumentReader:
+    """Reads sections and byte ranges of the files under `root`.
+
+    Args:
+        root: the research files directory - paths outside it are refused
+        cache: page cache, shared between readers
+    """
+
+    def __init__(self, root: Path, cache: PageCache):
+        """Read the files under root through the shared page cache."""
+        self.root = Path(root).resolve()
+        self.cache = cache
+        self._outlines: OrderedDict[FileStamp, list[Section]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stamp(self, path: str) -> FileStamp:
+        """Resolve a path relative to the research files directory and stat it."""
+        resolved = (self.root / path.lstrip("/\\")).resolve()
+        if resolved != self.root and self.root not in resolved.parents:
+            raise ValueError(f"{path} is outside the research files directory")
+        if not resolved.is_file():
+            raise FileNotFoundError(f"{path} does not exist")
+        stat = resolved.stat()
+        return FileStamp(path=str(resolved), mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+    def read_range(self, path: str, offset: int, length: int) -> tuple[str, FileStamp]:
+        """Text of a byte range (characters cut by the range boundaries are dropped)."""
+        stamp = self.stamp(path)
+        data = self.cache.read(stamp, max(0, offset), max(0, length))
+        return data.decode("utf-8", errors="ignore"), stamp
+
+    def outline(self, path: str) -> tuple[list[Section], FileStamp]:
+        """Markdown sections of a file, each running until the next heading."""
+        stamp = self.stamp(path)
+        with self._lock:
+            sections = self._outlines.get(stamp)
+            if sections is not None:
+                self._outlines.move_to_end(stamp)
+                return sections, stamp
+
+        data = self.cache.read(stamp, 0, stamp.size)
+        headings = [
+            (match.start(), len(match.group(1)), match.group(2).decode("utf-8", errors="replace"))
+            for match in _HEADING_PATTERN.finditer(data)
+        ]
+        sections = [
+            Section(heading=heading, level=level, start=start, end=headings[i + 1][0] if i + 1 < len(headings) else stamp.size)
+            for i, (start, level, heading) in enumerate(headings)
+        ]
+
+        with self._lock:
+            self._outlines[stamp] = sections
+            while len(self._outlines) > MAX_OUTLINES:
+                self._outlines.popitem(last=False)
+        return sections, stamp
+
+    def find_section(self, path: str, heading: str) -> Section | None:
+        """Section by heading: exact (case-insensitive) match first, then the first containing it."""
+        sections, _ = self.outline(path)
+        wanted = heading.strip().lstrip("#").strip().lower()
+        for section in sections:
+            if section.heading.lower() == wanted:
+                return section
+        return next((section for section in sections if wanted in section.heading.lower()), None)
+
+
+# Page cache shared by every researcher, and the reader of the research files directory
+_page_cache: PageCache | None = None
+_reader: DocumentReader | None = None
+
+
+def get_document_reader() -> DocumentReader:
+    """Get the reader of the research files directory (RESEARCH_FILES_DIR), on the shared page cache."""
+    global _page_cache, _reader
+    if _page_cache is None:
+        _page_cache = PageCache(max(1, config.get_reader_cache_mb()) * 1024 * 1024)
+    root = Path(config.get_research_files_dir()).resolve()
+    if _reader is None or _reader.root != root:
+        _reader = DocumentReader(root, _page_cache)
+    return _reader
+
+
+def format_outline(path: str, sections: list[Section], size: int) -> str:
+    """Format the outline of a file for the model: its sections with their offsets and sizes."""
+    lines = [f"{path}: {size} bytes, {len(sections)} sections"]
+    for section in sections:
+        indent = "  " * (section.level - 1)
+        lines.append(f"{indent}- {section.heading} (offset {section.start}, {section.end - section.start} bytes)")
+    return "\n".join(lines)
+
+
+def read_chunk(path: str, offset: int = 0, length: int | None = None, section: str = "") -> str:
+    """Read a section or a byte range of a research file, formatted for the model."""
+    reader = get_document_reader()
+    max_length = config.get_reader_chunk_chars()
+    length = max_length if not length or length <= 0 else min(length, max_length)
+
+    if section:
+        found = reader.find_section(path, section)
+        if found is None:
+            sections, stamp = reader.outline(path)
+            return f"No section matching '{section}'.\n" + format_outline(path, sections, stamp.size)
+        offset = found.start
+        length = min(length, found.end - found.start)
+        label = f"section '{found.heading}' "
+    else:
+        label = ""
+
+    text, stamp = reader.read_range(path, offset, length)
+    end = min(stamp.size, max(0, offset) + length)
+    header = f"{path} {label}bytes {max(0, offset)}-{end} of {stamp.size}"
+    if section and found is not None and end < found.end:
+        header += f" (section continues: offset {end})"
+    elif end < stamp.size:
+        header += f" (next offset: {end})"
+    return f"{header}\n\n{text}"
+
+
+def outline_document(path: str) -> str:
+    """Outline of a research file, formatted for the model."""
+    sections, stamp = get_document_reader().outline(path)
+    return format_outline(path, sections, stamp.size)
@@ -0,0 +1,193 @@
+"""Deterministic scripted chat model for offline benchmarks.
+
+ScriptedChatModel stands in for every agent's model (models.set_model_override). It picks
+its answer from the tools bound to it, so a single instance plays every role:
+
+- ClarifyWithUser / ResearchQuestion / ScopeDecision bound: structured scope answers
+- ConductResearch bound (supervisor): fan out `research_topics` questions on each
+  of the first `research_rounds` turns, then ResearchComplete
+- researcher tools bound: search_documents + a read (read_document if bound,
+  else read_file), then think_tool, then a final answer
+- no tools (compression, report sections, final report): filler text of
+  `output_tokens` tokens
+
+Each call sleeps `latency_seconds + prompt tokens * seconds_per_prompt_token +
+output_tokens * seconds_per_output_token` and reports usage_metadata, and the model records call counts, token totals and the
+peak number of concurrent calls in `stats`.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+# Distinct research questions for the supervisor's fan-out
+RESEARCH_TOPICS = [
+    "history and origins of the benchmark subject",
+    "pricing and cost comparison across vendors",
+    "equipment and brewing methods in use",
+    "customer reviews and reputation",
+    "locations, opening hours and accessibility",
+    "sustainability and sourcing practices",
+]
+
+
+class FakeModelStats:
+    """Counters shared by a fake model and every copy made by bind_tools."""
+
+    def __init__(self):
+        """Start all counters at zero."""
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def start(self, prompt_tokens: int) -> None:
+        """Count a call starting with a prompt of prompt_tokens."""
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finish(self, completion_tokens: int) -> None:
+        """Count a call finishing with completion_tokens."""
+        with self._lock:
+            self.in_flight -= 1
+            self.completion_tokens += completion_tokens
+
+    def as_dict(self) -> dict:
+        """Return the counters for the benchmark report."""
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "max_concurrent_calls": self.max_in_flight,
+        }
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Fake chat model answering every node of the deep research graph."""
+
+    model_name: str = "scripted-fake"
+    latency_seconds: float = 0.1
+    seconds_per_prompt_token: float = 0.0
+    seconds_per_output_token: float = 0.0
+    output_tokens: int = 200
+    research_topics: int = 3
+    research_rounds: int = 1
+    bound_tool_names: list[str] = Field(default_factory=list)
+    _stats: FakeModelStats = PrivateAttr(default_factory=FakeModelStats)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def stats(self) -> FakeModelStats:
+        """Counters of this model and of its bound copies."""
+        return self._stats
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "ScriptedChatModel":
+        """Return a copy that answers with calls of the given tools, sharing these counters."""
+        bound = self.model_copy(update={
+            "bound_tool_names": [convert_to_openai_tool(tool)["function"]["name"] for tool in tools]
+        })
+        # copies share the counters of the original model
+        bound._stats = self._stats
+        return bound
+
+    def _tool_call(self, name: str, args: dict, index: int) -> dict:
+        return {"name": name, "args": args, "id": f"call_{name}_{index}", "type": "tool_call"}
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        tools = self.bound_tool_names
+        filler = " ".join(["finding"] * self.output_tokens)
+
+        if "ClarifyWithUser" in tools:
+            return AIMessage(content="", tool_calls=[self._tool_call("ClarifyWithUser", {
+                "requires_clarification": False,
+                "question": "",
+                "verification_message": "I have enough information to start the research.",
+            }, 0)])
+
+        if "ScopeDecision" in tools:
+            return AIMessage(content="", tool_calls=[self._tool_call("ScopeDecision", {
+                "requires_clarification": False,
+                "question": "",
+                "verification_message": "I have enough information to start the research.",
+                "research_brief": "Research the benchmark topics in the local research files.",
+            }, 0)])
+
+        if "ResearchQuestion" in tools:
+            return AIMessage(content="", tool_calls=[self._tool_call("ResearchQuestion", {
+                "research_brief": "Research the benchmark topics in the local research files.",
+            }, 0)])
+
+        if "ConductResearch" in tools:
+            research_round = len([message for message in messages if isinstance(message, AIMessage)])
+            if research_round >= self.research_rounds:
+                return AIMessage(content="", tool_calls=[self._tool_call("ResearchComplete", {}, 0)])
+            return AIMessage(content="", tool_calls=[
+                self._tool_call("ConductResearch", {"research_question": RESEARCH_TOPICS[i % len(RESEARCH_TOPICS)]}, i)
+                for i in range(research_round * self.research_topics, (research_round + 1) * self.research_topics)
+            ])
+
+        if "think_tool" in tools:
+            step = len([message for message in messages if isinstance(message, AIMessage)])
+            if step == 0:
+                calls = []
+                if "search_documents" in tools:
+                    calls.append(self._tool_call("search_documents", {"query": "benchmark topic findings"}, len(messages)))
+                if "read_document" in tools:
+                    calls.append(self._tool_call("read_document", {"path": "doc_0.md"}, len(messages) + 1))
+                elif "read_file" in tools:
+                    calls.append(self._tool_call("read_file", {"path": "doc_0.md"}, len(messages) + 1))
+                if calls:
+                    return AIMessage(content="", tool_calls=calls)
+            if step <= 1:
+                return AIMessage(content="", tool_calls=[
+                    self._tool_call("think_tool", {"reflection": "I have enough information."}, len(messages))
+                ])
+            return AIMessage(content=filler)
+
+        return AIMessage(content=filler)
+
+    def _finish(self, messages: list[BaseMessage], prompt_tokens: int) -> ChatResult:
+        message = self._respond(messages)
+        completion_tokens = max(1, count_tokens_approximately([message]))
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        self._stats.finish(completion_tokens)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _delay(self, prompt_tokens: int) -> float:
+        return (
+            self.latency_seconds
+            + prompt_tokens * self.seconds_per_prompt_token
+            + self.output_tokens * self.seconds_per_output_token
+        )
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt_tokens = count_tokens_approximately(messages)
+        self._stats.start(prompt_tokens)
+        time.sleep(self._delay(prompt_tokens))
+        return self._finish(messages, prompt_tokens)
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt_tokens = count_tokens_approximately(messages)
+        self._stats.start(prompt_tokens)
+        await asyncio.sleep(self._delay(prompt_tokens))
+        return self._finish(messages, prompt_tokens)
@@ -0,0 +1,87 @@
+"""Local stand-in for @modelcontextprotocol/server-filesystem, used by the benchmarks.
+
+Serves the same core tools (list_allowed_directories, list_directory, read_file,
+read_multiple_files, search_files) over stdio for one root directory, without
+needing node/npx or network access. An optional fixed latency per call simulates
+a slower server.
+
+Usage:
+    python fake_mcp_server.py <root directory> [latency seconds]
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+
+# Served directory and latency per call - set by configure (from the command line when run as a script)
+root = Path.cwd()
+latency = 0.0
+
+server = FastMCP("fake-filesystem", log_level="WARNING")
+
+
+def configure(root_directory: str, latency_seconds: float = 0.0) -> None:
+    """Serve root_directory, sleeping latency_seconds in every tool call."""
+    global root, latency
+    root = Path(root_directory).resolve()
+    latency = latency_seconds
+
+
+def _resolve(path: str) -> Path:
+    # same sandboxing as the real server: only paths inside the root are allowed
+    resolved = (root / path).resolve() if not Path(path).is_absolute() else Path(path).resolve()
+    if resolved != root and root not in resolved.parents:
+        raise ValueError(f"Access denied - path outside allowed directories: {path}")
+    return resolved
+
+
+@server.tool()
+async def list_allowed_directories() -> str:
+    """Return the list of directories that this server is allowed to access."""
+    await asyncio.sleep(latency)
+    return f"Allowed directories:\n{root}"
+
+
+@server.tool()
+async def list_directory(path: str) -> str:
+    """Get a detailed listing of all files and directories in a specified path."""
+    await asyncio.sleep(latency)
+    return "\n".join(
+        f"{'[DIR]' if entry.is_dir() else '[FILE]'} {entry.name}"
+        for entry in sorted(_resolve(path).iterdir())
+    )
+
+
+@server.tool()
+async def read_file(path: str) -> str:
+    """Read the complete contents of a file from the file system."""
+    await asyncio.sleep(latency)
+    return _resolve(path).read_text(encoding="utf-8")
+
+
+@server.tool()
+async def read_multiple_files(paths: list[str]) -> str:
+    """Read the contents of multiple files simultaneously."""
+    await asyncio.sleep(latency)
+    return "\n---\n".join(f"{path}:\n{_resolve(path).read_text(encoding='utf-8')}" for path in paths)
+
+
+@server.tool()
+async def search_files(path: str, pattern: str) -> str:
+    """Recursively search for files and directories whose name matches a pattern."""
+    await asyncio.sleep(latency)
+    matches = [
+        str(match) for match in _resolve(path).rglob("*")
+        if pattern.lower() in match.name.lower()
+    ]
+    return "\n".join(matches) if matches else "No matches found"
+
+
+if __name__ == "__main__":
+    configure(
+        sys.argv[1] if len(sys.argv) > 1 else str(Path.cwd()),
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.0,
+    )
+    server.run(transport="stdio")
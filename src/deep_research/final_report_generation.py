@@ -1,34 +1,103 @@
-from langchain.chat_models import init_chat_model
+from langchain_core.messages.utils import count_tokens_approximately
 from state_agent import AgentState
-from prompts import final_report_generation_prompt
+from prompts import final_report_generation_prompt, report_section_drafting_prompt
 from utils import get_today_str
 from langchain_core.messages import HumanMessage
 import asyncio
 from config import config
+from model_calls import call_model
+from models import get_model_with_fallback
+from progress import emit_progress
+
+# Tag of the model call which writes the final report (token streamed to the user)
+FINAL_REPORT_TAG = "final_report"
+
+
+def group_notes_into_sections(notes: list[str], section_token_budget: int) -> list[list[str]]:
+    """
+    Group notes, in order, into sections of at most section_token_budget tokens.
+
+    A single note larger than the budget becomes a section on its own.
+    """
+    sections = []
+    current, current_tokens = [], 0
+    for note in notes:
+        note_tokens = count_tokens_approximately([HumanMessage(content=note)])
+        if current and current_tokens + note_tokens > section_token_budget:
+            sections.append(current)
+            current, current_tokens = [], 0
+        current.append(note)
+        current_tokens += note_tokens
+    if current:
+        sections.append(current)
+    return sections
+
+
+async def draft_sections(research_brief: str, notes: list[str]) -> list[str]:
+    """Map step of the hierarchical report: draft one section per group of notes, in parallel."""
+    sections = group_notes_into_sections(notes, config.get_report_section_token_budget())
+
+    async def draft(section_number: int, section_notes: list[str]) -> str:
+        prompt = report_section_drafting_prompt.format(
+            research_brief=research_brief,
+            findings="\n".join(section_notes),
+            section_number=section_number,
+            section_count=len(sections),
+            date=get_today_str()
+        )
+        # section drafts are the bulk of the report's calls - routed to REPORT_SECTION_MODEL
+        model, fallback = get_model_with_fallback("report_section")
+        response = await call_model(model, [HumanMessage(content=prompt)], fallback=fallback, role="report_section")
+        return str(response.content)
+
+    return list(await asyncio.gather(*(
+        draft(section_number, section_notes)
+        for section_number, section_notes in enumerate(sections, start=1)
+    )))
 
-# Initialize model using config
-writer_model = init_chat_model(model=config.get_final_report_agent_model(), max_tokens=32000)
 
 async def final_report_generation(state: AgentState):
     """
     Final report generation node.
 
     Synthesizes all research findings into a comprehensive final report
+
+    When the findings are larger than REPORT_MAP_REDUCE_THRESHOLD_TOKENS they would make
+    a single very long (or context-overflowing) call, so the report is built hierarchically:
+    notes are grouped into sections, the sections are drafted in parallel, and a final
+    pass merges the drafts into the report.
     """
 
     notes = state.get("notes", [])
+    research_brief = state.get("research_brief", "")
 
     findings = "\n".join(notes)
 
+    # Choose single-pass or map-reduce based on the measured size of the findings
+    findings_tokens = count_tokens_approximately([HumanMessage(content=findings)])
+    map_reduce = len(notes) > 1 and findings_tokens > config.get_report_map_reduce_threshold_tokens()
+    emit_progress("report_started", mode="map_reduce" if map_reduce else "single", findings_tokens=findings_tokens)
+    if map_reduce:
+        section_drafts = await draft_sections(research_brief, notes)
+        findings = "\n\n".join(section_drafts)
+
     final_report_prompt = final_report_generation_prompt.format(
-        research_brief=state.get("research_brief", ""),
+        research_brief=research_brief,
         findings=findings,
         date=get_today_str()
     )
 
-    final_report = await writer_model.ainvoke([HumanMessage(content=final_report_prompt)])
+    # Tagged so that streaming callers can pick the report tokens out of the message stream
+    model, fallback = get_model_with_fallback("final_report")
+    final_report = await call_model(
+        model,
+        [HumanMessage(content=final_report_prompt)],
+        run_config={"tags": [FINAL_REPORT_TAG]},
+        fallback=fallback,
+        role="final_report",
+    )
 
     return {
         "final_report": final_report.content, 
         "messages": ["Here is the final report: " + final_report.content],
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,101 @@
+"""Import-time benchmark: how long a fresh process takes to get going.
+
+Each scenario runs in a new interpreter with `python -X importtime`, without any
+provider API keys in the environment (importing must not need them), and reports
+the wall time plus the slowest direct imports of the measured module.
+
+Scenarios:
+- config / models / workflow / batch: importing the module
+- cli --help: `python workflow.py --help` (process start to exit)
+- graph: importing workflow and compiling deep_research_agent (the first-use cost
+  paid by a worker before its first run)
+
+Exits with status 1 when a cold-start scenario (everything but graph) takes longer
+than --max-seconds, so the check can run in CI.
+
+Usage:
+    python import_benchmark.py
+    python import_benchmark.py --max-seconds 0.5 --top 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+# scenario -> interpreter arguments, and the importtime nesting level of the
+# imports made by the measured module (1 below an `import x`, 0 for a script)
+SCENARIOS = {
+    "config": (["-c", "import config"], 1),
+    "models": (["-c", "import models"], 1),
+    "workflow": (["-c", "import workflow"], 1),
+    "batch": (["-c", "import batch"], 1),
+    "cli --help": (["workflow.py", "--help"], 0),
+    "graph": (["-c", "import workflow; workflow.deep_research_agent"], 1),
+}
+
+# Paid once by a worker before its first run, not at startup
+FIRST_USE_SCENARIOS = ("graph",)
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, str, int]]:
+    """Parse `-X importtime` output into (cumulative microseconds, module, nesting level)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            # the header line
+            continue
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(cumulative_us), name.strip(), level))
+    return entries
+
+
+def run_scenario(args: list[str]) -> tuple[float, list[tuple[int, str, int]]]:
+    """Run python -X importtime with the scenario's arguments: its wall time and import entries."""
+    # no provider keys: importing (and --help) must work without them
+    env = {key: value for key, value in os.environ.items() if not key.endswith("_API_KEY")}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(HERE), env.get("PYTHONPATH")]))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], cwd=HERE, env=env, capture_output=True, text=True, check=False
+    )
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{completed.stderr[-2000:]}")
+    return seconds, parse_importtime(completed.stderr)
+
+
+def main(argv=None) -> int:
+    """Measure every scenario - a non-zero exit code when a cold start is over budget."""
+    parser = argparse.ArgumentParser(description="Measure the import time of the deep research modules")
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="fail if a cold start takes longer")
+    parser.add_argument("--top", type=int, default=8, help="slowest direct imports shown per scenario")
+    args = parser.parse_args(argv)
+
+    failed = []
+    for name, (scenario_args, level) in SCENARIOS.items():
+        seconds, entries = run_scenario(scenario_args)
+        over_budget = name not in FIRST_USE_SCENARIOS and seconds > args.max_seconds
+        if over_budget:
+            failed.append(name)
+        print(f"{name:<12}{seconds:>8.3f}s{'  OVER BUDGET' if over_budget else ''}")
+        # the slowest imports made directly by the measured module
+        direct = sorted((entry for entry in entries if entry[2] == level), reverse=True)[:args.top]
+        for cumulative_us, module, _ in direct:
+            print(f"    {cumulative_us / 1e6:>7.3f}s  {module}")
+
+    if failed:
+        print(f"\nslower than {args.max_seconds}s: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
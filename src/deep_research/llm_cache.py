@@ -0,0 +1,200 @@
+"""Content-addressed response cache for every chat model in the process.
+
+All agents get their models from models.get_model (init_chat_model) and most run
+at temperature 0, so the same prompt gives the same answer - a resumed run or a
+regression test replays dozens of identical calls. The cache plugs into LangChain's global LLM
+cache (set_llm_cache), so every init_chat_model instance uses it without any
+change at the call sites.
+
+Keys are a sha256 over:
+- the llm_string LangChain builds for the call: model id, parameters and the
+  bound tool schemas / structured output format
+- the normalized messages: serialized messages without per-run ids and
+  provider metadata, so a replayed conversation maps to the same key
+
+Backends: in-memory LRU (per process) and SQLite (shared across runs), both
+with a TTL and a maximum number of entries (least recently used evicted first).
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.load import dumps, loads
+
+from config import config
+
+# Message fields which differ between runs without changing the prompt
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.get("lc") == 1 and isinstance(value.get("kwargs"), dict):
+            kwargs = {k: v for k, v in value["kwargs"].items() if k not in _VOLATILE_MESSAGE_FIELDS}
+            return {**value, "kwargs": _normalize(kwargs)}
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Build the content address of a model call.
+
+    Args:
+        prompt: the serialized messages, as passed to BaseCache.lookup
+        llm_string: model id, parameters and bound tools, as passed to BaseCache.lookup
+    """
+    try:
+        prompt = json.dumps(_normalize(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        # not JSON (plain text LLM prompt) - use as is
+        pass
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+
+class InMemoryResponseCache(BaseCache):
+    """In-process LRU response cache.
+
+    Args:
+        max_entries: entries kept before the least recently used ones are evicted
+        ttl_seconds: entries older than this are ignored and dropped (None = never expire)
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float | None = None):
+        """Start an empty cache."""
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Return the cached generations of the prompt and model, None if missing or expired."""
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, generations = entry
+            if self._ttl_seconds is not None and time.time() - created_at > self._ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Cache the generations of the prompt and model, evicting the least recently used entries."""
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            self._entries[key] = (time.time(), return_val)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(BaseCache):
+    """On-disk response cache shared across runs and processes.
+
+    Args:
+        database_path: SQLite file to store the responses in
+        max_entries: entries kept before the least recently used ones are evicted
+        ttl_seconds: entries older than this are ignored and dropped (None = never expire)
+    """
+
+    def __init__(self, database_path: str, max_entries: int = 10000, ttl_seconds: float | None = None):
+        """Open (and create if needed) the responses table in the database file."""
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # LangChain runs async cache lookups in executor threads
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Return the cached generations of the prompt and model, None if missing or expired."""
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self._ttl_seconds is not None and now - created_at > self._ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return [loads(generation) for generation in json.loads(value)]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Cache the generations of the prompt and model, evicting the least recently used and expired rows."""
+        key = cache_key(prompt, llm_string)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            # size-based eviction: keep the most recently used max_entries rows
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+            if self._ttl_seconds is not None:
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self._ttl_seconds,))
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every row."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+def build_llm_cache() -> BaseCache | None:
+    """Build the response cache selected by LLM_CACHE_BACKEND (none, memory or sqlite)."""
+    backend = config.get_llm_cache_backend()
+    ttl_seconds = config.get_llm_cache_ttl_seconds()
+    if backend == "memory":
+        return InMemoryResponseCache(max_entries=config.get_llm_cache_max_entries(), ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteResponseCache(
+            config.get_llm_cache_path(),
+            max_entries=config.get_llm_cache_max_entries(),
+            ttl_seconds=ttl_seconds,
+        )
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown LLM_CACHE_BACKEND: {backend!r} (expected none, memory or sqlite)")
+
+
+def configure_llm_cache() -> BaseCache | None:
+    """Install the configured response cache for every chat model in the process."""
+    cache = build_llm_cache()
+    set_llm_cache(cache)
+    return cache
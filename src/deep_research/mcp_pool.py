@@ -0,0 +1,247 @@
+"""Persistent MCP session pool shared by every researcher in the process.
+
+Opening an MCP session over the stdio transport spawns the server subprocess
+(`npx @modelcontextprotocol/server-filesystem ...`), runs the initialize
+handshake and lists the tools. Doing that on every llm_call / tool_execution_node
+step is the dominant fixed cost of a research loop, so instead we keep a small
+pool of long-lived sessions (one per concurrent researcher), cache the tool
+schemas once, ping idle sessions before reuse and reconnect broken ones.
+"""
+
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.tools import BaseTool
+
+from config import config
+from tools import mcp_config
+
+if TYPE_CHECKING:
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+# Errors which mean the underlying session/subprocess is gone and the
+# session has to be reopened (anything else is a normal tool error)
+try:
+    from anyio import BrokenResourceError, ClosedResourceError
+
+    _CONNECTION_ERRORS: tuple = (BrokenResourceError, ClosedResourceError, ConnectionError, EOFError)
+except ImportError:  # anyio is always installed with mcp, but keep the pool importable
+    _CONNECTION_ERRORS = (ConnectionError, EOFError)
+
+
+class _PooledSession:
+    """One open session per configured MCP server, plus the tools loaded on them.
+
+    The sessions are entered and exited inside a dedicated background task, because
+    the stdio transport is built on anyio task groups which must be closed by the
+    same task that opened them. Callers only ever use the session, never its lifetime.
+    """
+
+    def __init__(self, client: "MultiServerMCPClient", server_names: list[str]):
+        self._client = client
+        self._server_names = server_names
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._error: BaseException | None = None
+        self.sessions: dict[str, Any] = {}
+        self.tools_by_name: dict[str, BaseTool] = {}
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+        self.broken = False
+
+    async def open(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        await self.wait_ready()
+
+    async def wait_ready(self) -> None:
+        """Wait until the sessions are open, raising the error if they failed to open."""
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self) -> None:
+        from langchain_mcp_adapters.tools import load_mcp_tools
+
+        try:
+            async with AsyncExitStack() as stack:
+                for server_name in self._server_names:
+                    session = await stack.enter_async_context(self._client.session(server_name))
+                    self.sessions[server_name] = session
+                    for mcp_tool in await load_mcp_tools(session):
+                        self.tools_by_name[mcp_tool.name] = mcp_tool
+                self._ready.set()
+                # keep the sessions open until the pool closes this slot
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.broken = True
+            self.sessions = {}
+            self._ready.set()
+
+    async def ping(self) -> bool:
+        """Health check: every session must answer an MCP ping."""
+        if self.broken or not self.sessions:
+            return False
+        try:
+            for session in self.sessions.values():
+                await session.send_ping()
+            return True
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+
+
+class MCPSessionPool:
+    """Bounded pool of long-lived MCP sessions with cached tool schemas.
+
+    MCP sessions multiplex concurrent JSON-RPC requests, so sessions are shared
+    rather than checked out exclusively: each call goes to the least busy session,
+    and a new session is only opened while every open one is busy and the pool
+    is below its size limit.
+
+    Args:
+        connections: MCP server configuration, same format as MultiServerMCPClient
+        size: maximum number of sessions kept open (one per concurrent researcher)
+        health_check_interval: sessions idle for longer than this (seconds) are
+            pinged before being reused, and reopened if the ping fails
+    """
+
+    def __init__(self, connections: dict, size: int, health_check_interval: float = 30.0):
+        """Create an empty pool - sessions are opened on first use."""
+        # the MCP SDK is only imported once a pool is created (on the first research step)
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+
+        self._client = MultiServerMCPClient(connections)
+        self._server_names = list(connections)
+        self._size = max(1, size)
+        self._health_check_interval = health_check_interval
+        self._lock = asyncio.Lock()
+        self._slots: list[_PooledSession] = []
+        self._tools: list[BaseTool] | None = None
+
+    async def _acquire(self) -> _PooledSession:
+        while True:
+            # Only pick and reserve a slot under the lock: opening a session (starting the
+            # server) and health checks run outside it, so they never hold up other callers
+            async with self._lock:
+                # Drop sessions that died (reconnect below)
+                dead = [slot for slot in self._slots if slot.broken]
+                self._slots = [slot for slot in self._slots if not slot.broken]
+
+                idle_slots = [slot for slot in self._slots if slot.in_flight == 0]
+                opening = not idle_slots and len(self._slots) < self._size
+                if opening:
+                    slot = _PooledSession(self._client, self._server_names)
+                    self._slots.append(slot)
+                else:
+                    slot = min(self._slots, key=lambda s: s.in_flight)
+                # sessions idle for too long are pinged before reuse, by the caller reserving them
+                check = (
+                    not opening
+                    and slot.in_flight == 0
+                    and time.monotonic() - slot.last_used > self._health_check_interval
+                )
+                slot.in_flight += 1
+
+            for dead_slot in dead:
+                await dead_slot.close()
+            try:
+                if opening:
+                    await slot.open()
+                else:
+                    await slot.wait_ready()
+                if check and not await slot.ping():
+                    slot.broken = True
+            except BaseException:
+                slot.broken = True
+                self._release(slot)
+                raise
+            if not slot.broken:
+                return slot
+            self._release(slot)
+
+    def _release(self, slot: _PooledSession) -> None:
+        slot.last_used = time.monotonic()
+        slot.in_flight -= 1
+
+    async def _discard(self, slot: _PooledSession) -> None:
+        if slot in self._slots:
+            self._slots.remove(slot)
+        await slot.close()
+
+    @asynccontextmanager
+    async def session(self):
+        """Use a pooled session for the duration of the block."""
+        slot = await self._acquire()
+        try:
+            yield slot
+        except _CONNECTION_ERRORS:
+            slot.broken = True
+            raise
+        finally:
+            self._release(slot)
+
+    async def get_tools(self) -> list[BaseTool]:
+        """Get the MCP tools, listing them only once per process.
+
+        The returned tools are used for model binding (their schemas); execution goes
+        through call_tool so that each call runs on a healthy pooled session.
+        """
+        if self._tools is None:
+            async with self.session() as slot:
+                self._tools = list(slot.tools_by_name.values())
+        return self._tools
+
+    async def call_tool(self, name: str, args: dict) -> Any:
+        """Execute an MCP tool on a pooled session, reconnecting once if the session died."""
+        for attempt in range(2):
+            try:
+                async with self.session() as slot:
+                    return await slot.tools_by_name[name].ainvoke(args)
+            except _CONNECTION_ERRORS:
+                if attempt == 1:
+                    raise
+
+    async def close(self) -> None:
+        """Close every open session (and with it the MCP server subprocesses)."""
+        async with self._lock:
+            for slot in list(self._slots):
+                await self._discard(slot)
+        self._tools = None
+
+
+# Global pool - initialized lazily, sized to the supervisor's researcher concurrency
+_pool: MCPSessionPool | None = None
+
+
+def get_mcp_pool() -> MCPSessionPool:
+    """Get the process-wide MCP session pool of the researchers."""
+    global _pool
+    if _pool is None:
+        _pool = MCPSessionPool(mcp_config, size=config.get_max_concurrent_researchers())
+    return _pool
+
+
+async def close_mcp_pool() -> None:
+    """Close the sessions of the pool, if one was created - the next research step opens a new one."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def set_mcp_pool(pool: MCPSessionPool) -> None:
+    """Use the given pool for every researcher (e.g. a pool on a stand-in MCP server)."""
+    global _pool
+    _pool = pool
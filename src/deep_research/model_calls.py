@@ -0,0 +1,292 @@
+"""Single choke point for chat model calls.
+
+Every node calls its model through call_model instead of `model.ainvoke`, so that
+all model traffic in the process - all briefs of a batch, all researchers of every
+brief - shares the same limits:
+
+- MAX_INFLIGHT_LLM_CALLS bounds the number of requests in flight in the process
+- per model, token buckets keep requests/minute and tokens/minute under the
+  provider's limits (MODEL_RPM_LIMIT / MODEL_TPM_LIMIT / MODEL_RATE_LIMITS), so a
+  burst of parallel researchers queues here instead of hitting 429s
+- rate limit (429), server (5xx) and connection errors are retried with
+  exponential backoff and full jitter (honouring Retry-After), instead of failing
+  the node - and with it the supervisor's whole research step
+- per model, an adaptive (AIMD) concurrency limit halves when those errors appear
+  and grows back by one slot per round of successful calls, so under load the
+  throughput settles at the provider's ceiling instead of collapsing into retries
+- a call running longer than its role's timeout (MODEL_TIMEOUTS, else
+  MODEL_TIMEOUT_SECONDS) is abandoned and handed to the fallback model
+  (models.get_model_with_fallback) right away, instead of being retried on the
+  same slow model
+- a call that has already streamed tokens to the callers is neither retried nor
+  handed to the fallback, which would stream its output a second time
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import (
+    Runnable,
+    RunnableBinding,
+    RunnableConfig,
+    RunnableSequence,
+)
+from langchain_core.runnables.config import ensure_config, merge_configs
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Global limit on in-flight model calls - created lazily, inside the running event loop
+_llm_slots: asyncio.Semaphore | None = None
+
+
+def get_llm_slots() -> asyncio.Semaphore:
+    """Get the global limit on in-flight model calls (MAX_INFLIGHT_LLM_CALLS)."""
+    global _llm_slots
+    if _llm_slots is None:
+        _llm_slots = asyncio.Semaphore(max(1, config.get_max_inflight_llm_calls()))
+    return _llm_slots
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` units per minute.
+
+    Waiters are served in arrival order. Usage can be debited after the fact (actual
+    tokens of a response), which may leave the bucket negative until it refills.
+    """
+
+    def __init__(self, per_minute: int):
+        """Start with a full bucket of per_minute units."""
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until amount units are available and take them."""
+        # a request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self._rate)
+
+    def debit(self, amount: float) -> None:
+        """Take amount units without waiting, e.g. the tokens a response used beyond its estimate."""
+        self._refill()
+        self._tokens -= amount
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit: +1 slot per `limit` successful calls, halved on congestion.
+
+    Only one decrease happens per round trip: errors from calls started before the
+    last decrease were caused by the old limit and do not shrink it again.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        """Start at max_limit slots, never going below min_limit."""
+        self._max_limit = max(min_limit, max_limit)
+        self._min_limit = min_limit
+        self._limit = float(self._max_limit)
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+        self.in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        """Current number of slots."""
+        return max(self._min_limit, int(self._limit))
+
+    async def acquire(self) -> float:
+        """Wait for a slot. Returns the start time to pass back to release."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, started_at: float, congested: bool) -> None:
+        """Free the slot of a call started at started_at, shrinking the limit if it hit congestion."""
+        async with self._condition:
+            self.in_flight -= 1
+            if congested:
+                if started_at > self._last_decrease:
+                    self._limit = max(self._min_limit, self._limit / 2)
+                    self._last_decrease = time.monotonic()
+            else:
+                self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+
+@dataclass
+class ModelLimiter:
+    """Rate limits and adaptive concurrency of one model."""
+
+    requests: TokenBucket | None
+    tokens: TokenBucket | None
+    concurrency: AdaptiveConcurrencyLimiter | None
+
+
+# One limiter per model id, shared by every agent calling that model
+_model_limiters: dict[str, ModelLimiter] = {}
+
+
+def get_model_limiter(model: str) -> ModelLimiter:
+    """Get the limiter of a model, built from its configured rate limits on first use."""
+    limiter = _model_limiters.get(model)
+    if limiter is None:
+        rpm, tpm = config.get_model_rate_limits(model)
+        limiter = ModelLimiter(
+            requests=TokenBucket(rpm) if rpm > 0 else None,
+            tokens=TokenBucket(tpm) if tpm > 0 else None,
+            concurrency=(
+                AdaptiveConcurrencyLimiter(config.get_max_inflight_llm_calls())
+                if config.get_model_adaptive_concurrency() else None
+            ),
+        )
+        _model_limiters[model] = limiter
+    return limiter
+
+
+def get_model_id(runnable: Runnable) -> str:
+    """Model name of a chat model, looking through bind_tools / with_structured_output wrappers."""
+    while True:
+        if isinstance(runnable, RunnableBinding):
+            runnable = runnable.bound
+        elif isinstance(runnable, RunnableSequence):
+            runnable = runnable.first
+        else:
+            break
+    for attribute in ("model_name", "model"):
+        value = getattr(runnable, attribute, None)
+        if isinstance(value, str):
+            return value
+    return type(runnable).__name__ if isinstance(runnable, BaseChatModel) else "default"
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Rate limit (429), server (5xx), timeout and connection errors are worth retrying."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 429) or status >= 500
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or type(error).__name__ in (
+        "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    )
+
+
+def retry_delay(attempt: int, error: BaseException) -> float:
+    """Exponential backoff with full jitter, at least the provider's Retry-After."""
+    backoff = min(config.get_model_retry_max_seconds(), config.get_model_retry_base_seconds() * 2 ** attempt)
+    delay = random.uniform(0, backoff)
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        retry_after = 0.0
+    return max(delay, min(retry_after, config.get_model_retry_max_seconds()))
+
+
+class _StreamWatcher(BaseCallbackHandler):
+    """Notes whether a model call has streamed any tokens."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.streamed = False
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.streamed = True
+
+
+def _estimate_tokens(model_input: Any) -> int:
+    if isinstance(model_input, list) and all(isinstance(message, BaseMessage) for message in model_input):
+        return count_tokens_approximately(model_input)
+    return count_tokens_approximately([str(model_input)])
+
+
+async def call_model(
+    runnable: Runnable,
+    model_input: Any,
+    run_config: RunnableConfig | None = None,
+    fallback: Runnable | None = None,
+    role: str | None = None,
+) -> Any:
+    """Invoke a chat model (or a structured output / tool bound model) under the shared limits.
+
+    Args:
+        runnable: the model to call
+        model_input: its input
+        run_config: config of the call (tags, callbacks)
+        fallback: model (prepared like runnable) taking over if the call times out
+        role: model role of the call (as for models.get_model), which sets its timeout
+    """
+    limiter = get_model_limiter(get_model_id(runnable))
+    estimated_tokens = _estimate_tokens(model_input)
+    max_retries = config.get_model_max_retries()
+    timeout = config.get_model_timeout_seconds(role) or None
+
+    for attempt in range(max_retries + 1):
+        # the graph's callbacks (and with them its message stream) are kept, the watcher is added
+        watcher = _StreamWatcher()
+        attempt_config = merge_configs(ensure_config(run_config), {"callbacks": [watcher]})
+        started_at = await limiter.concurrency.acquire() if limiter.concurrency is not None else 0.0
+        congested = False
+        try:
+            async with get_llm_slots():
+                if limiter.requests is not None:
+                    await limiter.requests.acquire(1)
+                if limiter.tokens is not None:
+                    await limiter.tokens.acquire(estimated_tokens)
+                response = await asyncio.wait_for(runnable.ainvoke(model_input, config=attempt_config), timeout)
+        except Exception as e:
+            congested = is_retryable_error(e)
+            if watcher.streamed:
+                raise
+            if isinstance(e, TimeoutError) and fallback is not None:
+                error = e
+                break
+            if not congested or attempt == max_retries:
+                raise
+            error = e
+        else:
+            # settle the token bucket with the actual usage (prompt estimate vs. prompt + completion)
+            usage = getattr(response, "usage_metadata", None) if isinstance(response, AIMessage) else None
+            if limiter.tokens is not None and usage:
+                limiter.tokens.debit(usage.get("total_tokens", 0) - estimated_tokens)
+            return response
+        finally:
+            if limiter.concurrency is not None:
+                await limiter.concurrency.release(started_at, congested)
+
+        delay = retry_delay(attempt, error)
+        logger.warning(
+            "Model call to %s failed (%s: %s), retry %d/%d in %.1fs",
+            get_model_id(runnable), type(error).__name__, error, attempt + 1, max_retries, delay,
+        )
+        await asyncio.sleep(delay)
+
+    # only reached when the call timed out and there is a fallback
+    logger.warning(
+        "Model call to %s timed out after %ss, falling back to %s", get_model_id(runnable), timeout, get_model_id(fallback)
+    )
+    return await call_model(fallback, model_input, run_config, role=role)
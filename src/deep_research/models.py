@@ -0,0 +1,108 @@
+"""Chat model factory for every agent.
+
+Each agent used to build its model with init_chat_model at module scope, so merely
+importing the graph imported the provider SDKs (langchain_openai / openai alone
+take most of a second) and failed without an API key. Agents now ask the factory
+for their model when a node runs:
+
+    model = get_model("research")
+
+The client is built on first use from the role's Config model id and kept for
+the process, so every run and every researcher share one client (and its HTTP
+connection pool) per role. The LLM response cache is installed before the first
+client is built.
+
+Roles are step types rather than agents, so cheap steps can be routed to a faster
+model: besides the agents' own models, researcher reflection turns, findings
+compression and report section drafts have their own (REFLECTION_MODEL,
+COMPRESSION_MODEL, REPORT_SECTION_MODEL). get_model_with_fallback also returns
+the model taking over when a call times out (MODEL_FALLBACKS), for call_model.
+
+Tests and benchmarks replace the models with set_model_override.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from config import config
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+
+# Model id and extra init_chat_model arguments per role
+_ROLES: dict[str, tuple[Callable[[], str], dict[str, Any]]] = {
+    "scope": (config.get_scope_agent_model, {"temperature": 0.0}),
+    # researcher turns planning the next searches, and writing the final answer
+    "research": (config.get_research_agent_model, {"temperature": 0.0}),
+    # researcher turns right after search / read results - mostly think_tool reflections
+    "reflection": (config.get_reflection_model, {"temperature": 0.0}),
+    "compress": (config.get_compression_model, {"temperature": 0.0}),
+    "supervisor": (config.get_supervisor_agent_model, {"temperature": 0.0}),
+    "report_section": (config.get_report_section_model, {"max_tokens": 32000}),
+    "final_report": (config.get_final_report_agent_model, {"max_tokens": 32000}),
+}
+
+# Built clients, keyed by (role, model id) so a changed Config builds a new client
+_models: dict[tuple[str, str], Any] = {}
+# Function of the role returning the model to use instead of the configured one
+_override: Callable[[str], Any] | None = None
+_cache_configured = False
+
+
+def _get_client(role: str, model_id: str):
+    key = (role, model_id)
+    model = _models.get(key)
+    if model is None:
+        global _cache_configured
+        # imported on first use - the provider SDKs are the slowest imports of the package
+        from langchain.chat_models import init_chat_model
+
+        from llm_cache import configure_llm_cache
+
+        if not _cache_configured:
+            # Install the shared LLM response cache (LLM_CACHE_BACKEND) for every agent's model
+            configure_llm_cache()
+            _cache_configured = True
+        model = init_chat_model(model=model_id, **_ROLES[role][1])
+        _models[key] = model
+    return model
+
+
+def _check_role(role: str) -> None:
+    if role not in _ROLES:
+        raise ValueError(f"Unknown model role: {role!r} (expected one of {', '.join(_ROLES)})")
+
+
+def get_model(role: str):
+    """Get the chat model of a role: scope, research, reflection, compress, supervisor, report_section or final_report."""
+    _check_role(role)
+    if _override is not None:
+        return _override(role)
+    return _get_client(role, _ROLES[role][0]())
+
+
+def get_model_with_fallback(role: str, prepare: Callable[[Any], "Runnable"] | None = None) -> tuple["Runnable", Optional["Runnable"]]:
+    """Get the model of a role and the model taking over its timed out calls (None without one).
+
+    Args:
+        role: model role, as for get_model
+        prepare: applied to both models, e.g. to bind the same tools or structured output
+    """
+    model = get_model(role)
+    fallback_id = None if _override is not None else config.get_model_fallback(_ROLES[role][0]())
+    fallback = _get_client(role, fallback_id) if fallback_id else None
+    if prepare is not None:
+        model = prepare(model)
+        fallback = prepare(fallback) if fallback is not None else None
+    return model, fallback
+
+
+def set_model_override(model, routes: dict[str, Any] | None = None) -> None:
+    """Use the given chat model for every role (e.g. a fake model in benchmarks), None to undo.
+
+    Args:
+        model: model of every role not in routes
+        routes: model per role, to benchmark routing profiles
+    """
+    global _override
+    routes = routes or {}
+    _override = None if model is None else (lambda role: routes.get(role, model))
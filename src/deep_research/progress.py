@@ -0,0 +1,21 @@
+"""Progress events emitted from inside graph nodes.
+
+Nodes publish structured events (a dict with an "event" name plus data) on
+LangGraph's custom stream, so callers using `astream(..., stream_mode="custom")`
+see research progress as it happens instead of waiting for the node to return.
+"""
+
+from langgraph.config import get_stream_writer
+
+
+def emit_progress(event: str, **data) -> None:
+    """Publish a progress event on the custom stream of the running graph.
+
+    Does nothing when called outside a graph run (or when nobody is streaming).
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # not running inside a graph node
+        return
+    writer({"event": event, **data})
@@ -81,6 +81,49 @@ Guidelines:
 - If the query is in a specific language, prioritize sources published in that language.
 """
 
+clarify_and_brief_instructions = """You will be given a set of messages that have been exchanged so far between yourself and the user asking for a research report.
+<Messages>
+{messages}
+</Messages>
+
+Today's date is {date}.
+
+You have two jobs, answered together in one response:
+1. Assess whether you need to ask a clarifying question, or if the user has already provided enough information for you to start research.
+2. If no clarifying question is needed, translate the messages into a detailed and concrete research question that will be used to guide the research.
+
+<Clarification>
+IMPORTANT: If you can see in the messages history that you have already asked a clarifying question, you almost always do not need to ask another one. Only ask another question if ABSOLUTELY NECESSARY.
+
+If there are acronyms, abbreviations, or unknown terms, ask the user to clarify.
+If you need to ask a question, follow these guidelines:
+- Be concise while gathering all necessary information
+- Use bullet points or numbered lists if appropriate for clarity. Make sure that this uses markdown formatting and will be rendered correctly if the string output is passed to a markdown renderer.
+- Don't ask for unnecessary information, or information that the user has already provided.
+</Clarification>
+
+<Research Brief>
+- Include all known user preferences and explicitly list key attributes or dimensions to consider. All details from the user must be included.
+- Treat dimensions the user has not specified as open considerations rather than assumed preferences, and only mention those genuinely necessary for comprehensive research.
+- Never invent specific user preferences, constraints, or requirements that weren't stated.
+- Distinguish the research scope (can be broader than the user's explicit mentions) from user preferences (only what the user stated).
+- Phrase the request from the perspective of the user, in the first person.
+- If specific sources should be prioritized, specify them. Prefer official and primary sources, and sources in the language of the query.
+</Research Brief>
+
+If you need to ask a clarifying question, return:
+"requires_clarification": true,
+"question": "<your clarifying question>",
+"verification_message": "",
+"research_brief": ""
+
+If you do not need to ask a clarifying question, return:
+"requires_clarification": false,
+"question": "",
+"verification_message": "<concise acknowledgement summarizing what you understood, confirming that you will now begin the research>",
+"research_brief": "<the detailed research question>"
+"""
+
 lead_researcher_prompt = """You are a research supervisor. Your job is to conduct research by calling the "ConductResearch" tool. For context, today's date is {date}.
 
 <Task>
@@ -253,7 +296,10 @@ You can use any of the tools provided to you to find and read files that help an
 </Task>
 
 <Available Tools>
-You have access to file system tools and thinking tools:
+You have access to a document search tool, file system tools and thinking tools:
+- **search_documents**: Search all research files at once and get the most relevant passages (start here)
+- **document_outline**: List the sections of a file, with their offsets
+- **read_document**: Read one section (by heading) or a range of a file - only the part you need
 - **list_allowed_directories**: See what directories you can access
 - **list_directory**: List files in directories
 - **read_file**: Read individual files
@@ -268,9 +314,9 @@ You have access to file system tools and thinking tools:
 Think like a human researcher with access to a document library. Follow these steps:
 
 1. **Read the question carefully** - What specific information does the user need?
-2. **Explore available files** - Use list_allowed_directories and list_directory to understand what's available
-3. **Identify relevant files** - Use search_files if needed to find documents matching the topic
-4. **Read strategically** - Start with most relevant files, use read_multiple_files for efficiency
+2. **Search first** - Use search_documents with specific keywords; the passages it returns often answer the question directly
+3. **Identify relevant files** - The search results name the files; use list_directory or search_files only if searching is not enough
+4. **Read strategically** - When the passages are not enough, read the relevant sections with document_outline and read_document; read whole files only when you need all of them
 5. **After reading, pause and assess** - Do I have enough to answer? What's still missing?
 6. **Stop when you can answer confidently** - Don't keep reading for perfection
 </Instructions>
@@ -348,6 +394,39 @@ compress_research_human_message =  """All above messages are about research cond
 
 DO NOT summarize the information. I want the raw information returned, just in a cleaner format. Make sure all relevant information is preserved - you can rewrite findings verbatim."""
 
+fold_research_findings_prompt = """You are keeping the running notes of a research assistant while it researches a topic using local files. For context, today's date is {date}.
+
+<Research Topic>
+{research_topic}
+</Research Topic>
+
+<Running Notes>
+{running_notes}
+</Running Notes>
+
+The research assistant has just received new tool results, given below. Merge them into the running notes and return the updated notes.
+
+<Guidelines>
+1. Keep everything already in the running notes - you are adding to them, not rewriting them.
+2. Add ALL of the information from the new tool results that is even remotely relevant to the research topic. It is expected that you repeat key information verbatim. DO NOT summarize it.
+3. Skip only what is clearly irrelevant, duplicated, or tool output noise (errors, listings of unrelated files).
+4. Keep track of the source (file path or URL) of every piece of information, so it can be cited later.
+5. Return only the updated notes, without any preamble.
+</Guidelines>
+"""
+
+compress_running_notes_human_message = """Above are the running notes of the research on this topic:
+<Research Topic>
+{research_topic}
+</Research Topic>
+
+What the researcher found and wrote after the running notes were last updated:
+<Final Message>
+{final_message}
+</Final Message>
+
+Please clean up these findings. DO NOT summarize the information. I want the raw information returned, just in a cleaner format. Make sure all relevant information is preserved - you can rewrite findings verbatim."""
+
 final_report_generation_prompt = """Based on all the research conducted, create a comprehensive, well-structured answer to the overall research brief:
 <Research Brief>
 {research_brief}
@@ -424,4 +503,27 @@ Format the report in clear markdown with proper structure and include source ref
   [2] Source Title: URL
 - Citations are extremely important. Make sure to include these, and pay a lot of attention to getting these right. Users will often use these citations to look into more information.
 </Citation Rules>
-"""
\ No newline at end of file
+"""
+
+report_section_drafting_prompt = """You are drafting one part of a larger research report. Other parts of the findings are being drafted in parallel, and a final editor will merge all drafts into a single report.
+
+<Research Brief>
+{research_brief}
+</Research Brief>
+
+Today's date is {date}.
+
+Here is your part of the findings ({section_number} of {section_count}):
+<Findings>
+{findings}
+</Findings>
+
+Write a well-organized draft covering ONLY these findings:
+1. Use ## headings for the topics covered by these findings
+2. Keep every specific fact, number, name and example - the editor can only use what is in your draft
+3. Keep the inline citation for every statement, and end with a ### Sources list of every source you cited
+4. Do not write an introduction or conclusion for the whole report, and do not refer to other parts
+5. Write in the same language as the research brief
+
+Do NOT summarize aggressively: the goal is to organize and de-duplicate these findings, not to shorten them.
+"""
@@ -1,126 +1,301 @@
-from langchain.chat_models import init_chat_model
 from state_research import ResearchState, ResearcherOutputState
 from config import config
-from tools import think_tool, get_mcp_client
-from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage, filter_messages
-from prompts import research_agent_prompt_with_mcp, compress_research_human_message, compress_research_system_prompt
+from model_calls import call_model
+from models import get_model_with_fallback
+from tools import think_tool, search_documents, document_outline, read_document
+from mcp_pool import get_mcp_pool
+from tool_executor import execute_tool_calls
+from context_budget import compact_messages, count_message_tokens
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage, filter_messages
+from prompts import (
+    research_agent_prompt_with_mcp,
+    compress_research_human_message,
+    compress_research_system_prompt,
+    fold_research_findings_prompt,
+    compress_running_notes_human_message,
+)
 from utils import get_today_str
+from blob_store import store_notes
+from progress import emit_progress
+from research_budget import (
+    findings_texts,
+    get_researcher_budget,
+    get_run_budget,
+    get_run_usage,
+    novelty,
+    record_tokens,
+)
 from typing_extensions import Literal
+import time
 from langgraph.graph import StateGraph, START, END
 
-# Initialize model using config
-model = init_chat_model(model=config.get_research_agent_model(), temperature=0.0)
+# Tools executed in-process rather than through the MCP server
+local_tools = [search_documents, document_outline, read_document, think_tool]
+
+async def get_research_tools():
+    """Get the researcher's tools: pooled MCP tools (schemas cached once) plus local tools."""
+    mcp_tools = await get_mcp_pool().get_tools()
+    return mcp_tools + local_tools
+
+
+def research_step_role(researcher_messages) -> str:
+    """Model role of the researcher's next turn.
+
+    Right after search / read results the model is asked to reflect on them
+    (think_tool), a cheap step that goes to the reflection model. Planning the
+    first searches, and acting on a reflection, stays on the research model.
+    """
+    last_results = []
+    for message in reversed(researcher_messages):
+        if not isinstance(message, ToolMessage):
+            break
+        last_results.append(message)
+    if any(message.name != think_tool.name for message in last_results):
+        return "reflection"
+    return "research"
+
 
 async def llm_call(state: ResearchState):
     """
     Analyze current state and decide on next actions.
 
+    The turn runs on the model of its step type (research_step_role).
     """
 
-    # Get available tools from MCP server
-    client = tools.get_mcp_client()
-    mcp_tools = await client.get_tools()
-
-    # Use MCP tools for local document access
-    tools = mcp_tools + [think_tool]
+    # Get available tools - MCP tools are listed once per process by the session pool
+    tools = await get_research_tools()
 
     # Initialize model with tool binding
-    model_with_tools = model.bind_tools(tools)
+    role = research_step_role(state["researcher_messages"])
+    model_with_tools, fallback = get_model_with_fallback(role, lambda model: model.bind_tools(tools))
+
+    # Keep the prompt within the context budget - older tool outputs are compacted
+    system_message = SystemMessage(content=research_agent_prompt_with_mcp.format(date=get_today_str()))
+    researcher_messages = compact_messages(
+        state["researcher_messages"],
+        token_budget=config.get_research_context_token_budget(),
+        keep_recent_tool_results=config.get_research_context_keep_recent_tool_results(),
+        reserved_tokens=count_message_tokens(system_message),
+    )
 
     # Process user input with system prompt
-    response = model_with_tools.invoke(
-        [SystemMessage(content=research_agent_prompt_with_mcp.format(date=get_today_str()))] + 
-        state["researcher_messages"] 
-    )
+    response = await call_model(model_with_tools, [system_message] + researcher_messages, fallback=fallback, role=role)
 
     return {
-        "researcher_messages": [response]
+        "researcher_messages": [response],
+        "tokens_used": record_tokens(response),
+        "started_at": state.get("started_at") or time.time()
     }
 
 
+def budget_skipped_tool_message(tool_call: dict) -> ToolMessage:
+    """ToolMessage answering a research tool call that was not run because its budget is used up."""
+    return ToolMessage(
+        content="Not run: the tool call budget of this research is used up. Answer with what you have found.",
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status="error",
+    )
+
+
 async def tool_execution_node(state: ResearchState):
-     """
-     Execute tool calls using MCP tools.
+    """
+    Execute tool calls using MCP tools.
 
-      This node:
+    This node:
     1. Retrieves current tool calls from the last message
     2. Executes all tool calls using async operations (required for MCP)
     3. Returns formatted tool results
 
+    Independent tool calls of the same turn run in parallel, bounded by the
+    global and per-tool limits in Config and a per-call timeout.
+
+    Research tool calls (all but think_tool) count against the researcher's and
+    the run's tool call budgets - calls beyond them are answered without running.
+    After the step, the researcher is stopped (stop_reason) when a budget is used
+    up - its model turns count too, so a researcher that only calls think_tool
+    still ends - or its tool results keep bringing little new information (research_budget).
+
     Note: MCP requires async operations due to inter-process communication
-    with the MCP server subprocess. This is unavoidable.
-     
-     """
-
-     tool_calls = state["researcher_messages"][-1].tool_calls
-
-     async def execute_tools():
-          # Get fresh tool references from MCP server
-        client = get_mcp_client()
-        mcp_tools = await client.get_tools()
-        tools = mcp_tools + [think_tool]
-        tools_by_name = {tool.name: tool for tool in tools}
-
-         # Execute tool calls (sequentially for reliability)
-        results = []
-        for tool_call in tool_calls:
-            tool = tools_by_name[tool_calls["name"]]
-            if tool_calls["name"] == "think_tool":
-                results = tool.invoke(tool_call["args"])
-            else:
-                results = await tool.ainvoke(tool_call["args"])
-            results.append(results)
-
-        # Format results as tool messages
-        tool_outputs = [
-            ToolMessage(
-                content=observation,
-                name=tool_call["name"],
-                tool_call_id=tool_call["id"],
-            )
-            for observation, tool_call in zip(results, tool_calls)
-        ]
-
-        return tool_outputs
-     
-     # Execute tool calls
-     tools_results = await execute_tools()
-
-     return {"researcher_messages": tools_results}
-
-
-def compress_research_finding(state: ResearchState):
-     """Compress research findings into a concise summary.
+    with the MCP server subprocess. MCP calls run on a pooled long-lived session,
+    so no subprocess or session is started per step.
+    """
+
+    researcher_messages = state["researcher_messages"]
+    tool_calls = researcher_messages[-1].tool_calls
+    budget = get_researcher_budget()
+    run_usage = get_run_usage()
+    tool_calls_made = state.get("tool_calls_made", 0)
+
+    # research tool calls within the researcher's and the run's remaining budgets
+    allowed = len(tool_calls)
+    for remaining in (
+        budget.remaining_tool_calls(tool_calls_made),
+        get_run_budget().remaining_tool_calls(run_usage.tool_calls) if run_usage is not None else None,
+    ):
+        if remaining is not None:
+            allowed = min(allowed, remaining)
+    research_calls = [tool_call for tool_call in tool_calls if tool_call["name"] != think_tool.name]
+    skipped_ids = {tool_call["id"] for tool_call in research_calls[allowed:]}
+    to_run = [tool_call for tool_call in tool_calls if tool_call["id"] not in skipped_ids]
+
+    # Execute tool calls concurrently - results come back in tool_call order
+    outputs = iter(await execute_tool_calls(to_run, local_tools=local_tools))
+    tool_outputs = [
+        budget_skipped_tool_message(tool_call) if tool_call["id"] in skipped_ids else next(outputs)
+        for tool_call in tool_calls
+    ]
+
+    made = len(research_calls) - len(skipped_ids)
+    if run_usage is not None:
+        run_usage.tool_calls += made
+
+    # novelty of this step's results against everything the researcher read before
+    low_novelty_steps = state.get("low_novelty_steps", 0)
+    step_novelty = novelty(
+        findings_texts(tool_outputs, exclude_tools=(think_tool.name,)),
+        findings_texts(researcher_messages, exclude_tools=(think_tool.name,)),
+    )
+    if step_novelty is not None:
+        low_novelty_steps = low_novelty_steps + 1 if step_novelty < config.get_research_novelty_threshold() else 0
+
+    patience = config.get_research_novelty_patience()
+    stop_reason = (
+        budget.exceeded(
+            tool_calls_made + made,
+            state.get("tokens_used", 0),
+            time.time() - (state.get("started_at") or time.time()),
+            iterations=len(filter_messages(researcher_messages, include_types="ai")),
+        )
+        or (run_usage.exceeded() if run_usage is not None else None)
+        or (f"{low_novelty_steps} steps in a row with little new information" if patience and low_novelty_steps >= patience else None)
+    )
+    if stop_reason:
+        emit_progress("researcher_stopped", research_question=get_research_topic(researcher_messages), reason=stop_reason)
+
+    return {
+        "researcher_messages": tool_outputs,
+        "tool_calls_made": made,
+        "low_novelty_steps": low_novelty_steps,
+        "stop_reason": stop_reason or ""
+    }
+
+
+def get_research_topic(researcher_messages) -> str:
+    """Return the research question - the first message of the researcher's transcript."""
+    return str(researcher_messages[0].content) if researcher_messages else ""
+
+
+def format_tool_results(messages) -> str:
+    """Format the new findings for the running notes: tool results, without think_tool reflections."""
+    return "\n\n".join(
+        f"<{message.name} result>\n{message.content}\n</{message.name} result>"
+        for message in messages
+        if isinstance(message, ToolMessage) and message.name != think_tool.name
+    )
+
+
+async def fold_findings(state: ResearchState):
+    """Fold the latest tool results into the running notes (RESEARCH_COMPRESSION_MODE=incremental).
+
+    Runs in parallel with the llm_call that plans the next step, so the
+    compression work is done while the researcher works instead of in one big
+    call over the whole transcript at the end. Each call only sees the running
+    notes and the new tool results.
+    """
+    researcher_messages = state["researcher_messages"]
+    new_findings = format_tool_results(researcher_messages[state.get("folded_messages", 0):])
+    if not new_findings:
+        # only reflections this step - nothing to fold
+        return {"folded_messages": len(researcher_messages)}
+
+    prompt = fold_research_findings_prompt.format(
+        date=get_today_str(),
+        research_topic=get_research_topic(researcher_messages),
+        running_notes=state.get("running_notes") or "(no notes yet)",
+    )
+    model, fallback = get_model_with_fallback("compress")
+    response = await call_model(
+        model, [SystemMessage(content=prompt), HumanMessage(content=new_findings)], fallback=fallback, role="compress"
+    )
+
+    return {
+        "running_notes": str(response.content),
+        "folded_messages": len(researcher_messages),
+        "tokens_used": record_tokens(response)
+    }
+
+
+def route_after_tools(state: ResearchState) -> list[str]:
+    """Plan the next step - and, in incremental compression mode, fold the new results at the same time.
+
+    A researcher stopped by its budget or for lack of new information compresses what it has.
+    """
+    if state.get("stop_reason"):
+        return ["compress_research_finding"]
+    if config.get_research_compression_mode() == "incremental":
+        return ["llm_call", "fold_findings"]
+    return ["llm_call"]
+
+
+def build_compression_messages(state: ResearchState) -> list:
+    """Prompt of the final compression: the whole transcript, or the running notes when there are some."""
+    compression_prompt = compress_research_system_prompt.format(date=get_today_str())
+    researcher_messages = list(state.get("researcher_messages", []))
+    running_notes = state.get("running_notes")
+
+    if not running_notes:
+        # Add instruction to switch from research mode to compression mode
+        researcher_messages.append(HumanMessage(content=compress_research_human_message))
+        return [SystemMessage(content=compression_prompt)] + researcher_messages
+
+    # tool results are folded into the notes as they come, only the last ones
+    # (a researcher stopped right after its tools) and the final answer are new
+    unfolded = researcher_messages[state.get("folded_messages", 0):]
+    final_message = "\n\n".join(filter(None, [
+        format_tool_results(unfolded),
+        *(str(message.content) for message in unfolded if isinstance(message, AIMessage) and message.content),
+    ]))
+    return [
+        SystemMessage(content=compression_prompt),
+        HumanMessage(content=running_notes),
+        HumanMessage(content=compress_running_notes_human_message.format(
+            research_topic=get_research_topic(researcher_messages),
+            final_message=final_message or "(none)",
+        )),
+    ]
+
+
+async def compress_research_finding(state: ResearchState):
+    """Compress research findings into a concise summary.
 
     Takes all the research messages and tool outputs and creates
     a compressed summary suitable for further processing or reporting.
 
-    This function filters out think_tool calls and focuses on substantive
-    file-based research content from MCP tools.
+    In incremental compression mode the tool outputs were already folded into the
+    running notes as they arrived, and only the notes and the researcher's final
+    message are sent - a much smaller call at the end of every researcher.
     """
-     
-     researcher_messages = state.get("researcher_messages", [])
-    
-    # Add instruction to switch from research mode to compression mode
-     researcher_messages.append(HumanMessage(content=compress_research_human_message))
-     
-          
-     compression_prompt = compress_research_system_prompt.format(date=get_today_str())
-     messages = [SystemMessage(content=compression_prompt)] + researcher_messages
-
-     response = model.invoke(messages)
-
-      # Extract raw notes from tool and AI messages
-     raw_notes = [
+
+    messages = build_compression_messages(state)
+
+    model, fallback = get_model_with_fallback("compress")
+    response = await call_model(model, messages, fallback=fallback, role="compress")
+    record_tokens(response)
+
+    # Extract raw notes from tool and AI messages
+    raw_notes = [
         str(m.content) for m in filter_messages(
             state["researcher_messages"], 
             include_types=["tool", "ai"]
         )
     ]
 
-     return {
+    return {
         "compressed_research": str(response.content),
-        "raw_notes": ["\n".join(raw_notes)]
+        # large notes go to the blob store once, the state only carries a reference
+        "raw_notes": await store_notes(["\n".join(raw_notes)]),
+        "researcher_iterations": len(filter_messages(state["researcher_messages"], include_types="ai")),
     }
 
 def should_continue(state: ResearchState) -> Literal["tool_execution_node", "compress_research_finding"]:
@@ -149,6 +324,7 @@ researcher_agent_workflow = StateGraph(ResearchState, output_schema=ResearcherOu
 researcher_agent_workflow.add_node("llm_call", llm_call)
 researcher_agent_workflow.add_node("tool_execution_node", tool_execution_node)
 researcher_agent_workflow.add_node("compress_research_finding", compress_research_finding)
+researcher_agent_workflow.add_node("fold_findings", fold_findings)
 
 # Add edges to connect nodes
 researcher_agent_workflow.add_edge(START, "llm_call")
@@ -160,11 +336,19 @@ researcher_agent_workflow.add_conditional_edges(
         "compress_research_finding": "compress_research_finding",  # Compress research findings
     },
 )
-researcher_agent_workflow.add_edge("tool_execution_node", "llm_call")  # Loop back for more processing
+# Loop back for more processing (and fold the new results in parallel in incremental compression mode)
+researcher_agent_workflow.add_conditional_edges(
+    "tool_execution_node", route_after_tools, ["llm_call", "fold_findings", "compress_research_finding"]
+)
 researcher_agent_workflow.add_edge("compress_research_finding", END)
 
 # Compile the agent
-researcher_agent = researcher_agent_workflow.compile()
+# Not checkpointed: its finished results are kept by the supervisor
+# (checkpointing.ResearchResultStore) until its supervisor step is checkpointed, and
+# an unfinished researcher starts over on resume. Inheriting the parent's
+# checkpointer would store its whole transcript at every step, under a namespace
+# given by call order - a resumed step could pick up another question's researcher.
+researcher_agent = researcher_agent_workflow.compile(checkpointer=False)
          
 
 
@@ -0,0 +1,164 @@
+"""Research depth controller: budgets per researcher and per run, and novelty stops.
+
+The supervisor stopped after a fixed number of iterations, and a researcher only
+stopped when its model decided to - so the cost and latency of a brief depended on
+how talkative the models were. Every budget here comes from Config (0 = unlimited):
+
+- per researcher: model turns, tool calls, model tokens and wall time
+  (RESEARCHER_MAX_ITERATIONS / RESEARCHER_MAX_TOOL_CALLS / RESEARCHER_MAX_TOKENS /
+  RESEARCHER_MAX_SECONDS) - the turn cap also ends a researcher that only calls
+  think_tool, which uses no tool call budget and brings no tool results to score
+- per run (all researchers and supervisor turns of one thread): tool calls, model
+  tokens and wall time (RUN_MAX_TOOL_CALLS / RUN_MAX_TOKENS / RUN_MAX_SECONDS)
+- supervisor iterations (SUPERVISOR_MAX_ITERATIONS)
+
+A researcher whose budget (or its run's) is used up stops and compresses what it
+has. It also stops early when its tool results stop bringing new information:
+the novelty of a step is the share of its word shingles not seen in earlier tool
+results, and RESEARCH_NOVELTY_PATIENCE steps in a row below
+RESEARCH_NOVELTY_THRESHOLD end the research.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langgraph.config import get_config
+
+from config import config
+from document_index import tokenize
+
+# Words per shingle for novelty scoring
+SHINGLE_WORDS = 3
+
+
+@dataclass
+class Budget:
+    """Limits of a researcher or a run - 0 means unlimited."""
+
+    max_tool_calls: int = 0
+    max_tokens: int = 0
+    max_seconds: float = 0
+    max_iterations: int = 0
+
+    def exceeded(self, tool_calls: int, tokens: int, seconds: float, iterations: int = 0) -> str | None:
+        """Return the first budget used up, as a reason for the progress events, or None."""
+        if self.max_iterations and iterations >= self.max_iterations:
+            return f"iteration budget ({self.max_iterations}) used up"
+        if self.max_tool_calls and tool_calls >= self.max_tool_calls:
+            return f"tool call budget ({self.max_tool_calls}) used up"
+        if self.max_tokens and tokens >= self.max_tokens:
+            return f"token budget ({self.max_tokens}) used up"
+        if self.max_seconds and seconds >= self.max_seconds:
+            return f"time budget ({self.max_seconds:g}s) used up"
+        return None
+
+    def remaining_tool_calls(self, tool_calls: int) -> int | None:
+        """Tool calls left after tool_calls made, None when unlimited."""
+        return None if not self.max_tool_calls else max(0, self.max_tool_calls - tool_calls)
+
+
+def get_researcher_budget() -> Budget:
+    """Budget of one researcher (RESEARCHER_MAX_*)."""
+    return Budget(
+        max_iterations=config.get_researcher_max_iterations(),
+        max_tool_calls=config.get_researcher_max_tool_calls(),
+        max_tokens=config.get_researcher_max_tokens(),
+        max_seconds=config.get_researcher_max_seconds(),
+    )
+
+
+def get_run_budget() -> Budget:
+    """Budget of one run, across its supervisor and all its researchers (RUN_MAX_*)."""
+    return Budget(
+        max_tool_calls=config.get_run_max_tool_calls(),
+        max_tokens=config.get_run_max_tokens(),
+        max_seconds=config.get_run_max_seconds(),
+    )
+
+
+@dataclass
+class RunUsage:
+    """Tool calls, tokens and time used so far by one run, in this process."""
+
+    started_at: float = field(default_factory=time.monotonic)
+    tool_calls: int = 0
+    tokens: int = 0
+
+    def exceeded(self) -> str | None:
+        """Return the first run budget used up, or None."""
+        return get_run_budget().exceeded(self.tool_calls, self.tokens, time.monotonic() - self.started_at)
+
+
+# Usage per run (graph thread) - released when the run's research is complete
+_run_usage: dict[str, RunUsage] = {}
+
+
+def _thread_id() -> str | None:
+    """Thread of the graph run the calling node belongs to, None outside a run or a thread."""
+    try:
+        configurable = get_config().get("configurable", {})
+    except RuntimeError:
+        # not running inside a graph node
+        return None
+    thread_id = configurable.get("thread_id")
+    return str(thread_id) if thread_id is not None else None
+
+
+def get_run_usage() -> RunUsage | None:
+    """Usage of the calling node's run - None without a thread (no run budget then)."""
+    thread_id = _thread_id()
+    if thread_id is None:
+        return None
+    usage = _run_usage.get(thread_id)
+    if usage is None:
+        usage = _run_usage[thread_id] = RunUsage()
+    return usage
+
+
+def release_run_usage() -> None:
+    """Forget the usage of the calling node's run, once its research is complete."""
+    thread_id = _thread_id()
+    if thread_id is not None:
+        _run_usage.pop(thread_id, None)
+
+
+def record_tokens(response: BaseMessage) -> int:
+    """Count a model response against the run's token budget, returning its tokens."""
+    tokens = response_tokens(response)
+    run_usage = get_run_usage()
+    if run_usage is not None:
+        run_usage.tokens += tokens
+    return tokens
+
+
+def response_tokens(response: BaseMessage) -> int:
+    """Total tokens (prompt + completion) reported for a model response."""
+    usage = getattr(response, "usage_metadata", None) if isinstance(response, AIMessage) else None
+    return usage.get("total_tokens", 0) if usage else 0
+
+
+def content_shingles(text: str) -> set[int]:
+    """Hashed word shingles of a text (single words for very short texts)."""
+    words = tokenize(text)
+    if len(words) < SHINGLE_WORDS:
+        return {hash(word) for word in words}
+    return {hash(tuple(words[i:i + SHINGLE_WORDS])) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def findings_texts(messages: Iterable[BaseMessage], exclude_tools: tuple[str, ...] = ()) -> list[str]:
+    """Contents of the successful tool results among the messages (reflections excluded)."""
+    return [
+        str(message.content) for message in messages
+        if isinstance(message, ToolMessage) and message.name not in exclude_tools and message.status != "error"
+    ]
+
+
+def novelty(new_texts: list[str], seen_texts: list[str]) -> float | None:
+    """Share (0-1) of the new texts' shingles absent from the seen texts, None when there is nothing new to score."""
+    new = set().union(*(content_shingles(text) for text in new_texts)) if new_texts else set()
+    if not new:
+        return None
+    seen = set().union(*(content_shingles(text) for text in seen_texts)) if seen_texts else set()
+    return len(new - seen) / len(new)
@@ -0,0 +1,205 @@
+"""Deduplication of ConductResearch tasks within a research run.
+
+The supervisor often asks for the same research twice - reworded in a later
+iteration, or twice in the same fan-out - and every ConductResearch call costs a
+full researcher loop. Before fanning out, supervisor_tools matches each question
+against the tasks already researched in the run and the ones about to run:
+
+- a question close to an earlier, completed task reuses that task's findings
+- questions close to each other in the same fan-out are merged: one researcher
+  runs on the most detailed wording and its findings answer all of them
+
+Questions are compared by fingerprint - character trigrams of the normalized
+content words - with Jaccard similarity, which catches rewordings, reordering,
+plurals and typos without any model call. Similarity alone cannot tell "EV market
+share in 2022" from "... in 2023", or one named district from another: questions
+whose numbers or names (distinguishing_terms) differ are never merged, however
+similar the rest of their wording.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+# additional_kwargs key marking a ToolMessage that reuses another task's findings
+DUPLICATE_OF = "duplicate_of"
+
+_STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how in into is it its of on or
+research investigate find out about please the their this that these those to
+what when where which who why with
+""".split())
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Numbers (years, amounts, versions) and capitalized words (names, places, products)
+_TERM_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|[A-Z][\w'-]*")
+_SENTENCE_START = re.compile(r"(?:^|[.?!:;]\s+)$")
+
+
+def normalize_question(question: str) -> list[str]:
+    """Lowercase content words of a question, with plural 's' stripped."""
+    words = []
+    for word in _WORD_PATTERN.findall(question.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def distinguishing_terms(question: str) -> frozenset[str]:
+    """Numbers and names of a question - two questions differing in them ask about different things.
+
+    A capitalized word starting a sentence is only a name if it has more capitals
+    or digits in it (an acronym like "EVs"), otherwise it is just the start of the sentence.
+    """
+    terms = set()
+    for match in _TERM_PATTERN.finditer(question):
+        term = match.group()
+        if term[0].isdigit():
+            terms.add(term.replace(",", ""))
+            continue
+        if _SENTENCE_START.search(question[:match.start()]) and not any(c.isupper() or c.isdigit() for c in term[1:]):
+            continue
+        if term.lower() in _STOPWORDS:
+            continue
+        terms.update(normalize_question(term))
+    return frozenset(terms)
+
+
+def fingerprint(question: str) -> frozenset[str]:
+    """Character trigram shingles of the normalized words (word order does not matter)."""
+    shingles = set()
+    for word in normalize_question(question):
+        padded = f"#{word}#"
+        shingles.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(shingles)
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Jaccard similarity of two fingerprints."""
+    if not a or not b:
+        return float(a == b)
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class ResearchTask:
+    """A research question that is (or will be) researched, and the tool call holding its findings."""
+
+    question: str
+    tool_call_id: str
+    fingerprint: frozenset[str] = field(repr=False, default=frozenset())
+    terms: frozenset[str] = field(repr=False, default=frozenset())
+
+    @classmethod
+    def of(cls, question: str, tool_call_id: str) -> "ResearchTask":
+        """Build the task of a question, with its fingerprint and distinguishing terms."""
+        return cls(question, tool_call_id, fingerprint(question), distinguishing_terms(question))
+
+    def same_research(self, other: "ResearchTask", threshold: float) -> bool:
+        """Tell whether the two tasks ask for the same research: similar wording, same numbers and names."""
+        return self.terms == other.terms and similarity(self.fingerprint, other.fingerprint) >= threshold
+
+
+@dataclass
+class DedupPlan:
+    """Outcome of deduplicating one supervisor fan-out."""
+
+    # tool calls to research, with the question the researcher gets
+    to_run: list[tuple[dict, str]]
+    # tool call id -> the task whose findings answer it
+    duplicates: dict[str, ResearchTask]
+
+    @property
+    def saved(self) -> int:
+        """Number of researcher runs saved."""
+        return len(self.duplicates)
+
+
+def completed_research_tasks(messages: list[BaseMessage]) -> list[ResearchTask]:
+    """Research tasks already completed in the run, recovered from the supervisor messages."""
+    questions = {
+        tool_call["id"]: tool_call["args"].get("research_question", "")
+        for message in messages if isinstance(message, AIMessage)
+        for tool_call in message.tool_calls if tool_call["name"] == "ConductResearch"
+    }
+    return [
+        ResearchTask.of(questions[message.tool_call_id], message.tool_call_id)
+        for message in messages
+        if isinstance(message, ToolMessage)
+        and message.tool_call_id in questions
+        and not message.additional_kwargs.get(DUPLICATE_OF)
+        # a failed researcher completed nothing - asking again runs a new one
+        and message.status != "error"
+    ]
+
+
+def _best_match(question_task: ResearchTask, tasks: list[ResearchTask], threshold: float) -> ResearchTask | None:
+    best, best_score = None, threshold
+    for task in tasks:
+        if task.terms != question_task.terms:
+            continue
+        score = similarity(question_task.fingerprint, task.fingerprint)
+        if score >= best_score:
+            best, best_score = task, score
+    return best
+
+
+def plan_research(research_tool_calls: list[dict], completed: list[ResearchTask], threshold: float) -> DedupPlan:
+    """Decide which ConductResearch calls to run and which reuse other findings.
+
+    Args:
+        research_tool_calls: the ConductResearch calls of this supervisor turn
+        completed: tasks already researched in the run
+        threshold: minimum similarity to treat two questions as the same research
+            (0 disables deduplication)
+    """
+    if threshold <= 0:
+        return DedupPlan(
+            to_run=[(tool_call, tool_call["args"]["research_question"]) for tool_call in research_tool_calls],
+            duplicates={},
+        )
+
+    duplicates: dict[str, ResearchTask] = {}
+    # groups of near-identical questions in this fan-out, one researcher each
+    groups: list[list[tuple[dict, ResearchTask]]] = []
+    for tool_call in research_tool_calls:
+        task = ResearchTask.of(tool_call["args"]["research_question"], tool_call["id"])
+        earlier = _best_match(task, completed, threshold)
+        if earlier is not None:
+            duplicates[tool_call["id"]] = earlier
+            continue
+        for group in groups:
+            if task.same_research(group[0][1], threshold):
+                group.append((tool_call, task))
+                break
+        else:
+            groups.append([(tool_call, task)])
+
+    to_run = []
+    for group in groups:
+        # the most detailed wording is researched, its findings answer the whole group
+        lead_call = max(group, key=lambda member: len(member[0]["args"]["research_question"]))[0]
+        lead_question = lead_call["args"]["research_question"]
+        to_run.append((lead_call, lead_question))
+        for tool_call, _ in group:
+            if tool_call is not lead_call:
+                duplicates[tool_call["id"]] = ResearchTask(lead_question, lead_call["id"])
+    return DedupPlan(to_run=to_run, duplicates=duplicates)
+
+
+def duplicate_tool_message(tool_call: dict, original: ResearchTask) -> ToolMessage:
+    """ToolMessage answering a deduplicated ConductResearch call with a pointer to the reused findings."""
+    return ToolMessage(
+        content=(
+            f"Not researched again: this question overlaps the research task \"{original.question}\". "
+            "Its findings (in that task's result) cover it."
+        ),
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        additional_kwargs={DUPLICATE_OF: original.tool_call_id},
+    )
@@ -0,0 +1,174 @@
+"""Persistent memo of research findings across runs.
+
+A researcher's compressed findings used to be thrown away with the run, so a
+recurring brief re-ran the same researchers over the same files. The memo keeps
+every researcher's compressed_research and raw_notes in a local SQLite file, keyed
+by:
+
+- the normalized research question (same normalization as research_dedup, so
+  rewordings differing only in stopwords or plurals hit the same entry); its words
+  keep their order, since "impact of A on B" and "impact of B on A" differ
+- the models that produce the findings: research, reflection and compression
+  (RESEARCH_AGENT_MODEL / REFLECTION_MODEL / COMPRESSION_MODEL)
+- a fingerprint of the research files: relative path, size and mtime of every file
+  under RESEARCH_FILES_DIR
+
+Any change under the research files (edit, new file, deletion) changes the
+fingerprint, so findings computed from an older version of the files are never
+served; they are purged on the next store.
+
+The store is synchronous (sqlite3) - async callers go through asyncio.to_thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import config
+from research_dedup import normalize_question
+
+
+def files_fingerprint(root: Path) -> str:
+    """Fingerprint of every file under root (relative path, size and mtime)."""
+    root = Path(root)
+    digest = hashlib.sha256()
+    if root.is_dir():
+        for file_path in sorted(root.rglob("*")):
+            if file_path.is_file():
+                stat = file_path.stat()
+                digest.update(f"{file_path.relative_to(root)}\x00{stat.st_size}\x00{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def memo_key(question: str, model: str, fingerprint: str) -> str:
+    """Key of a question's findings: its normalized words (in order), the models and the files fingerprint."""
+    normalized = " ".join(normalize_question(question))
+    return hashlib.sha256(f"{model}\x00{fingerprint}\x00{normalized}".encode()).hexdigest()
+
+
+@dataclass
+class MemoEntry:
+    """Memoized findings of a question, as returned by its researcher."""
+
+    question: str
+    compressed_research: str
+    raw_notes: list[str]
+    created_at: float
+
+
+class ResearchMemo:
+    """SQLite store of research findings keyed by question and research files fingerprint.
+
+    Args:
+        database_path: SQLite file to store the findings in
+        model: models the findings were produced with (findings_models)
+        ttl_seconds: entries older than this are ignored (None = never expire)
+    """
+
+    def __init__(self, database_path: str, model: str, ttl_seconds: float | None = None):
+        """Open (and create if needed) the findings table in the database file."""
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self._model = model
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # used from asyncio.to_thread workers
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS findings ("
+            " key TEXT PRIMARY KEY, question TEXT NOT NULL, files_fingerprint TEXT NOT NULL,"
+            " compressed_research TEXT NOT NULL, raw_notes TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, question: str, fingerprint: str) -> MemoEntry | None:
+        """Return the findings of an earlier researcher on the same question over the same files, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT question, compressed_research, raw_notes, created_at FROM findings WHERE key = ?",
+                (memo_key(question, self._model, fingerprint),),
+            ).fetchone()
+        if row is None:
+            return None
+        stored_question, compressed_research, raw_notes, created_at = row
+        if self._ttl_seconds is not None and time.time() - created_at > self._ttl_seconds:
+            return None
+        return MemoEntry(stored_question, compressed_research, json.loads(raw_notes), created_at)
+
+    def store(self, question: str, fingerprint: str, compressed_research: str, raw_notes: list[str]) -> None:
+        """Remember a researcher's findings, and drop findings computed from other versions of the files."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO findings"
+                " (key, question, files_fingerprint, compressed_research, raw_notes, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    memo_key(question, self._model, fingerprint), question, fingerprint,
+                    compressed_research, json.dumps(raw_notes), time.time(),
+                ),
+            )
+            self._conn.execute("DELETE FROM findings WHERE files_fingerprint != ?", (fingerprint,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Drop every memoized finding."""
+        with self._lock:
+            self._conn.execute("DELETE FROM findings")
+            self._conn.commit()
+
+
+def findings_models() -> str:
+    """Every model shaping a researcher's findings, as one memo key component."""
+    return ";".join(
+        f"{role}={model}" for role, model in (
+            ("research", config.get_research_agent_model()),
+            ("reflection", config.get_reflection_model()),
+            ("compression", config.get_compression_model()),
+        )
+    )
+
+
+# Global memo - opened lazily, None when RESEARCH_MEMO_ENABLED is off
+_memo: ResearchMemo | None = None
+
+
+def get_research_memo() -> ResearchMemo | None:
+    """Get the process-wide research memo (RESEARCH_MEMO_PATH), None when it is off."""
+    global _memo
+    if _memo is None and config.get_research_memo_enabled():
+        _memo = ResearchMemo(
+            config.get_research_memo_path(),
+            model=findings_models(),
+            ttl_seconds=config.get_research_memo_ttl_seconds(),
+        )
+    return _memo
+
+
+async def recall_findings(questions: list[str]) -> tuple[str | None, list[MemoEntry | None]]:
+    """Look the questions up in the memo against the current research files.
+
+    Returns:
+        The research files fingerprint (None when the memo is off) and the memoized
+        findings of each question (None where there are none)
+    """
+    memo = get_research_memo()
+    if memo is None or not questions:
+        return None, [None] * len(questions)
+    fingerprint = await asyncio.to_thread(files_fingerprint, Path(config.get_research_files_dir()))
+    entries = await asyncio.to_thread(lambda: [memo.lookup(question, fingerprint) for question in questions])
+    return fingerprint, entries
+
+
+async def remember_findings(question: str, fingerprint: str | None, result: dict) -> None:
+    """Store a researcher's result under the research files fingerprint taken before it ran."""
+    memo = get_research_memo()
+    if memo is None or fingerprint is None or "compressed_research" not in result:
+        return
+    # raw notes are kept as in the result: large ones are blob store references
+    await asyncio.to_thread(
+        memo.store, question, fingerprint, result["compressed_research"], list(result.get("raw_notes", []))
+    )
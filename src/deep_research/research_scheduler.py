@@ -0,0 +1,144 @@
+"""Process-wide scheduler for research sub-agents.
+
+Every ConductResearch call becomes one researcher_agent run. With many user
+sessions in the same process an unbounded asyncio.gather per supervisor turn
+overloads the model provider and the MCP pool, so researcher runs go through
+this scheduler which enforces:
+
+- a per-run cap (MAX_CONCURRENT_RESEARCHERS) - one brief can't exceed its share
+- a global cap (MAX_GLOBAL_RESEARCHERS) across all runs in the process
+- fairness - when a slot frees up, runs with queued sub-tasks take turns
+  (round robin), so one large brief can't starve the others
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from config import config
+
+
+class ResearchScheduler:
+    """Bounded, fair scheduler for researcher runs.
+
+    Args:
+        max_global: maximum researchers running at once in the process
+        max_per_run: maximum researchers running at once for a single run
+    """
+
+    def __init__(self, max_global: int, max_per_run: int):
+        """Start with no researcher running or queued."""
+        self._max_global = max(1, max_global)
+        self._max_per_run = max(1, max_per_run)
+        self._total_running = 0
+        self._running: dict[str, int] = {}
+        # queued sub-tasks per run, and the round-robin order of runs with queued sub-tasks
+        self._queues: dict[str, deque[asyncio.Future]] = {}
+        self._rotation: deque[str] = deque()
+
+    def _dispatch(self) -> None:
+        # Hand out free global slots, one run at a time in round-robin order
+        while self._total_running < self._max_global and self._rotation:
+            picked = None
+            for _ in range(len(self._rotation)):
+                run_id = self._rotation[0]
+                self._rotation.rotate(-1)
+                if self._running.get(run_id, 0) < self._max_per_run:
+                    picked = run_id
+                    break
+            if picked is None:
+                # every run with queued work is at its own cap
+                return
+
+            queue = self._queues[picked]
+            waiter = queue.popleft()
+            if not queue:
+                del self._queues[picked]
+                self._rotation.remove(picked)
+            if waiter.cancelled():
+                continue
+
+            self._running[picked] = self._running.get(picked, 0) + 1
+            self._total_running += 1
+            waiter.set_result(None)
+
+    def _release(self, run_id: str) -> None:
+        self._total_running -= 1
+        self._running[run_id] -= 1
+        if not self._running[run_id]:
+            del self._running[run_id]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, run_id: str):
+        """Wait for a researcher slot for `run_id` and hold it for the block."""
+        waiter = asyncio.get_running_loop().create_future()
+        if run_id not in self._queues:
+            self._queues[run_id] = deque()
+            self._rotation.append(run_id)
+        self._queues[run_id].append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was granted just as we were cancelled
+                self._release(run_id)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(run_id)
+
+    async def map_as_completed(
+        self,
+        run_id: str,
+        jobs: list[Callable[[], Awaitable[Any]]],
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """Run jobs under the scheduler and yield (index, result) as each one finishes.
+
+        Jobs beyond the caps stay queued until a slot frees up. A job which raises
+        yields its exception as the result, so one failing researcher doesn't
+        cancel the others.
+        """
+
+        async def run(index: int, job: Callable[[], Awaitable[Any]]) -> tuple[int, Any]:
+            async with self.slot(run_id):
+                try:
+                    return index, await job()
+                except Exception as e:
+                    return index, e
+
+        tasks = [asyncio.create_task(run(index, job)) for index, job in enumerate(jobs)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """Return the current load: running researchers (total and per run) and queued sub-tasks."""
+        return {
+            "running": self._total_running,
+            "running_per_run": dict(self._running),
+            "queued": sum(len(queue) for queue in self._queues.values()),
+        }
+
+
+# Global scheduler shared by every run in the process - initialized lazily
+_scheduler: ResearchScheduler | None = None
+
+
+def get_research_scheduler() -> ResearchScheduler:
+    """Get the process-wide researcher scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ResearchScheduler(
+            max_global=config.get_max_global_researchers(),
+            max_per_run=config.get_max_concurrent_researchers(),
+        )
+    return _scheduler
@@ -1,11 +1,13 @@
-from state_supervisor import SupervisorState
+from state_supervisor import SupervisorInputState, SupervisorState
 from langgraph.types import Command
 from typing_extensions import Literal
-from langchain.chat_models import init_chat_model
 from config import config
+from model_calls import call_model
+from models import get_model_with_fallback
 from prompts import lead_researcher_prompt
 from utils import get_today_str
 from langchain_core.messages import (
+    AIMessage,
     HumanMessage,
     BaseMessage,
     SystemMessage,
@@ -15,26 +17,82 @@ from langchain_core.messages import (
 from tools import think_tool, ConductResearch, ResearchComplete
 from langgraph.graph import StateGraph, START, END
 from research_agent import researcher_agent
-import asyncio
-from utils import get_today_str
-
-# Initialize model using config
-model = init_chat_model(model=config.get_supervisor_agent_model(), temperature=0.0)
+from research_scheduler import get_research_scheduler
+from research_memo import recall_findings, remember_findings
+from blob_store import store_notes
+from checkpointing import drop_research_results, keep_research_result, recall_research_result
+from research_budget import get_run_usage, record_tokens, release_run_usage
+from research_dedup import DUPLICATE_OF, ResearchTask, completed_research_tasks, duplicate_tool_message, plan_research
+from progress import emit_progress
+from langchain_core.runnables import RunnableConfig
+import functools
+import uuid
 
 # System constants
-# Maximum number of tool call iterations for individual researcher agents
-# This prevents infinite loops and controls research depth per topic
-max_researcher_iterations = 6 # Calls to think_tool + ConductResearch
+# Maximum number of supervisor iterations (calls to think_tool + ConductResearch) per run
+# This prevents infinite loops and controls research depth - researchers and the run
+# as a whole have their own budgets (research_budget)
+max_researcher_iterations = config.get_supervisor_max_iterations()
 
 # Maximum number of concurrent research agents the supervisor can launch
-# This is passed to the lead_researcher_prompt to limit parallel research tasks
-max_concurrent_researchers = 3
+# This is passed to the lead_researcher_prompt to limit parallel research tasks,
+# and enforced per run by the research scheduler
+max_concurrent_researchers = config.get_max_concurrent_researchers()
 
+# Minimum similarity for a ConductResearch question to reuse the findings of an
+# earlier or sibling task instead of starting another researcher (0 = off)
+research_dedup_threshold = config.get_research_dedup_threshold()
 
-async def supervisor(state: SupervisorState) -> Command[Literal["supervisor_tools"]]:
-    
-    supervisor_messages = state.get("supervisor_messages", [])
+# Section of a researcher's compressed findings that the digests are taken from
+# (see the output format of compress_research_system_prompt)
+FINDINGS_HEADING = "Fully Comprehensive Findings"
+
+
+def digest_findings(findings: str, max_tokens: int) -> str:
+    """Short digest of a researcher's compressed findings: the start of its findings section."""
+    # ~4 characters per token, as count_tokens_approximately
+    max_chars = max_tokens * 4
+    if len(findings) <= max_chars:
+        return findings
+    start = findings.find(FINDINGS_HEADING)
+    body = findings[start + len(FINDINGS_HEADING):] if start >= 0 else findings
+    digest = body.lstrip("*#: \n")[:max_chars].rsplit(" ", 1)[0]
+    return f"{digest} ... [digest of {len(findings)} characters of findings from an earlier iteration, all passed to the final report]"
+
+
+def supervisor_prompt_view(supervisor_messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Return the supervisor messages as sent to the model: findings of earlier iterations as digests.
+
+    Each research result is a full compressed report, and every supervisor turn used
+    to resend all of them. The findings answering the latest plan are kept in full
+    (the supervisor assesses them now); earlier ones were assessed in an earlier turn
+    and only need to be recalled. The state keeps the full text - this is only the
+    prompt - and digests are deterministic, so the prompt prefix stays cacheable.
+    """
+    digest_tokens = config.get_supervisor_digest_tokens()
+    if digest_tokens <= 0:
+        return list(supervisor_messages)
+    last_plan = max((i for i, message in enumerate(supervisor_messages) if isinstance(message, AIMessage)), default=-1)
+    view = []
+    for i, message in enumerate(supervisor_messages):
+        if (
+            i < last_plan
+            and isinstance(message, ToolMessage)
+            and message.name == "ConductResearch"
+            and isinstance(message.content, str)
+            and not message.additional_kwargs.get(DUPLICATE_OF)
+        ):
+            message = message.model_copy(update={"content": digest_findings(message.content, digest_tokens)})
+        view.append(message)
+    return view
 
+
+async def plan_supervisor_step(supervisor_messages: list[BaseMessage]) -> AIMessage:
+    """Ask the supervisor model for its next step (research to conduct, think or complete).
+
+    No side effects, so the speculative scope mode can run it ahead of time and
+    throw the result away.
+    """
     # Prepare system message with current date and constraints
     system_message = lead_researcher_prompt.format(
         date=get_today_str(), 
@@ -42,147 +100,344 @@ async def supervisor(state: SupervisorState) -> Command[Literal["supervisor_tool
         max_researcher_iterations=max_researcher_iterations
     )
 
-    messages = [SystemMessage(content=system_message)] + supervisor_messages
+    messages = [SystemMessage(content=system_message)] + supervisor_prompt_view(supervisor_messages)
 
     supervisor_tools = [ConductResearch, ResearchComplete, think_tool]
-    model_with_tools = model.bind_tools(supervisor_tools)
-    response = await model_with_tools.ainvoke(messages)
+    model_with_tools, fallback = get_model_with_fallback("supervisor", lambda model: model.bind_tools(supervisor_tools))
+    return await call_model(model_with_tools, messages, fallback=fallback, role="supervisor")
+
+
+def emit_supervisor_iteration(response: AIMessage, research_iterations: int) -> None:
+    """Report a supervisor turn and the research it asked for."""
+    emit_progress(
+        "supervisor_iteration",
+        iteration=research_iterations,
+        max_iterations=max_researcher_iterations,
+        research_questions=[
+            tool_call["args"].get("research_question")
+            for tool_call in response.tool_calls if tool_call["name"] == "ConductResearch"
+        ],
+    )
+
+
+async def supervisor(state: SupervisorState) -> Command[Literal["supervisor_tools"]]:
+    """Plan the next research step, counting the call against the run's token budget."""
+    supervisor_messages = state.get("supervisor_messages", [])
+
+    response = await plan_supervisor_step(supervisor_messages)
+    record_tokens(response)
+
+    research_iterations = state.get("research_iterations", 0) + 1
+    emit_supervisor_iteration(response, research_iterations)
 
     return Command(
         goto="supervisor_tools",
         update={
             "supervisor_messages": [response],
-            "research_iterations": state.get("research_iterations", 0) + 1
+            "research_iterations": research_iterations
         }
     )
 
 def get_notes_from_tool_calls(messages: list[BaseMessage]) -> list[str]:
-    """Extract research notes from ToolMessage objects in supervisor message history.
+    """Extract research notes from ToolMessage objects (the tool results of one supervisor step)."""
+    # deduplicated research calls only point at other findings, and failed ones have
+    # none - they add no notes
+    return [
+        tool_msg.content for tool_msg in filter_messages(messages, include_types="tool")
+        if not tool_msg.additional_kwargs.get(DUPLICATE_OF) and tool_msg.status != "error"
+    ]
+
+
+def researcher_error_message(tool_call: dict, error: Exception) -> ToolMessage:
+    """Answer a ConductResearch call whose researcher failed."""
+    return ToolMessage(
+        content=f"Error: research on this question failed ({type(error).__name__}: {error}). No findings.",
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status="error",
+    )
+
+
+def get_thread_id(config: RunnableConfig) -> str | None:
+    """Thread of the graph run, None when it has none (no checkpoints then)."""
+    configurable = config.get("configurable", {}) if config else {}
+    thread_id = configurable.get("thread_id")
+    return str(thread_id) if thread_id else None
+
+
+def get_run_id(config: RunnableConfig) -> str:
+    """Identify the research run (the graph thread) for per-run concurrency caps."""
+    return get_thread_id(config) or str(uuid.uuid4())
+
+
+async def run_researcher(research_question: str, thread_id: str | None, iteration: int) -> dict:
+    """Run one research sub-agent on a single research question.
+
+    On a thread, the result is kept as soon as the researcher finishes
+    (checkpointing.ResearchResultStore), so when a run fails part way through
+    supervisor_tools and is resumed, researchers that already finished are not
+    run again.
+
+    Returns:
+        The researcher's compressed_research, raw_notes and number of iterations
     """
-    return [tool_msg.content for tool_msg in filter_messages(messages, include_types="tool")]
+    kept = await recall_research_result(thread_id, iteration, research_question)
+    if kept is not None:
+        return kept
+    result = await researcher_agent.ainvoke(
+        {
+            "researcher_messages": [
+                HumanMessage(content=research_question)
+            ],
+            "research_question": research_question
+        },
+        # traced (and counted by the benchmark) as a run_researcher node of its own
+        config={"run_name": "run_researcher", "metadata": {"langgraph_node": "run_researcher"}},
+    )
+    finding = {
+        "compressed_research": result.get("compressed_research", "Error synthesizing research report"),
+        # blob store references for large notes, not the notes themselves
+        "raw_notes": list(result.get("raw_notes", [])),
+        "iterations": result.get("researcher_iterations", 0),
+    }
+    await keep_research_result(thread_id, iteration, research_question, finding)
+    return finding
+
 
+async def finish_research(config: RunnableConfig) -> None:
+    """Release what the run held while researching: its budget usage and kept researcher results."""
+    release_run_usage()
+    await drop_research_results(get_thread_id(config))
 
-async def supervisor_tools(state: SupervisorState) -> Command[Literal["supervisor", "__end__"]]:
-     """Execute supervisor decisions - either conduct research or end the process.
+
+async def supervisor_tools(state: SupervisorState, config: RunnableConfig) -> Command[Literal["supervisor", "__end__"]]:
+    """Execute supervisor decisions - either conduct research or end the process.
 
     Handles:
     - Executing think_tool calls for strategic reflection
     - Launching parallel research agents for different topics
     - Aggregating research results
-    - Determining when research is complete
+    - Determining when research is complete (ResearchComplete, SUPERVISOR_MAX_ITERATIONS
+      or the run's budget used up - research_budget)
+
+    Before fan-out, questions overlapping earlier or sibling tasks are deduplicated and
+    questions already researched in an earlier run over the same files are answered
+    from the research memo. Questions merged into a sibling task are researched after
+    all if that task's researcher fails.
+
+    Research agents are launched through the process-wide research scheduler, which
+    enforces the per-run and global concurrency caps and queues the excess. Each
+    researcher's result is streamed as a progress event as soon as it finishes.
 
     Args:
         state: Current supervisor state with messages and iteration count
+        config: Runnable config of the graph run (thread_id identifies the run)
 
     Returns:
         Command to continue supervision, end process, or handle errors
     """
-     supervisor_messages = state.get("supervisor_messages", [])
-     research_iterations = state.get("research_iterations", 0)
-     most_recent_message = supervisor_messages[-1]
-
-     # Initialize variables for single return pattern
-     tool_messages = []
-     all_raw_notes = []
-     next_step = "supervisor"  # Default next step
-     should_end = False
-
-     # check the condition whether it is invoking call more than configured time
-     exceeded_iterations=  research_iterations >= max_researcher_iterations
-     no_tool_calls = not most_recent_message.tool_calls
-     research_complete = any ( tool_call["name"] == "ResearchComplete" for tool_call in most_recent_message.tool_calls)
-
-     if exceeded_iterations or no_tool_calls or research_complete:
-          should_end = True
-          next_step = END
-
-     else:
-          # Execute ALL tool calls before deciding next step
-        try:
-               # Separate think_tool calls from ConductResearch calls
-            think_tool_calls = [
-                tool_call for tool_call in most_recent_message.tool_calls 
-                if tool_call["name"] == "think_tool"
-            ]
+    supervisor_messages = state.get("supervisor_messages", [])
+    research_iterations = state.get("research_iterations", 0)
+    most_recent_message = supervisor_messages[-1]
 
-            research_tool_calls= [
-                tool_call for tool_call in most_recent_message.tool_calls 
-                if tool_call["name"] == "ConductResearch"
-            ]
+    # check the condition whether it is invoking call more than configured time
+    exceeded_iterations = research_iterations >= max_researcher_iterations
+    run_usage = get_run_usage()
+    exceeded_budget = run_usage.exceeded() if run_usage is not None else None
+    no_tool_calls = not most_recent_message.tool_calls
+    research_complete = any(tool_call["name"] == "ResearchComplete" for tool_call in most_recent_message.tool_calls)
+
+    # notes are added to the state as each step's results come in, nothing to collect here
+    end_command = Command(
+        goto=END,
+        update={
+            "research_brief": state.get("research_brief", "")
+        }
+    )
+
+    if exceeded_iterations or exceeded_budget or no_tool_calls or research_complete:
+        emit_progress(
+            "research_complete",
+            iterations=research_iterations,
+            saved_researcher_runs=state.get("saved_researcher_runs", 0),
+            budget=exceeded_budget,
+        )
+        await finish_research(config)
+        return end_command
+
+    tool_messages = []
+    all_raw_notes = []
 
-            # Handle think_tool calls (synchronous)
-            for tool_call in think_tool_calls:
-                results = think_tool.invoke(tool_call["args"])
-                tool_messages.append(
-                    ToolMessage(
-                        content=results,
-                        name=tool_call["name"],
-                        tool_call_id=tool_call["id"]
-                    )
+    # Execute ALL tool calls before deciding next step
+    try:
+        # Separate think_tool calls from ConductResearch calls
+        think_tool_calls = [
+            tool_call for tool_call in most_recent_message.tool_calls
+            if tool_call["name"] == "think_tool"
+        ]
+
+        research_tool_calls = [
+            tool_call for tool_call in most_recent_message.tool_calls
+            if tool_call["name"] == "ConductResearch"
+        ]
+
+        # Handle think_tool calls
+        for tool_call in think_tool_calls:
+            results = await think_tool.ainvoke(tool_call["args"])
+            tool_messages.append(
+                ToolMessage(
+                    content=results,
+                    name=tool_call["name"],
+                    tool_call_id=tool_call["id"]
                 )
+            )
 
-            # Handle calls (asynchronous)
-            if research_tool_calls:
-                # Launch parallel research agents
-                coros = [
-                    researcher_agent.ainvoke({
-                        "researcher_messages": [
-                            HumanMessage(content=tool_call["args"]["research_question"])
-                        ],
-                        "research_question": tool_call["args"]["research_question"]
-                    }) 
-                    for tool_call in research_tool_calls
-                ]
-            
-                # Wait for all research to complete
-                tool_results = await asyncio.gather(*coros)
-                # Format research results as tool messages
-                # Each sub-agent returns compressed research findings in result["compressed_research"]
-                # We write this compressed research as the content of a ToolMessage, which allows
-                # the supervisor to later retrieve these findings via get_notes_from_tool_calls()
-                research_tool_messages = [
-                    ToolMessage(
-                        content=result.get("compressed_research", "Error synthesizing research report"),
-                        name=tool_call["name"],
-                        tool_call_id=tool_call["id"]
-                    ) for result, tool_call in zip(tool_results, research_tool_calls)
-                ]
-            
-            tool_messages.extend(research_tool_messages)
-
-            # Aggregate raw notes from all research
-            all_raw_notes = [
-                    "\n".join(result.get("raw_notes", [])) 
-                    for result in tool_results
-                ]
-        except Exception as e:
-            print(f"Error in supervisor tools: {e}")
-            should_end = True
-            next_step = END
-
-        # Single return point with appropriate state updates
-        if should_end:
-            return Command(
-                goto=next_step,
-                update={
-                    "notes": get_notes_from_tool_calls(supervisor_messages),
-                    "research_brief": state.get("research_brief", "")
-                }
+        # Handle research calls (asynchronous, bounded by the research scheduler)
+        # Questions overlapping earlier or sibling tasks reuse their findings instead of re-researching
+        dedup_plan = plan_research(
+            research_tool_calls,
+            completed_research_tasks(supervisor_messages),
+            research_dedup_threshold,
+        )
+        # duplicates of a task of this fan-out wait for its findings - if it fails, they are researched after all
+        lead_ids = {tool_call["id"] for tool_call, _ in dedup_plan.to_run}
+        waiting_duplicates: dict[str, list[tuple[dict, ResearchTask]]] = {}
+        for tool_call in research_tool_calls:
+            original = dedup_plan.duplicates.get(tool_call["id"])
+            if original is None:
+                continue
+            if original.tool_call_id in lead_ids:
+                waiting_duplicates.setdefault(original.tool_call_id, []).append((tool_call, original))
+            else:
+                tool_messages.append(duplicate_tool_message(tool_call, original))
+        if dedup_plan.saved:
+            emit_progress(
+                "research_deduplicated",
+                saved=dedup_plan.saved,
+                research_questions=[
+                    tool_call["args"]["research_question"]
+                    for tool_call in research_tool_calls if tool_call["id"] in dedup_plan.duplicates
+                ],
             )
-        else:
-            return Command(
-                goto=next_step,
-                update={
-                    "supervisor_messages": tool_messages,
-                    "raw_notes": all_raw_notes
-                }
+
+        # Questions already researched in an earlier run over the same files are answered from the memo
+        files_fingerprint, remembered = await recall_findings(
+            [research_question for _, research_question in dedup_plan.to_run]
+        )
+        to_research = []
+        for (tool_call, research_question), entry in zip(dedup_plan.to_run, remembered):
+            if entry is None:
+                to_research.append((tool_call, research_question))
+                continue
+            tool_messages.append(
+                ToolMessage(
+                    content=entry.compressed_research,
+                    name=tool_call["name"],
+                    tool_call_id=tool_call["id"]
+                )
             )
-            
+            all_raw_notes.extend(await store_notes(entry.raw_notes))
+            emit_progress("research_recalled", research_question=research_question, researched_at=entry.created_at)
+        saved_researcher_runs = dedup_plan.saved + len(dedup_plan.to_run) - len(to_research)
+
+        async def research(batch: list[tuple[dict, str]]) -> set[str]:
+            """Run a researcher per (tool call, question), adding their results - returns the failed tool call ids."""
+            failed = set()
+            jobs = [
+                functools.partial(run_researcher, research_question, get_thread_id(config), research_iterations)
+                for _, research_question in batch
+            ]
+            for _, research_question in batch:
+                emit_progress("researcher_started", research_question=research_question)
+
+            # Collect results as they complete, not in launch order
+            async for index, result in get_research_scheduler().map_as_completed(get_run_id(config), jobs):
+                tool_call, research_question = batch[index]
+                if isinstance(result, Exception):
+                    # only this task failed - the supervisor sees the error and the
+                    # findings of the other researchers are kept
+                    failed.add(tool_call["id"])
+                    tool_messages.append(researcher_error_message(tool_call, result))
+                    emit_progress("researcher_failed", research_question=research_question, error=str(result))
+                    continue
+                # Format research results as tool messages
+                # Each sub-agent returns compressed research findings in result["compressed_research"]
+                # We write this compressed research as the content of a ToolMessage, for the supervisor's
+                # next turn, and the step's notes are taken from these messages (get_notes_from_tool_calls)
+                tool_message = ToolMessage(
+                    content=result["compressed_research"],
+                    name=tool_call["name"],
+                    tool_call_id=tool_call["id"]
+                )
+                tool_messages.append(tool_message)
+                # Aggregate raw notes from all research - blob store references, not the notes themselves
+                all_raw_notes.extend(result["raw_notes"])
+                await remember_findings(research_question, files_fingerprint, result)
+                emit_progress(
+                    "researcher_finished",
+                    research_question=research_question,
+                    iterations=result["iterations"],
+                    tool_message=tool_message,
+                )
+            return failed
+
+        failed_leads = await research(to_research) if to_research else set()
+        # a failed lead's findings cover nothing: its duplicates get their own researchers
+        rerun = []
+        for lead_id, duplicates in waiting_duplicates.items():
+            for tool_call, original in duplicates:
+                if lead_id in failed_leads:
+                    rerun.append((tool_call, tool_call["args"]["research_question"]))
+                else:
+                    tool_messages.append(duplicate_tool_message(tool_call, original))
+        if rerun:
+            saved_researcher_runs -= len(rerun)
+            await research(rerun)
+    except Exception as e:
+        print(f"Error in supervisor tools: {e}")
+        emit_progress("research_complete", iterations=research_iterations, error=str(e))
+        await finish_research(config)
+        # end with the findings gathered before the error
+        return Command(
+            goto=END,
+            update={
+                "research_brief": state.get("research_brief", ""),
+                "notes": get_notes_from_tool_calls(tool_messages),
+                "raw_notes": all_raw_notes,
+            }
+        )
+
+    return Command(
+        goto="supervisor",
+        update={
+            "supervisor_messages": tool_messages,
+            "notes": get_notes_from_tool_calls(tool_messages),
+            "raw_notes": all_raw_notes,
+            "saved_researcher_runs": saved_researcher_runs
+        }
+    )
+
+
+def route_supervisor_start(state: SupervisorState) -> Literal["supervisor", "supervisor_tools"]:
+    """Start with the supervisor's planning call, unless it was already made.
+
+    The speculative scope mode plans the first step while the brief is being
+    clarified and hands the subgraph a supervisor message with pending tool calls,
+    which go straight to execution.
+    """
+    supervisor_messages = state.get("supervisor_messages", [])
+    if supervisor_messages and isinstance(supervisor_messages[-1], AIMessage) and supervisor_messages[-1].tool_calls:
+        return "supervisor_tools"
+    return "supervisor"
+
+
 # Build supervisor graph
-supervisor_builder = StateGraph(SupervisorState)
+supervisor_builder = StateGraph(SupervisorState, input_schema=SupervisorInputState)
 supervisor_builder.add_node("supervisor", supervisor)
 supervisor_builder.add_node("supervisor_tools", supervisor_tools)
-supervisor_builder.add_edge(START, "supervisor")
+supervisor_builder.add_conditional_edges(START, route_supervisor_start, ["supervisor", "supervisor_tools"])
+# No checkpointer of its own: as a node of the top-level graph it checkpoints
+# every supervisor step with the parent's checkpointer
 supervisor_agent = supervisor_builder.compile()
 
      
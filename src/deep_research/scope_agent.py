@@ -1,20 +1,86 @@
 from state_agent import AgentState
 from langgraph.types import Command
 from typing_extensions import Literal
-from langchain.chat_models import init_chat_model
-from state_scope import ClarifyWithUser , ResearchQuestion
-from langchain_core.messages import HumanMessage, AIMessage, get_buffer_string
-from prompts import clarify_with_user_instructions , transform_messages_into_research_topic_prompt
+from state_scope import ClarifyWithUser , ResearchQuestion, ScopeDecision
+from langchain_core.messages import HumanMessage, AIMessage, RemoveMessage, get_buffer_string
+from prompts import clarify_with_user_instructions , transform_messages_into_research_topic_prompt, clarify_and_brief_instructions
 from langgraph.graph import StateGraph, START, END
-from config import config
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from utils import get_today_str
+from progress import emit_progress
+from research_budget import record_tokens
+from model_calls import call_model
+from models import get_model_with_fallback
+from research_supervisor_agent import emit_supervisor_iteration, plan_supervisor_step
+import asyncio
 
-# Initialize model using config
-model = init_chat_model(model=config.get_scope_agent_model(), temperature=0.0)
+# The scope model is built on first use by the model factory (models.get_model)
 
 
+def start_research(brief_message: HumanMessage, plan: AIMessage | None = None) -> dict:
+    """State updates handing a new request's brief (and first plan, if made) to the supervisor.
 
-def clarify_with_user(state: AgentState) -> Command[Literal["write_research_brief" , "__end__"]]:
+    A thread can carry several requests, and the supervisor's conversation and
+    iteration count belong to one of them - carried over, the next request would
+    start with the iterations of the previous one used up, and start no researcher.
+    """
+    return {
+        "supervisor_messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), brief_message] + ([plan] if plan is not None else []),
+        # a plan made by the speculative scope node counts as the first iteration
+        "research_iterations": 1 if plan is not None else 0,
+    }
+
+
+async def decide_clarification(messages: list) -> ClarifyWithUser:
+    """Ask the scope model whether the conversation needs a clarification question."""
+     # Set up structured output model which is the inbuilt method to return the response in this format
+     # prompt has clarified with few shots examples
+    structured_output_model, fallback = get_model_with_fallback(
+        "scope", lambda model: model.with_structured_output(ClarifyWithUser)
+    )
+
+    # Invoke the model with clarification instructions
+    return await call_model(structured_output_model, [
+        HumanMessage(content=clarify_with_user_instructions.format(
+            messages=get_buffer_string(messages=messages), 
+            date=get_today_str()
+        ))
+    ], fallback=fallback, role="scope")
+
+
+async def draft_research_brief(messages: list) -> ResearchQuestion:
+    """Ask the scope model to turn the conversation into a research brief."""
+    # Set up structured output model
+    structured_output_model, fallback = get_model_with_fallback(
+        "scope", lambda model: model.with_structured_output(ResearchQuestion)
+    )
+
+    # Generate research brief from conversation history
+    # pass all the messages to the LLM - get_buffer_string
+    return await call_model(structured_output_model, [
+        HumanMessage(content=transform_messages_into_research_topic_prompt.format(
+            messages=get_buffer_string(messages),
+            date=get_today_str()
+        ))
+    ], fallback=fallback, role="scope")
+
+
+async def decide_scope(messages: list) -> ScopeDecision:
+    """Ask the scope model for the clarification decision and the research brief in one call."""
+    structured_output_model, fallback = get_model_with_fallback(
+        "scope", lambda model: model.with_structured_output(ScopeDecision)
+    )
+
+    # the transcript is sent once, instead of once per decision
+    return await call_model(structured_output_model, [
+        HumanMessage(content=clarify_and_brief_instructions.format(
+            messages=get_buffer_string(messages),
+            date=get_today_str()
+        ))
+    ], fallback=fallback, role="scope")
+
+
+async def clarify_with_user(state: AgentState) -> Command[Literal["write_research_brief" , "__end__"]]:
     """
     clarify_with_user is the clarification decision node
 
@@ -29,17 +95,7 @@ def clarify_with_user(state: AgentState) -> Command[Literal["write_research_brie
     All these conversation are stored in the agent state using the chekpointer inmemory
     
     """
-     # Set up structured output model which is the inbuilt method to return the response in this format
-     # prompt has clarified with few shots examples
-    structured_output_model = model.with_structured_output(ClarifyWithUser)
-
-    # Invoke the model with clarification instructions
-    response = structured_output_model.invoke([
-        HumanMessage(content=clarify_with_user_instructions.format(
-            messages=get_buffer_string(messages=state["messages"]), 
-            date=get_today_str()
-        ))
-    ])
+    response = await decide_clarification(state["messages"])
     print(f'The response requires clarification is {response.requires_clarification} and the question is {response.question} and the verification message is {response.verification_message}')
 
     # if we need clarification go to END state and add messages AIMessage with clarification question 
@@ -56,7 +112,7 @@ def clarify_with_user(state: AgentState) -> Command[Literal["write_research_brie
         )
 
 
-def write_research_brief(state: AgentState):
+async def write_research_brief(state: AgentState):
 
     """
     Transform the conversation history into a comprehensive research brief.
@@ -65,21 +121,104 @@ def write_research_brief(state: AgentState):
     and contains all necessary details for effective research.
     """
 
-    # Set up structured output model
-    structured_output_model = model.with_structured_output(ResearchQuestion)
+    response = await draft_research_brief(state.get("messages", []))
 
-    # Generate research brief from conversation history
-    # pass all the messages to the LLM - get_buffer_string
-    response = structured_output_model.invoke([
-        HumanMessage(content=transform_messages_into_research_topic_prompt.format(
-            messages=get_buffer_string(state.get("messages", [])),
-            date=get_today_str()
-        ))
-    ])
+    emit_progress("brief_written", research_brief=response.research_brief)
 
     # Update state with generated research brief and pass it to the supervisor
     return {
         "research_brief": response.research_brief,
-        "supervisor_messages": [HumanMessage(content=f"{response.research_brief}.")]
+        **start_research(HumanMessage(content=f"{response.research_brief}.")),
     }
 
+
+
+async def speculative_scope(state: AgentState) -> Command[Literal["supervisor_subgraph", "__end__"]]:
+    """Clarification, research brief and the supervisor's first plan at the same time (SCOPE_MODE=speculative).
+
+    Most requests need no clarification, yet the sequential path waits for the
+    clarification decision before writing the brief, and for the brief before the
+    supervisor plans - two extra model round-trips before any research starts.
+    Here the brief and the first supervisor plan are drafted speculatively while
+    the clarification decision is pending:
+
+    - no clarification needed: the brief and the plan are committed and the
+      supervisor subgraph starts directly with the planned research
+    - clarification needed: the speculative work is cancelled and the question is
+      returned to the user, as in clarify_with_user
+    """
+    messages = state["messages"]
+
+    async def draft_brief_and_plan():
+        brief = await draft_research_brief(messages)
+        brief_message = HumanMessage(content=f"{brief.research_brief}.")
+        plan = await plan_supervisor_step([brief_message])
+        return brief, brief_message, plan
+
+    speculation = asyncio.create_task(draft_brief_and_plan())
+    try:
+        clarification = await decide_clarification(messages)
+    except BaseException:
+        speculation.cancel()
+        raise
+
+    if clarification.requires_clarification:
+        speculation.cancel()
+        # wait for the cancellation so no model call outlives the node
+        await asyncio.gather(speculation, return_exceptions=True)
+        return Command(
+            goto=END,
+            update={"messages": [AIMessage(content=clarification.question)]}
+        )
+
+    brief, brief_message, plan = await speculation
+    # the first plan counts against the run's token budget, as the supervisor's own plans do
+    record_tokens(plan)
+    emit_progress("brief_written", research_brief=brief.research_brief)
+    emit_supervisor_iteration(plan, 1)
+
+    # the supervisor subgraph sees a pending plan and goes straight to executing it
+    return Command(
+        goto="supervisor_subgraph",
+        update={
+            "messages": [AIMessage(content=clarification.verification_message)],
+            "research_brief": brief.research_brief,
+            **start_research(brief_message, plan),
+        }
+    )
+
+
+async def merged_scope(state: AgentState) -> Command[Literal["supervisor_subgraph", "__end__"]]:
+    """Clarification decision and research brief from a single structured call (SCOPE_MODE=merged).
+
+    clarify_with_user and write_research_brief each send the same conversation
+    transcript to the scope model, one after the other. Here one ScopeDecision
+    answer carries both, saving a model round-trip and the second copy of the
+    transcript's prompt tokens:
+
+    - clarification needed: the question is returned to the user, as in clarify_with_user
+    - otherwise: the brief is handed to the supervisor, as in write_research_brief
+    """
+    response = await decide_scope(state["messages"])
+
+    if response.requires_clarification:
+        return Command(
+            goto=END,
+            update={"messages": [AIMessage(content=response.question)]}
+        )
+
+    research_brief = response.research_brief
+    if not research_brief.strip():
+        # the model skipped the brief - fall back to the dedicated brief call
+        research_brief = (await draft_research_brief(state["messages"])).research_brief
+
+    emit_progress("brief_written", research_brief=research_brief)
+
+    return Command(
+        goto="supervisor_subgraph",
+        update={
+            "messages": [AIMessage(content=response.verification_message)],
+            "research_brief": research_brief,
+            **start_research(HumanMessage(content=f"{research_brief}.")),
+        }
+    )
@@ -28,10 +28,16 @@ class AgentState(MessagesState):
     # This state field is a list of messages, and when updating, use the add_messages function to merge the new ones in.
     supervisor_messages: Annotated[Sequence[BaseMessage], add_messages]
     # Raw unprocessed research notes collected during the research phase
+    # (large ones as blob store references - read them with blob_store.resolve_notes)
     raw_notes: Annotated[list[str], operator.add] = []
     # Processed and structured notes ready for report generation
     notes: Annotated[list[str], operator.add] = []
     # Final formatted research report
     final_report: str
+    # Supervisor iterations done for the current request - shared with the supervisor
+    # subgraph, so a first plan made by the speculative scope node counts as its first
+    # iteration. Reset, with supervisor_messages, when a request's brief is written
+    # (scope_agent.start_research)
+    research_iterations: int
 
 
@@ -11,6 +11,17 @@ class ResearchState(TypedDict):
     """
     researcher_messages: Annotated[Sequence[BaseMessage], add_messages]
     raw_notes: Annotated[List[str], operator.add]
+    # Compressed findings so far (RESEARCH_COMPRESSION_MODE=incremental), and the
+    # number of researcher_messages already folded into them
+    running_notes: str
+    folded_messages: int
+    # Budget use of this researcher (research_budget): start time, tool calls and
+    # model tokens so far, low novelty steps in a row, and why it was stopped
+    started_at: float
+    tool_calls_made: Annotated[int, operator.add]
+    tokens_used: Annotated[int, operator.add]
+    low_novelty_steps: int
+    stop_reason: str
 
 
 class ResearcherOutputState(TypedDict):
@@ -18,8 +29,11 @@ class ResearcherOutputState(TypedDict):
     Output state for the research agent containing final research results.
 
     This represents the final output of the research process with compressed
-    research findings and all raw notes from the research process.
+    research findings and all raw notes from the research process (large ones as
+    blob store references). The transcript itself is not returned - it is already
+    in the raw notes, and would be copied into the supervisor's checkpoints.
     """
     compressed_research: str
     raw_notes: Annotated[List[str], operator.add]
-    researcher_messages: Annotated[Sequence[BaseMessage], add_messages]
+    # model turns (llm_call) the researcher took
+    researcher_iterations: int
@@ -21,4 +21,22 @@ class ResearchQuestion(BaseModel):
 
     research_brief: str = Field(
         description="A research question that will be used to guide the research.",
-    )
\ No newline at end of file
+    )
+
+# ScopeDecision has both answers of the scope step, for the single call scope node (SCOPE_MODE=merged)
+class ScopeDecision(BaseModel):
+    """Schema for the clarification decision and the research brief in one structured answer."""
+
+    requires_clarification: bool = Field(description= "whether the user needs to be asked with clarification questions")
+
+    question: str = Field(description="A question to ask the user to clarify the report scope", default="")
+
+    verification_message: str = Field(
+        description="Verify message that we will start research after the user has provided the necessary information.",
+        default="",
+    )
+
+    research_brief: str = Field(
+        description="A research question that will be used to guide the research. Empty when a clarification question is needed.",
+        default="",
+    )
@@ -19,12 +19,27 @@ class SupervisorState(TypedDict):
     research_brief: str
      # Messages exchanged with supervisor for coordination and decision-making
     supervisor_messages: Annotated[Sequence[BaseMessage], add_messages]
-     # Processed and structured notes ready for final report generation
+     # Processed and structured notes ready for final report generation,
+     # added by supervisor_tools as each research step's results come in
     notes: Annotated[list[str], operator.add] = []
      # Counter tracking the number of research iterations performed
     research_iterations: int = 0
-    # Raw unprocessed research notes collected from sub-agent research
+    # Raw unprocessed research notes collected from sub-agent research (large ones as blob store references)
     raw_notes: Annotated[list[str], operator.add] = []
+    # Researcher runs avoided by reusing findings (overlapping tasks, research memo)
+    saved_researcher_runs: Annotated[int, operator.add] = 0
+
+
+class SupervisorInputState(TypedDict):
+    """What the supervisor subgraph takes from the parent graph.
+
+    notes and raw_notes are left out: the subgraph returns every note it collected,
+    and the parent adds them to its own - given the notes of a thread's earlier
+    requests, the subgraph would hand them back to be added a second time.
+    """
+    research_brief: str
+    supervisor_messages: Annotated[Sequence[BaseMessage], add_messages]
+    research_iterations: int
 
 
 
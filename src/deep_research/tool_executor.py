@@ -0,0 +1,97 @@
+"""Concurrent execution of the tool calls a researcher emits in one turn.
+
+The model often asks for several independent read_file / search_files calls at once.
+Running them one after another over the MCP pipe makes each turn as slow as the sum
+of its calls; here they run in parallel, bounded by a process-wide semaphore and
+optional per-tool semaphores, each with its own timeout. Results come back in
+tool_call order so the ToolMessage list matches the AIMessage's tool_calls.
+"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Any
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+
+from config import config
+from mcp_pool import get_mcp_pool
+
+# Semaphores are shared by every researcher in the process - created lazily
+_global_semaphore: asyncio.Semaphore | None = None
+_tool_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def _get_global_semaphore() -> asyncio.Semaphore:
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(config.get_tool_max_concurrency())
+    return _global_semaphore
+
+
+def _get_tool_semaphore(tool_name: str) -> asyncio.Semaphore | None:
+    # Tools without a configured limit are only bounded by the global semaphore
+    limit = config.get_tool_concurrency_limits().get(tool_name)
+    if limit is None:
+        return None
+    if tool_name not in _tool_semaphores:
+        _tool_semaphores[tool_name] = asyncio.Semaphore(limit)
+    return _tool_semaphores[tool_name]
+
+
+async def execute_tool_calls(
+    tool_calls: list[dict],
+    local_tools: list[BaseTool],
+    call_timeout_seconds: float | None = None,
+) -> list[ToolMessage]:
+    """Execute one turn's tool calls concurrently.
+
+    Local tools (think_tool, ...) run in-process; every other tool is an MCP tool
+    and runs on the shared MCP session pool.
+
+    A failing or timed-out call does not fail the turn - it becomes an error
+    ToolMessage so the model can decide what to do next.
+
+    Args:
+        tool_calls: tool calls from the last AIMessage
+        local_tools: tools executed in-process instead of through MCP
+        call_timeout_seconds: per-call timeout, defaults to TOOL_CALL_TIMEOUT_SECONDS
+
+    Returns:
+        ToolMessages in the same order as tool_calls
+    """
+    timeout = call_timeout_seconds if call_timeout_seconds is not None else config.get_tool_call_timeout()
+    local_tools_by_name = {tool.name: tool for tool in local_tools}
+    pool = get_mcp_pool()
+
+    async def run_tool_call(tool_call: dict) -> Any:
+        name = tool_call["name"]
+        if name in local_tools_by_name:
+            return await local_tools_by_name[name].ainvoke(tool_call["args"])
+        return await pool.call_tool(name, tool_call["args"])
+
+    async def execute(tool_call: dict) -> ToolMessage:
+        async with AsyncExitStack() as stack:
+            tool_semaphore = _get_tool_semaphore(tool_call["name"])
+            if tool_semaphore is not None:
+                await stack.enter_async_context(tool_semaphore)
+            await stack.enter_async_context(_get_global_semaphore())
+            try:
+                observation = await asyncio.wait_for(run_tool_call(tool_call), timeout)
+                status = "success"
+            except TimeoutError:
+                observation = f"Error: {tool_call['name']} timed out after {timeout} seconds"
+                status = "error"
+            except Exception as e:
+                observation = f"Error: {tool_call['name']} failed: {e}"
+                status = "error"
+
+        return ToolMessage(
+            content=observation,
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            status=status,
+        )
+
+    # gather keeps the results in tool_call order
+    return list(await asyncio.gather(*(execute(tool_call) for tool_call in tool_calls)))
@@ -1,5 +1,7 @@
-from utils import get_current_dir
-from langchain_mcp_adapters.client import MultiServerMCPClient
+import asyncio
+from config import config
+from document_index import get_document_index
+from document_reader import outline_document, read_chunk
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 
@@ -14,7 +16,7 @@ mcp_config = {
         "args": [
             "-y",  # Auto-install if needed
             "@modelcontextprotocol/server-filesystem",
-            str(get_current_dir() / "files")  # Path to research documents
+            config.get_research_files_dir()  # Path to research documents
         ],
         "transport": "stdio"  # Communication via stdin/stdout
     }
@@ -26,6 +28,9 @@ _client = None
 def get_mcp_client():
     global _client
     if _client is None:
+        # imported on first use, the MCP SDK is slow to import
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+
         _client = MultiServerMCPClient(mcp_config)
     return _client
 
@@ -59,6 +64,74 @@ def think_tool(reflection: str) -> str:
     return f"Reflection recorded: {reflection}"
 
 
+@tool(parse_docstring=True)
+# in-process full-text search over the research files - one call instead of listing and reading files
+async def search_documents(query: str, max_results: int = 5) -> str:
+    """Search the local research files and return the most relevant passages.
+
+    Use this tool first to find which files and passages cover a topic. It ranks
+    passages from all research files against your query (keyword based, BM25), so
+    use specific keywords rather than full sentences. Read a whole file only when
+    the returned passages are not enough.
+
+    Args:
+        query: Keywords describing the information you are looking for
+        max_results: Maximum number of passages to return
+
+    Returns:
+        Ranked passages with the file each one comes from
+    """
+    def refresh_and_search():
+        index = get_document_index()
+        index.refresh()
+        return index.search(query, max_results=max_results)
+
+    # file scanning and reading happen off the event loop
+    results = await asyncio.to_thread(refresh_and_search)
+    if not results:
+        return f"No passages found for: {query}"
+    return "\n\n".join(
+        f"[{rank}] {result.path} (score {result.score:.2f})\n{result.snippet}"
+        for rank, result in enumerate(results, start=1)
+    )
+
+
+@tool(parse_docstring=True)
+# chunked reads through the shared page cache - only the needed part of a file goes into the prompt
+async def document_outline(path: str) -> str:
+    """List the sections of a research file, with their offsets and sizes.
+
+    Use this before reading a long file, then read only the sections you need
+    with read_document.
+
+    Args:
+        path: File path relative to the research files directory (as returned by search_documents)
+
+    Returns:
+        The file size and its markdown headings with their byte offsets and sizes
+    """
+    return await asyncio.to_thread(outline_document, path)
+
+
+@tool(parse_docstring=True)
+async def read_document(path: str, section: str = "", offset: int = 0, length: int = 0) -> str:
+    """Read part of a research file: one section by its heading, or a range of bytes.
+
+    Prefer this over reading whole files. Each call returns at most a few thousand
+    characters and tells you the offset to continue from if there is more.
+
+    Args:
+        path: File path relative to the research files directory (as returned by search_documents)
+        section: Heading of the section to read (from document_outline), empty to read by offset
+        offset: Byte offset to start reading from when no section is given
+        length: Number of bytes to read (0 = the largest chunk allowed)
+
+    Returns:
+        The requested text, with its byte range and the offset of the next chunk
+    """
+    return await asyncio.to_thread(read_chunk, path, offset, length, section)
+
+
 @tool
 # ConductResearch execution is nothing but research agent workflow execution
 class ConductResearch(BaseModel):
@@ -0,0 +1,342 @@
+"""Tracing for graph nodes, model calls and tool calls.
+
+TracingCallbackHandler is a LangChain callback handler, so passing it in the run
+config's callbacks is enough to trace everything in the graph - every node of the
+top-level graph and of the supervisor / researcher subgraphs, every chat model call
+(latency, token usage, tool calls requested, payload sizes) and every tool call,
+MCP tools included (latency, payload sizes, errors).
+
+Spans use OpenTelemetry's data model (trace/span ids, parent span id, start/end in
+unix nanoseconds, attributes following the GenAI semantic conventions where they
+exist). They are kept in memory, can be written as JSON lines with
+JsonSpanExporter (in batches, by a background thread), and are also mirrored to
+OpenTelemetry when the SDK is installed and TRACING_OTEL is enabled.
+"""
+
+import atexit
+import json
+import secrets
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+
+from config import config
+
+# OpenTelemetry is optional - spans are mirrored to it only when installed
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+@dataclass
+class Span:
+    """A finished or in-progress span, in OpenTelemetry's data model."""
+
+    name: str
+    kind: str  # node, model or tool
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    start_time_unix_nano: int
+    end_time_unix_nano: int | None = None
+    status: str = "OK"
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_seconds(self) -> float:
+        """Wall time of the span (0 while it is open)."""
+        return ((self.end_time_unix_nano or self.start_time_unix_nano) - self.start_time_unix_nano) / 1e9
+
+
+class JsonSpanExporter:
+    """Append finished spans to a JSON lines file, in batches written off the event loop.
+
+    Spans finish on the event loop (the handler runs inline), where a file write per
+    span would hold up every researcher. export() only queues the span; a worker
+    thread appends the queued spans every `flush_interval` seconds, or as soon as
+    `max_batch` are waiting - as OpenTelemetry's BatchSpanProcessor does. shutdown()
+    writes what is left (it is also registered to run at exit).
+
+    Args:
+        path: JSON lines file to append to
+        max_batch: queued spans that trigger a write before the interval is up
+        flush_interval: maximum seconds a finished span waits to be written
+    """
+
+    def __init__(self, path: str, max_batch: int = 256, flush_interval: float = 1.0):
+        """Create the exporter - its worker thread starts with the first span."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval
+        self._queue: list[Span] = []
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._worker: threading.Thread | None = None
+        atexit.register(self.shutdown)
+
+    def export(self, span: Span) -> None:
+        """Queue a finished span for the worker thread (started by the first span)."""
+        with self._condition:
+            if self._shutdown:
+                return
+            self._queue.append(span)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._worker.start()
+            if len(self._queue) >= self.max_batch:
+                self._condition.notify()
+
+    def _take_batch(self) -> list[Span]:
+        batch, self._queue = self._queue, []
+        return batch
+
+    def _write(self, spans: list[Span]) -> None:
+        if spans:
+            lines = "".join(json.dumps(asdict(span), default=str) + "\n" for span in spans)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._shutdown or len(self._queue) >= self.max_batch, self.flush_interval)
+                batch = self._take_batch()
+                done = self._shutdown
+            self._write(batch)
+            if done:
+                return
+
+    def shutdown(self) -> None:
+        """Write the queued spans and stop the worker thread."""
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify()
+            worker = self._worker
+        if worker is not None:
+            worker.join()
+        # spans queued while the worker was finishing its last batch
+        with self._condition:
+            batch = self._take_batch()
+        self._write(batch)
+
+
+def _payload_bytes(value: Any) -> int:
+    if isinstance(value, BaseMessage):
+        value = value.content
+    if isinstance(value, (list, tuple)):
+        return sum(_payload_bytes(item) for item in value)
+    return len(str(value).encode("utf-8"))
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Callback handler turning graph node, model and tool runs into spans.
+
+    Args:
+        exporter: optional exporter receiving every finished span
+        otel: also record the spans with the OpenTelemetry tracer (if installed)
+    """
+
+    # record on the event loop, in order, instead of in executor threads
+    run_inline = True
+
+    def __init__(self, exporter: JsonSpanExporter | None = None, otel: bool = False):
+        """Start a new trace - every span recorded by this handler belongs to it."""
+        self._exporter = exporter
+        self._tracer = otel_trace.get_tracer("deep_research") if (otel and otel_trace is not None) else None
+        self._lock = threading.Lock()
+        self._trace_id = secrets.token_hex(16)
+        self._open: dict[UUID, Span] = {}
+        self._otel_spans: dict[UUID, Any] = {}
+        # nearest traced ancestor of every run, to link spans across untraced runnables
+        self._span_of_run: dict[UUID, str | None] = {}
+        self.spans: list[Span] = []
+
+    def close(self) -> None:
+        """Write out the spans still queued in the exporter - call once the runs are done."""
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+    def _start(self, run_id: UUID, parent_run_id: UUID | None, name: str, kind: str, attributes: dict) -> None:
+        with self._lock:
+            parent_span_id = self._span_of_run.get(parent_run_id) if parent_run_id else None
+            span = Span(
+                name=name,
+                kind=kind,
+                trace_id=self._trace_id,
+                span_id=secrets.token_hex(8),
+                parent_span_id=parent_span_id,
+                start_time_unix_nano=time.time_ns(),
+                attributes=attributes,
+            )
+            self._open[run_id] = span
+            self._span_of_run[run_id] = span.span_id
+            if self._tracer is not None:
+                parent = self._otel_spans.get(parent_run_id) if parent_run_id else None
+                context = otel_trace.set_span_in_context(parent) if parent is not None else None
+                self._otel_spans[run_id] = self._tracer.start_span(
+                    name, context=context, start_time=span.start_time_unix_nano, attributes={"kind": kind}
+                )
+
+    def _pass_through(self, run_id: UUID, parent_run_id: UUID | None) -> None:
+        # untraced run: children attach to the nearest traced ancestor
+        with self._lock:
+            self._span_of_run[run_id] = self._span_of_run.get(parent_run_id) if parent_run_id else None
+            if parent_run_id in self._otel_spans:
+                self._otel_spans[run_id] = self._otel_spans[parent_run_id]
+
+    def _forget(self, run_id: UUID) -> None:
+        with self._lock:
+            self._span_of_run.pop(run_id, None)
+            self._otel_spans.pop(run_id, None)
+
+    def _end(self, run_id: UUID, attributes: dict | None = None, error: BaseException | None = None) -> None:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            self._span_of_run.pop(run_id, None)
+            otel_span = self._otel_spans.pop(run_id, None)
+            if span is None:
+                return
+            span.end_time_unix_nano = time.time_ns()
+            span.attributes.update(attributes or {})
+            # LangGraph hands off Command(goto=...) / interrupts as exceptions, those are not errors
+            if error is not None and type(error).__name__ not in ("ParentCommand", "GraphInterrupt", "GraphBubbleUp"):
+                span.status = "ERROR"
+                span.attributes["error"] = f"{type(error).__name__}: {error}"
+            self.spans.append(span)
+        if otel_span is not None:
+            otel_span.set_attributes({k: v for k, v in span.attributes.items() if isinstance(v, (str, int, float, bool))})
+            if span.status == "ERROR":
+                otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+            otel_span.end(end_time=span.end_time_unix_nano)
+        if self._exporter is not None:
+            self._exporter.export(span)
+
+    # ===== graph nodes =====
+
+    def on_chain_start(self, serialized: Any, inputs: Any, *, run_id: UUID, parent_run_id: UUID | None = None, metadata: dict | None = None, **kwargs: Any) -> None:
+        """Open a span when a graph node starts."""
+        name = kwargs.get("name")
+        # the node's own run (runnables nested inside a node are not traced)
+        if metadata and name and name == metadata.get("langgraph_node"):
+            self._start(run_id, parent_run_id, name, "node", {
+                "langgraph.node": name,
+                "langgraph.step": metadata.get("langgraph_step"),
+                "payload.input_bytes": _payload_bytes(inputs),
+            })
+        else:
+            self._pass_through(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Close the span of a finished graph node."""
+        if run_id in self._open:
+            self._end(run_id, {"payload.output_bytes": _payload_bytes(outputs)})
+        else:
+            self._forget(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Close the span of a failed graph node with its error."""
+        if run_id in self._open:
+            self._end(run_id, error=error)
+        else:
+            self._forget(run_id)
+
+    # ===== model calls =====
+
+    def on_chat_model_start(self, serialized: Any, messages: list[list[BaseMessage]], *, run_id: UUID, parent_run_id: UUID | None = None, metadata: dict | None = None, **kwargs: Any) -> None:
+        """Open a span when a model call starts."""
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, parent_run_id, f"model {model}", "model", {
+            "gen_ai.request.model": model,
+            "gen_ai.system": metadata.get("ls_provider"),
+            "langgraph.node": metadata.get("langgraph_node"),
+            "gen_ai.request.messages": sum(len(batch) for batch in messages),
+            "payload.input_bytes": sum(_payload_bytes(batch) for batch in messages),
+        })
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Close the span of a model call with its token usage and tool calls."""
+        attributes: dict[str, Any] = {}
+        generations = [generation for batch in response.generations for generation in batch]
+        messages = [generation.message for generation in generations if hasattr(generation, "message")]
+        usage = [message.usage_metadata for message in messages if getattr(message, "usage_metadata", None)]
+        if usage:
+            attributes["gen_ai.usage.input_tokens"] = sum(u.get("input_tokens", 0) for u in usage)
+            attributes["gen_ai.usage.output_tokens"] = sum(u.get("output_tokens", 0) for u in usage)
+        attributes["gen_ai.response.tool_calls"] = sum(len(getattr(message, "tool_calls", []) or []) for message in messages)
+        attributes["payload.output_bytes"] = sum(_payload_bytes(message) for message in messages)
+        self._end(run_id, attributes)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Close the span of a failed model call with its error."""
+        self._end(run_id, error=error)
+
+    # ===== tool calls =====
+
+    def on_tool_start(self, serialized: Any, input_str: str, *, run_id: UUID, parent_run_id: UUID | None = None, metadata: dict | None = None, **kwargs: Any) -> None:
+        """Open a span when a tool call starts."""
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, parent_run_id, f"tool {name}", "tool", {
+            "tool.name": name,
+            "langgraph.node": (metadata or {}).get("langgraph_node"),
+            "payload.input_bytes": _payload_bytes(input_str),
+        })
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Close the span of a tool call."""
+        self._end(run_id, {"payload.output_bytes": _payload_bytes(output)})
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Close the span of a failed tool call with its error."""
+        self._end(run_id, error=error)
+
+
+def summarize_spans(spans: list[Span]) -> dict[str, dict]:
+    """Aggregate spans per node: runs, latency, and the tokens and tool calls of its model/tool calls.
+
+    Model and tool spans are attributed to the node they ran in.
+    """
+    summary: dict[str, dict] = {}
+
+    def entry(node: str) -> dict:
+        return summary.setdefault(node, {
+            "runs": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            "model_calls": 0, "input_tokens": 0, "output_tokens": 0,
+            "tool_calls": 0, "tool_errors": 0,
+        })
+
+    for span in spans:
+        node = span.attributes.get("langgraph.node") or "unknown"
+        if span.kind == "node":
+            node_entry = entry(node)
+            node_entry["runs"] += 1
+            node_entry["total_seconds"] = round(node_entry["total_seconds"] + span.duration_seconds, 4)
+            node_entry["max_seconds"] = round(max(node_entry["max_seconds"], span.duration_seconds), 4)
+        elif span.kind == "model":
+            node_entry = entry(node)
+            node_entry["model_calls"] += 1
+            node_entry["input_tokens"] += span.attributes.get("gen_ai.usage.input_tokens", 0)
+            node_entry["output_tokens"] += span.attributes.get("gen_ai.usage.output_tokens", 0)
+        elif span.kind == "tool":
+            node_entry = entry(node)
+            node_entry["tool_calls"] += 1
+            node_entry["tool_errors"] += span.status == "ERROR"
+    return dict(sorted(summary.items()))
+
+
+def build_tracing_handler() -> TracingCallbackHandler | None:
+    """Build the tracing handler configured by TRACING_ENABLED / TRACE_EXPORT_PATH / TRACING_OTEL."""
+    if not config.get_tracing_enabled():
+        return None
+    return TracingCallbackHandler(
+        exporter=JsonSpanExporter(config.get_trace_export_path()),
+        otel=config.get_tracing_otel(),
+    )
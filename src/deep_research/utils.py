@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from pathlib import Path
 from datetime import datetime
 
@@ -18,4 +20,54 @@ def get_current_dir() -> Path:
 
 def get_today_str() -> str:
     """Get current date in a human-readable format."""
-    return datetime.now().strftime("%a %b %-d, %Y")
\ No newline at end of file
+    return datetime.now().strftime("%a %b %-d, %Y")
+
+
+class BlockingCallError(RuntimeError):
+    """Raised when a callback blocked the event loop for longer than allowed."""
+
+
+class _SlowCallbackCollector(logging.Filter):
+    """Collects asyncio debug-mode "Executing <Handle ...> took N seconds" warnings."""
+
+    def __init__(self):
+        super().__init__()
+        self.slow_callbacks: list[str] = []
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if message.startswith("Executing") and " took " in message:
+            self.slow_callbacks.append(message)
+        return True
+
+
+def install_blocking_call_guard(threshold: float) -> _SlowCallbackCollector:
+    """Detect blocking calls on the running event loop.
+
+    Puts the loop in debug mode so that any callback (i.e. any stretch of a node
+    between two awaits) running longer than `threshold` seconds is reported.
+    A synchronous model call such as `model.invoke(...)` inside an async node
+    blocks every other researcher and shows up here.
+
+    Args:
+        threshold: maximum seconds a single callback may hold the loop
+
+    Returns:
+        Collector to pass to check_blocking_calls once the run has finished
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_debug(True)
+    loop.slow_callback_duration = threshold
+    collector = _SlowCallbackCollector()
+    logging.getLogger("asyncio").addFilter(collector)
+    return collector
+
+
+def check_blocking_calls(collector: _SlowCallbackCollector) -> None:
+    """Fail if the guard saw any callback blocking the event loop."""
+    logging.getLogger("asyncio").removeFilter(collector)
+    if collector.slow_callbacks:
+        raise BlockingCallError(
+            f"{len(collector.slow_callbacks)} blocking call(s) ran on the event loop:\n"
+            + "\n".join(collector.slow_callbacks)
+        )
@@ -1,57 +1,226 @@
-from langgraph.graph import StateGraph, START, END
-from state_agent import AgentState, AgentInputState
-from scope_agent import clarify_with_user, write_research_brief
-from langgraph.checkpoint.memory import InMemorySaver
-from langchain_core.messages import HumanMessage
-from dotenv import load_dotenv
-from research_supervisor_agent import supervisor_agent
-from final_report_generation import final_report_generation
+import argparse
 import asyncio
-
-# Load environment variables from .env file
-load_dotenv()
-
-
-checkpointer = InMemorySaver()
-
-
-deep_reasearch_builder = StateGraph(AgentState, input_schema= AgentInputState)
-
-# Add workflow nodes
-deep_reasearch_builder.add_node("clarify_with_user", clarify_with_user)
-deep_reasearch_builder.add_node("write_research_brief", write_research_brief)
-deep_reasearch_builder.add_node("supervisor_subgraph", supervisor_agent)
-deep_reasearch_builder.add_node("final_report_generation", final_report_generation)
-# Add edges 
-deep_reasearch_builder.add_edge(START, "clarify_with_user")
-# deep_reasearch_workflow.add_edge("clarify_with_user", "write_research_brief") - It makes clarify_with_user always go to write_research_brief and does not end even if we provide command goto END
-deep_reasearch_builder.add_edge("write_research_brief", "supervisor_subgraph")
-deep_reasearch_builder.add_edge("supervisor_subgraph", "final_report_generation")
-deep_reasearch_builder.add_edge("final_report_generation", END)
-
-'''
-reason for above commented line 
-
-Explicit edges act as “default paths”.
-
-If an edge exists from a node to another, LangGraph ignores your Command(goto=...) for that node — it always follows the edge.
-
-To respect dynamic goto commands (like stopping at END), do not create edges that override them.
-
-'''
-
-# Compile the workflow
-deep_research_agent = deep_reasearch_builder.compile()
+import uuid
+from typing import AsyncIterator
+
+from config import config
+
+# Environment variables from the .env file are loaded once, by config
+
+# Importing this module is cheap: LangGraph, the agents and their model clients are
+# only imported when the graph is first built (build_deep_research_agent, or the
+# first access to deep_research_agent). The command line parses its arguments -
+# and answers --help - before any of that is loaded.
+
+# Valid values of SCOPE_MODE
+SCOPE_MODES = ("sequential", "speculative", "merged")
+
+
+def build_deep_research_agent(checkpointer=None):
+    """Compile the workflow with the given checkpointer, scoping requests as set by SCOPE_MODE.
+
+    The supervisor and researcher subgraphs have no checkpointer of their own, they
+    checkpoint through this one - so a resumed run continues from the last completed
+    node (and the last completed researcher) instead of from scratch.
+    """
+    from langgraph.graph import END, START, StateGraph
+
+    from final_report_generation import final_report_generation
+    from research_supervisor_agent import supervisor_agent
+    from scope_agent import (
+        clarify_with_user,
+        merged_scope,
+        speculative_scope,
+        write_research_brief,
+    )
+    from state_agent import AgentInputState, AgentState
+
+    scope_mode = config.get_scope_mode()
+    if scope_mode not in SCOPE_MODES:
+        raise ValueError(f"Unknown SCOPE_MODE: {scope_mode!r} (expected one of {', '.join(SCOPE_MODES)})")
+
+    deep_reasearch_builder = StateGraph(AgentState, input_schema= AgentInputState)
+
+    # Add workflow nodes
+    if scope_mode == "speculative":
+        # one node clarifies while the brief and the first supervisor plan are drafted
+        deep_reasearch_builder.add_node("speculative_scope", speculative_scope)
+        deep_reasearch_builder.add_edge(START, "speculative_scope")
+    elif scope_mode == "merged":
+        # one structured call decides on clarification and writes the brief
+        deep_reasearch_builder.add_node("merged_scope", merged_scope)
+        deep_reasearch_builder.add_edge(START, "merged_scope")
+    else:
+        deep_reasearch_builder.add_node("clarify_with_user", clarify_with_user)
+        deep_reasearch_builder.add_node("write_research_brief", write_research_brief)
+        deep_reasearch_builder.add_edge(START, "clarify_with_user")
+        # deep_reasearch_workflow.add_edge("clarify_with_user", "write_research_brief") - It makes clarify_with_user always go to write_research_brief and does not end even if we provide command goto END
+        deep_reasearch_builder.add_edge("write_research_brief", "supervisor_subgraph")
+    deep_reasearch_builder.add_node("supervisor_subgraph", supervisor_agent)
+    deep_reasearch_builder.add_node("final_report_generation", final_report_generation)
+    # Add edges 
+    deep_reasearch_builder.add_edge("supervisor_subgraph", "final_report_generation")
+    deep_reasearch_builder.add_edge("final_report_generation", END)
+
+    '''
+    reason for above commented line 
+
+    Explicit edges act as “default paths”.
+
+    If an edge exists from a node to another, LangGraph ignores your Command(goto=...) for that node — it always follows the edge.
+
+    To respect dynamic goto commands (like stopping at END), do not create edges that override them.
+
+    '''
+
+    # Compile the workflow
+    return deep_reasearch_builder.compile(checkpointer=checkpointer)
+
+
+def __getattr__(name):
+    # deep_research_agent - without checkpointer, e.g. for `langgraph dev` which provides
+    # its own persistence - is compiled on first access rather than at import
+    if name == "deep_research_agent":
+        agent = build_deep_research_agent()
+        globals()["deep_research_agent"] = agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def stream_research(agent, graph_input, thread) -> AsyncIterator[dict]:
+    """Run the agent and stream structured events as the run progresses.
+
+    Yields:
+        progress events emitted by the nodes ({"event": "brief_written", ...},
+        researcher_started / researcher_finished, supervisor_iteration, ...), then
+        {"event": "report_token", "content": ...} for every token of the final
+        report as it is generated
+    """
+    from final_report_generation import FINAL_REPORT_TAG
+
+    async for _namespace, mode, chunk in agent.astream(
+        graph_input,
+        config=thread,
+        stream_mode=["custom", "messages"],
+        subgraphs=True,
+    ):
+        if mode == "custom":
+            yield chunk
+        else:
+            message, metadata = chunk
+            if FINAL_REPORT_TAG in metadata.get("tags", []) and message.content:
+                yield {"event": "report_token", "content": message.content}
+
+
+def print_event(event: dict) -> None:
+    """Print a streamed event for the command line."""
+    name = event["event"]
+    if name == "report_token":
+        print(event["content"], end="", flush=True)
+    elif name == "brief_written":
+        print(f"[brief] {event['research_brief']}", flush=True)
+    elif name == "supervisor_iteration":
+        print(f"[supervisor] iteration {event['iteration']}/{event['max_iterations']}", flush=True)
+    elif name == "researcher_started":
+        print(f"[researcher] started: {event['research_question']}", flush=True)
+    elif name == "researcher_finished":
+        print(f"[researcher] finished after {event['iterations']} iterations: {event['research_question']}", flush=True)
+    elif name == "researcher_failed":
+        print(f"[researcher] failed ({event['error']}): {event['research_question']}", flush=True)
+    elif name == "research_deduplicated":
+        print(f"[supervisor] reusing earlier findings for {event['saved']} overlapping questions", flush=True)
+    elif name == "research_recalled":
+        print(f"[supervisor] answered from earlier findings: {event['research_question']}", flush=True)
+    elif name == "research_complete":
+        saved = event.get("saved_researcher_runs", 0)
+        print(f"[supervisor] research complete after {event['iterations']} iterations ({saved} researcher runs saved)", flush=True)
+        if event.get("budget"):
+            print(f"[supervisor] stopped early: run {event['budget']}", flush=True)
+    elif name == "researcher_stopped":
+        print(f"[researcher] stopped ({event['reason']}): {event['research_question']}", flush=True)
+    elif name == "report_started":
+        print(f"[report] writing ({event['mode']})\n", flush=True)
+
+
+default_query = "I want to research the best coffee shops in San Francisco based on Specialty pour over methods."
 
 
 async def main():
 
-    thread = {"configurable": {"thread_id": "1"}}
-    result = await deep_research_agent.ainvoke({"messages": [HumanMessage(content="I want to research the best coffee shops in San Francisco based on Specialty pour over methods.")]}, config=thread)
-    print(result)
+    parser = argparse.ArgumentParser(description="Run the deep research agent")
+    parser.add_argument("query", nargs="?", default=default_query, help="research request, or the answer to a clarification question")
+    parser.add_argument("--thread-id", help="conversation/run id, checkpoints are stored per thread (default: a new thread)")
+    parser.add_argument("--resume", action="store_true", help="resume an interrupted run of the thread from its last checkpoint")
+    parser.add_argument("--no-stream", action="store_true", help="print the final state at the end instead of streaming progress and the report")
+    args = parser.parse_args()
+    if args.resume and not args.thread_id:
+        parser.error("--resume needs the --thread-id of the run to resume")
+    # a new request starts a new thread, so it doesn't inherit the messages and notes of an earlier run
+    thread_id = args.thread_id or uuid.uuid4().hex
+
+    from langchain_core.messages import HumanMessage
+
+    from blob_store import load_notes
+    from checkpointing import open_checkpointer
+    from mcp_pool import close_mcp_pool
+    from tracing import build_tracing_handler, summarize_spans
+    from utils import check_blocking_calls, install_blocking_call_guard
+
+    thread = {"configurable": {"thread_id": thread_id}}
+    if not args.thread_id:
+        print(f"[thread] {thread_id} (continue or resume it with --thread-id {thread_id})", flush=True)
+
+    # Optional tracing of every node, model call and tool call (TRACING_ENABLED)
+    tracing_handler = build_tracing_handler()
+    if tracing_handler is not None:
+        thread["callbacks"] = [tracing_handler]
+
+    # Optional guard that fails the run if a node blocks the event loop
+    # (which would serialize the parallel researchers)
+    guard = None
+    if config.ASYNC_BLOCKING_GUARD_SECONDS > 0:
+        guard = install_blocking_call_guard(config.ASYNC_BLOCKING_GUARD_SECONDS)
+
+    try:
+        async with open_checkpointer() as checkpointer:
+            agent = build_deep_research_agent(checkpointer)
+            if args.resume:
+                snapshot = await agent.aget_state(thread)
+                if not snapshot.next:
+                    print(f"Nothing to resume for thread {thread_id}")
+                    return
+                # None as input continues from the last checkpoint
+                graph_input = None
+            else:
+                graph_input = {"messages": [HumanMessage(content=args.query)]}
+
+            if args.no_stream:
+                values = await agent.ainvoke(graph_input, config=thread)
+                # the state only holds blob store references for large raw notes
+                values["raw_notes"] = await load_notes(values.get("raw_notes", []))
+                print(values)
+            else:
+                report_streamed = False
+                async for event in stream_research(agent, graph_input, thread):
+                    report_streamed = report_streamed or event["event"] == "report_token"
+                    print_event(event)
+                if not report_streamed:
+                    # the run ended with a clarification question instead of a report
+                    snapshot = await agent.aget_state(thread)
+                    print(snapshot.values["messages"][-1].content)
+    finally:
+        # shut down the pooled MCP sessions (and their server subprocesses)
+        await close_mcp_pool()
+        if tracing_handler is not None:
+            # the last spans are written by the exporter's thread
+            await asyncio.to_thread(tracing_handler.close)
+            print(f"\n[trace] {len(tracing_handler.spans)} spans written to {config.get_trace_export_path()}")
+            for node, node_summary in summarize_spans(tracing_handler.spans).items():
+                print(f"[trace] {node}: {node_summary}")
+
+    if guard is not None:
+        check_blocking_calls(guard)
 
 
 if __name__ == "__main__":
     asyncio.run(main())
-    
-
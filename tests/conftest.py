@@ -0,0 +1,122 @@
+"""Shared fixtures: the agent modules on sys.path, and every run isolated in a temporary data directory."""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The agent is a flat module directory (the modules import each other by name)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "deep_research"))
+# Models are faked - the OpenAI client still wants a key to be constructed
+os.environ.setdefault("OPENAI_API_KEY", "test")
+# Keep caches, checkpoints and memos of the test runs out of the package directory
+os.environ.setdefault("DEEP_RESEARCH_DATA_DIR", tempfile.mkdtemp(prefix="deep_research_tests_"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_run_state(tmp_path, monkeypatch):
+    """Fresh stores and process-wide limiters for every test (each test runs its own event loop)."""
+    import blob_store
+    import checkpointing
+    import model_calls
+    import research_memo
+    import research_scheduler
+    import tool_executor
+    from config import Config
+
+    monkeypatch.setattr(Config, "CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setattr(Config, "RESEARCH_MEMO_PATH", str(tmp_path / "research_memo.sqlite"))
+    monkeypatch.setattr(Config, "BLOB_STORE_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setattr(Config, "TRACE_EXPORT_PATH", str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(Config, "LLM_CACHE_BACKEND", "none")
+    monkeypatch.setattr(blob_store, "_blob_store", None)
+    monkeypatch.setattr(checkpointing, "_result_store", None)
+    monkeypatch.setattr(research_memo, "_memo", None)
+    monkeypatch.setattr(research_scheduler, "_scheduler", None)
+    monkeypatch.setattr(model_calls, "_llm_slots", None)
+    monkeypatch.setattr(model_calls, "_model_limiters", {})
+    monkeypatch.setattr(tool_executor, "_global_semaphore", None)
+    monkeypatch.setattr(tool_executor, "_tool_semaphores", {})
+
+
+@pytest.fixture
+def fake_model():
+    """One fast ScriptedChatModel standing in for every agent's model."""
+    from fake_llm import ScriptedChatModel
+    from models import set_model_override
+
+    model = ScriptedChatModel(latency_seconds=0.01, output_tokens=50, research_topics=3)
+    set_model_override(model)
+    yield model
+    set_model_override(None)
+
+
+@pytest.fixture
+def research_files(tmp_path, monkeypatch) -> Path:
+    """A small generated corpus as the research files directory."""
+    from benchmark import write_corpus
+    from config import Config
+
+    directory = tmp_path / "files"
+    directory.mkdir()
+    write_corpus(directory, documents=3, paragraphs=4)
+    monkeypatch.setattr(Config, "RESEARCH_FILES_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture
+def fake_mcp_pool(research_files):
+    """Point the researchers' MCP pool at fake_mcp_server.py over the research files.
+
+    The pool opens its sessions on first use, in the test's event loop - the test
+    closes it (close_mcp_pool) before its loop ends.
+    """
+    from benchmark import FAKE_MCP_SERVER
+    from mcp_pool import MCPSessionPool, set_mcp_pool
+
+    set_mcp_pool(MCPSessionPool(
+        {"filesystem": {"command": sys.executable, "args": [FAKE_MCP_SERVER, str(research_files), "0"], "transport": "stdio"}},
+        size=2,
+    ))
+    yield
+    set_mcp_pool(None)
+
+
+class FakeResearcher:
+    """Stands in for researcher_agent: findings naming their question, and failures on demand.
+
+    Args:
+        fail: research questions (or parts of them) whose researcher raises `error`
+        error: exception type raised for those questions
+    """
+
+    def __init__(self, fail: tuple[str, ...] = (), error: type[BaseException] = RuntimeError):
+        self.fail = fail
+        self.error = error
+        self.calls: list[str] = []
+
+    async def ainvoke(self, state: dict, config=None) -> dict:
+        question = state["research_question"]
+        self.calls.append(question)
+        if any(part in question for part in self.fail):
+            # fail once the other researchers of the step have finished
+            await asyncio.sleep(0.05)
+            raise self.error(f"researcher on {question!r} failed")
+        return {
+            "compressed_research": f"findings on {question}",
+            "raw_notes": [f"raw notes on {question}"],
+            "researcher_iterations": 1,
+        }
+
+
+@pytest.fixture
+def fake_researcher(monkeypatch):
+    """Replace the supervisor's researcher subgraph with a FakeResearcher (set its `fail` in the test)."""
+    import research_supervisor_agent
+
+    researcher = FakeResearcher()
+    monkeypatch.setattr(research_supervisor_agent, "researcher_agent", researcher)
+    return researcher
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from fake_llm import RESEARCH_TOPICS
+
+
+def write_briefs(path):
+    path.write_text(json.dumps({"id": "topics", "query": "Research the benchmark topics."}) + "\n")
+    return path
+
+
+def thread_notes(thread_id: str) -> list[str]:
+    from checkpointing import open_checkpointer
+    from workflow import build_deep_research_agent
+
+    async def read():
+        async with open_checkpointer() as checkpointer:
+            agent = build_deep_research_agent(checkpointer)
+            return (await agent.aget_state({"configurable": {"thread_id": thread_id}})).values["notes"]
+
+    return asyncio.run(read())
+
+
+def test_a_later_batch_reusing_brief_ids_starts_new_threads(fake_model, fake_researcher, tmp_path, monkeypatch):
+    from batch import read_briefs, run_batch
+    from config import Config
+
+    monkeypatch.setattr(Config, "RESEARCH_MEMO_ENABLED", False)
+    briefs = read_briefs(write_briefs(tmp_path / "briefs.jsonl"))
+
+    results = []
+    for night in ("monday", "tuesday"):
+        output = tmp_path / f"{night}.jsonl"
+        asyncio.run(run_batch(briefs, output, concurrency=1))
+        [result] = [json.loads(line) for line in output.read_text().splitlines()]
+        results.append(result)
+
+    assert [result["status"] for result in results] == ["completed", "completed"]
+    assert results[0]["thread_id"] != results[1]["thread_id"]
+    # the second night's brief researched once, with none of the first night's findings
+    topics = RESEARCH_TOPICS[:fake_model.research_topics]
+    assert sorted(thread_notes(results[1]["thread_id"])) == sorted(f"findings on {topic}" for topic in topics)
+
+
+def test_resume_does_not_rerun_a_brief_that_finished_unrecorded(fake_model, fake_researcher, tmp_path):
+    from batch import read_briefs, run_batch
+
+    briefs = read_briefs(write_briefs(tmp_path / "briefs.jsonl"))
+    output = tmp_path / "results.jsonl"
+    asyncio.run(run_batch(briefs, output, concurrency=1, run_id="crashed"))
+    researched = len(fake_researcher.calls)
+    # the result line was lost (e.g. the process died before writing it)
+    output.unlink()
+
+    counts = asyncio.run(run_batch(briefs, output, concurrency=1, run_id="crashed"))
+
+    assert counts == {"skipped": 0, "completed": 1}
+    assert len(fake_researcher.calls) == researched
+    [result] = [json.loads(line) for line in output.read_text().splitlines()]
+    assert result["report"]
@@ -0,0 +1,41 @@
+import asyncio
+
+from langchain_core.messages import HumanMessage
+
+from blob_store import is_blob_reference, resolve_notes, store_note
+from config import Config
+
+
+def test_large_notes_are_stored_once_and_resolved(monkeypatch):
+    monkeypatch.setattr(Config, "RAW_NOTES_SPILL_BYTES", 16)
+    note = "a researcher transcript " * 10
+
+    reference = store_note(note)
+    assert is_blob_reference(reference)
+    assert store_note(note) == reference
+    assert store_note("short") == "short"
+    assert resolve_notes([reference, "short"]) == [note, "short"]
+
+
+def test_researcher_returns_references_not_its_transcript(fake_model, fake_mcp_pool, monkeypatch):
+    from mcp_pool import close_mcp_pool
+    from research_agent import researcher_agent
+
+    monkeypatch.setattr(Config, "RAW_NOTES_SPILL_BYTES", 64)
+
+    async def run():
+        try:
+            return await researcher_agent.ainvoke(
+                {"researcher_messages": [HumanMessage(content="pricing and cost comparison across vendors")]}
+            )
+        finally:
+            await close_mcp_pool()
+
+    result = asyncio.run(run())
+
+    assert set(result) == {"compressed_research", "raw_notes", "researcher_iterations"}
+    assert result["researcher_iterations"] >= 2
+    [reference] = result["raw_notes"]
+    assert is_blob_reference(reference)
+    # the transcript: tool results (the search and the document read) and model turns
+    assert "doc_0.md" in resolve_notes([reference])[0]
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from utils import BlockingCallError, check_blocking_calls, install_blocking_call_guard
+
+
+def block_for(seconds: float) -> None:
+    # a synchronous call holding the event loop, as model.invoke would
+    time.sleep(seconds)
+
+
+def test_guard_reports_a_blocking_call():
+    async def run():
+        guard = install_blocking_call_guard(0.05)
+        await asyncio.sleep(0)
+        block_for(0.2)
+        await asyncio.sleep(0)
+        return guard
+
+    guard = asyncio.run(run())
+    with pytest.raises(BlockingCallError, match="1 blocking call"):
+        check_blocking_calls(guard)
+
+
+def test_guard_accepts_awaited_waits():
+    async def run():
+        guard = install_blocking_call_guard(0.05)
+        await asyncio.sleep(0.2)
+        await asyncio.to_thread(block_for, 0.2)
+        return guard
+
+    check_blocking_calls(asyncio.run(run()))
+
+
+def test_researcher_does_not_block_the_event_loop(fake_model, fake_mcp_pool):
+    from mcp_pool import close_mcp_pool
+    from research_agent import researcher_agent
+
+    async def run():
+        guard = install_blocking_call_guard(0.25)
+        try:
+            result = await researcher_agent.ainvoke(
+                {"researcher_messages": [HumanMessage(content="pricing and cost comparison across vendors")]}
+            )
+        finally:
+            await close_mcp_pool()
+        return guard, result
+
+    guard, result = asyncio.run(run())
+    check_blocking_calls(guard)
+    assert result["compressed_research"]
+    assert fake_model.stats.calls >= 3
@@ -0,0 +1,19 @@
+from config import Config
+
+
+def test_the_index_follows_the_research_files_directory(tmp_path, monkeypatch):
+    from document_index import get_document_index
+
+    for name in ("first", "second"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}.md").write_text(f"# Notes\n\nOnly the {name} corpus mentions lanthanum.\n")
+
+    for name in ("first", "second"):
+        monkeypatch.setattr(Config, "RESEARCH_FILES_DIR", str(tmp_path / name))
+        index = get_document_index()
+        index.refresh()
+        assert [result.path for result in index.search("lanthanum")] == [f"{name}.md"]
+
+    # the same directory spelled differently keeps its index
+    monkeypatch.setattr(Config, "RESEARCH_FILES_DIR", str(tmp_path / "first" / ".." / "second"))
+    assert get_document_index() is index
@@ -0,0 +1,18 @@
+import asyncio
+
+import pytest
+
+import fake_mcp_server
+
+
+def test_serves_the_configured_directory(research_files, monkeypatch):
+    # importing the module under pytest's own command line serves the working directory
+    assert fake_mcp_server.root.is_dir()
+    monkeypatch.setattr(fake_mcp_server, "root", fake_mcp_server.root)
+    monkeypatch.setattr(fake_mcp_server, "latency", fake_mcp_server.latency)
+    fake_mcp_server.configure(str(research_files))
+
+    assert fake_mcp_server.root == research_files.resolve()
+    assert asyncio.run(fake_mcp_server.read_file("doc_0.md")).startswith("# ")
+    with pytest.raises(ValueError, match="outside allowed directories"):
+        asyncio.run(fake_mcp_server.read_file("../outside.md"))
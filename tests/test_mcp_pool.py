@@ -0,0 +1,97 @@
+import asyncio
+import sys
+
+import pytest
+
+from mcp_pool import MCPSessionPool
+
+
+def make_pool(research_files, **kwargs) -> MCPSessionPool:
+    from benchmark import FAKE_MCP_SERVER
+
+    return MCPSessionPool(
+        {"filesystem": {"command": sys.executable, "args": [FAKE_MCP_SERVER, str(research_files), "0"], "transport": "stdio"}},
+        **kwargs,
+    )
+
+
+def test_a_broken_session_is_reopened(research_files):
+    async def run():
+        pool = make_pool(research_files, size=1)
+        try:
+            with pytest.raises(ConnectionError):
+                async with pool.session() as broken:
+                    raise ConnectionError("server went away")
+            assert broken.broken
+
+            listing = await pool.call_tool("list_directory", {"path": "."})
+            async with pool.session() as slot:
+                assert slot is not broken
+            return listing, broken
+        finally:
+            await pool.close()
+
+    listing, broken = asyncio.run(run())
+
+    assert "doc_0.md" in str(listing)
+    assert broken.sessions == {}
+
+
+def test_a_session_failing_its_health_check_is_replaced(research_files):
+    async def run():
+        pool = make_pool(research_files, size=1, health_check_interval=0)
+        try:
+            async with pool.session() as unhealthy:
+                pass
+
+            async def failing_ping():
+                return False
+
+            unhealthy.ping = failing_ping
+            async with pool.session() as slot:
+                assert slot is not unhealthy
+                assert await slot.ping()
+            return unhealthy
+        finally:
+            await pool.close()
+
+    unhealthy = asyncio.run(run())
+
+    assert unhealthy.broken
+
+
+def test_health_checks_do_not_hold_up_other_callers(research_files):
+    async def run():
+        pool = make_pool(research_files, size=2, health_check_interval=0)
+        try:
+            async with pool.session() as slow_to_answer:
+                pass
+
+            ping_started, answer_ping = asyncio.Event(), asyncio.Event()
+
+            async def slow_ping():
+                ping_started.set()
+                await answer_ping.wait()
+                return True
+
+            slow_to_answer.ping = slow_ping
+
+            async def first_caller():
+                async with pool.session() as slot:
+                    return slot
+
+            checked = asyncio.create_task(first_caller())
+            await ping_started.wait()
+            # while the idle session is being pinged, another caller opens a session of its own
+            async with asyncio.timeout(30), pool.session() as other:
+                assert other is not slow_to_answer
+            assert not checked.done()
+
+            answer_ping.set()
+            return await checked, slow_to_answer
+        finally:
+            await pool.close()
+
+    checked, slow_to_answer = asyncio.run(run())
+
+    assert checked is slow_to_answer
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables import RunnableLambda
+
+from config import Config
+from model_calls import call_model
+
+
+async def slow_model(model_input):
+    await asyncio.sleep(5)
+    return AIMessage(content="slow")
+
+
+async def fast_model(model_input):
+    return AIMessage(content="fast")
+
+
+async def fairly_slow_model(model_input):
+    await asyncio.sleep(0.2)
+    return AIMessage(content="fairly slow")
+
+
+class StallingChatModel(BaseChatModel):
+    """Streams the start of its answer, then hangs."""
+
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stalling"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        for token in ("The ", "report"):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        await asyncio.sleep(5)
+
+
+class TokenCollector(BaseCallbackHandler):
+    def __init__(self):
+        self.tokens = []
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens.append(token)
+
+
+def test_timed_out_call_falls_back(monkeypatch, caplog):
+    monkeypatch.setattr(Config, "MODEL_TIMEOUT_SECONDS", 0.05)
+
+    with caplog.at_level(logging.WARNING, logger="model_calls"):
+        response = asyncio.run(call_model(RunnableLambda(slow_model), "question", fallback=RunnableLambda(fast_model)))
+
+    assert response.content == "fast"
+    assert "falling back" in caplog.text
+
+
+def test_timeouts_are_set_per_role(monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(Config, "MODEL_TIMEOUTS", "final_report=0,research=1")
+
+    # the report role is exempt, and research has a longer timeout of its own
+    for role in ("final_report", "research"):
+        response = asyncio.run(call_model(
+            RunnableLambda(fairly_slow_model), "question", fallback=RunnableLambda(fast_model), role=role
+        ))
+        assert response.content == "fairly slow"
+
+    response = asyncio.run(call_model(
+        RunnableLambda(fairly_slow_model), "question", fallback=RunnableLambda(fast_model), role="supervisor"
+    ))
+    assert response.content == "fast"
+
+
+@pytest.mark.parametrize("with_fallback", [False, True])
+def test_a_call_that_has_streamed_is_not_run_again(monkeypatch, with_fallback):
+    monkeypatch.setattr(Config, "MODEL_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(Config, "MODEL_TIMEOUTS", "")
+    monkeypatch.setattr(Config, "MODEL_RETRY_BASE_SECONDS", 0)
+    model, collector = StallingChatModel(), TokenCollector()
+    fallback = RunnableLambda(fast_model) if with_fallback else None
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(call_model(
+            model.bind(stream=True), "question", run_config={"callbacks": [collector]}, fallback=fallback,
+        ))
+
+    assert model.calls == 1
+    assert collector.tokens == ["The ", "report"]
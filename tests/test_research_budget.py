@@ -0,0 +1,42 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from fake_llm import RESEARCH_TOPICS, ScriptedChatModel
+
+
+class ThinkingOnlyModel(ScriptedChatModel):
+    """A researcher model that never stops reflecting and never searches."""
+
+    def _respond(self, messages):
+        if "think_tool" in self.bound_tool_names:
+            return AIMessage(content="", tool_calls=[
+                self._tool_call("think_tool", {"reflection": "Let me think about it some more."}, len(messages))
+            ])
+        return super()._respond(messages)
+
+
+def test_think_tool_loop_stops_at_the_iteration_budget(fake_mcp_pool, monkeypatch):
+    from config import Config
+    from mcp_pool import close_mcp_pool
+    from models import set_model_override
+    from research_agent import researcher_agent
+
+    monkeypatch.setattr(Config, "RESEARCHER_MAX_ITERATIONS", 3)
+
+    async def run():
+        try:
+            return await researcher_agent.ainvoke(
+                {"researcher_messages": [HumanMessage(content=RESEARCH_TOPICS[0])]}
+            )
+        finally:
+            await close_mcp_pool()
+
+    set_model_override(ThinkingOnlyModel(latency_seconds=0, output_tokens=20))
+    try:
+        result = asyncio.run(run())
+    finally:
+        set_model_override(None)
+
+    assert result["researcher_iterations"] == 3
+    assert result["compressed_research"]
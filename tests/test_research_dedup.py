@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import fake_llm
+from research_dedup import ResearchTask, plan_research
+
+THRESHOLD = 0.9
+
+
+def conduct_research(*questions: str) -> list[dict]:
+    return [
+        {"name": "ConductResearch", "args": {"research_question": question}, "id": f"call_{i}", "type": "tool_call"}
+        for i, question in enumerate(questions)
+    ]
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Market share of EVs in Germany in 2022", "Market share of EVs in Germany in 2023"),
+    ("Revenue of Apple in 2021", "Revenue of Apple in 2023"),
+    ("Housing prices in the Mission district of San Francisco", "Housing prices in the Sunset district of San Francisco"),
+])
+def test_questions_with_different_numbers_or_names_are_not_merged(first, second):
+    # siblings in one fan-out
+    plan = plan_research(conduct_research(first, second), [], THRESHOLD)
+    assert plan.duplicates == {}
+    assert [question for _, question in plan.to_run] == [first, second]
+
+    # a question against an earlier task - even with deduplication at its loosest
+    plan = plan_research(conduct_research(second), [ResearchTask.of(first, "call_earlier")], 0.5)
+    assert plan.duplicates == {}
+
+
+def test_rewordings_are_merged_into_the_most_detailed_one():
+    calls = conduct_research(
+        "Research the environmental impact of lithium mining",
+        "What are the environmental impacts of lithium mining?",
+    )
+
+    plan = plan_research(calls, [], THRESHOLD)
+
+    assert [tool_call["id"] for tool_call, _ in plan.to_run] == ["call_1"]
+    assert plan.duplicates["call_0"].tool_call_id == "call_1"
+
+
+def test_duplicates_of_a_failed_lead_are_researched(fake_model, fake_researcher, monkeypatch):
+    from research_supervisor_agent import supervisor_agent
+
+    duplicate, lead = "history and origins of the benchmark subject", "the history and origins of the benchmark subjects"
+    monkeypatch.setattr(fake_llm, "RESEARCH_TOPICS", [duplicate, lead, "pricing and cost comparison across vendors"])
+    fake_researcher.fail = (lead,)
+
+    brief = "Research the benchmark topics."
+    state = asyncio.run(supervisor_agent.ainvoke(
+        {"research_brief": brief, "supervisor_messages": [HumanMessage(content=brief)]},
+        config={"configurable": {"thread_id": "dedup-failed-lead"}},
+    ))
+
+    # the lead ran first, and its duplicate once it had failed
+    assert fake_researcher.calls.index(lead) < fake_researcher.calls.index(duplicate)
+    questions = {
+        tool_call["id"]: tool_call["args"]["research_question"]
+        for message in state["supervisor_messages"] if isinstance(message, AIMessage)
+        for tool_call in message.tool_calls if tool_call["name"] == "ConductResearch"
+    }
+    answers = {
+        questions[message.tool_call_id]: message
+        for message in state["supervisor_messages"]
+        if isinstance(message, ToolMessage) and message.tool_call_id in questions
+    }
+    assert answers[lead].status == "error"
+    assert answers[duplicate].content == f"findings on {duplicate}"
+    assert f"findings on {duplicate}" in state["notes"]
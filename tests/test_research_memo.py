@@ -0,0 +1,46 @@
+import asyncio
+
+from config import Config
+
+
+def remember(question: str) -> None:
+    import research_memo
+
+    async def run():
+        fingerprint, _ = await research_memo.recall_findings([question])
+        await research_memo.remember_findings(question, fingerprint, {"compressed_research": "findings", "raw_notes": []})
+
+    asyncio.run(run())
+
+
+def recall(question: str):
+    import research_memo
+
+    research_memo._memo = None  # reopen with the current models
+    return asyncio.run(research_memo.recall_findings([question]))[1][0]
+
+
+def test_memo_entries_depend_on_every_findings_model(research_files, monkeypatch):
+    question = "pricing and cost comparison across vendors"
+    remember(question)
+    assert recall(question).compressed_research == "findings"
+
+    for setting in ("RESEARCH_AGENT_MODEL", "REFLECTION_MODEL", "COMPRESSION_MODEL"):
+        with monkeypatch.context() as patched:
+            patched.setattr(Config, setting, "openai:another-model")
+            assert recall(question) is None, setting
+    assert recall(question) is not None
+
+
+def test_memo_keys_keep_the_word_order(research_files):
+    from research_memo import memo_key
+
+    question = "Impact of tariffs on China"
+    key = memo_key(question, "model", "fingerprint")
+
+    assert memo_key("impacts of the tariffs on China?", "model", "fingerprint") == key
+    assert memo_key("Impact of China on tariffs", "model", "fingerprint") != key
+
+    remember(question)
+    assert recall("Impact of China on tariffs") is None
+    assert recall("The impact of tariffs on China").compressed_research == "findings"
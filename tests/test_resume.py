@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from fake_llm import RESEARCH_TOPICS
+
+
+class SimulatedCrash(BaseException):
+    """A process dying mid-run: not an Exception, so nothing in the graph handles it."""
+
+
+def research_answers(messages: list) -> dict[str, str]:
+    """ConductResearch answers by research question."""
+    questions = {
+        tool_call["id"]: tool_call["args"]["research_question"]
+        for message in messages if isinstance(message, AIMessage)
+        for tool_call in message.tool_calls if tool_call["name"] == "ConductResearch"
+    }
+    return {
+        questions[message.tool_call_id]: message.content
+        for message in messages
+        if isinstance(message, ToolMessage) and message.tool_call_id in questions
+    }
+
+
+def test_resume_only_reruns_unfinished_researchers(fake_model, fake_researcher, monkeypatch):
+    from checkpointing import get_research_result_store, open_checkpointer
+    from config import Config
+    from workflow import build_deep_research_agent
+
+    # nothing may come back from the memo - only from the crashed run
+    monkeypatch.setattr(Config, "RESEARCH_MEMO_ENABLED", False)
+    crashing, *finished = RESEARCH_TOPICS[:3]
+    fake_researcher.fail = (crashing,)
+    fake_researcher.error = SimulatedCrash
+    thread = {"configurable": {"thread_id": "crash-then-resume"}}
+
+    async def run(graph_input):
+        async with open_checkpointer() as checkpointer:
+            agent = build_deep_research_agent(checkpointer)
+            await agent.ainvoke(graph_input, config=thread)
+            return (await agent.aget_state(thread)).values
+
+    with pytest.raises(SimulatedCrash):
+        asyncio.run(run({"messages": [HumanMessage(content="Research the benchmark topics.")]}))
+    assert sorted(fake_researcher.calls) == sorted(RESEARCH_TOPICS[:3])
+
+    # a new process resumes the thread from its last checkpoint
+    fake_researcher.fail = ()
+    state = asyncio.run(run(None))
+
+    assert sorted(fake_researcher.calls) == sorted(RESEARCH_TOPICS[:3] + [crashing])
+    # every finding is the one of its own question
+    answers = research_answers(state["supervisor_messages"])
+    assert answers == {question: f"findings on {question}" for question in RESEARCH_TOPICS[:3]}
+    assert sorted(state["notes"]) == sorted(answers.values())
+    assert state["final_report"]
+    # the kept results are dropped once the research is complete
+    for question in finished:
+        assert get_research_result_store().lookup("crash-then-resume", 1, question) is None
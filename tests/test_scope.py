@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from fake_llm import RESEARCH_TOPICS
+from workflow import SCOPE_MODES
+
+
+@pytest.mark.parametrize("scope_mode", SCOPE_MODES)
+def test_each_request_on_a_thread_gets_its_own_research(scope_mode, fake_model, fake_researcher, monkeypatch):
+    from checkpointing import open_checkpointer
+    from config import Config
+    from workflow import build_deep_research_agent
+
+    monkeypatch.setattr(Config, "SCOPE_MODE", scope_mode)
+    monkeypatch.setattr(Config, "RESEARCH_MEMO_ENABLED", False)
+    thread = {"configurable": {"thread_id": f"two-requests-{scope_mode}"}}
+
+    async def run():
+        async with open_checkpointer() as checkpointer:
+            agent = build_deep_research_agent(checkpointer)
+            researched, states = [], []
+            for query in ("Research the benchmark topics.", "Now research them again for next year."):
+                before = len(fake_researcher.calls)
+                await agent.ainvoke({"messages": [HumanMessage(content=query)]}, config=thread)
+                researched.append(len(fake_researcher.calls) - before)
+                states.append((await agent.aget_state(thread)).values)
+            return researched, states
+
+    researched, (first, second) = asyncio.run(run())
+
+    # the second request starts its researchers instead of inheriting the used-up iterations
+    assert researched == [fake_model.research_topics, fake_model.research_topics]
+    assert second["research_iterations"] == 2
+    # each request adds its own findings once - the earlier ones are not added again
+    topics = RESEARCH_TOPICS[:fake_model.research_topics]
+    assert sorted(first["notes"]) == sorted(f"findings on {topic}" for topic in topics)
+    assert sorted(first["raw_notes"]) == sorted(f"raw notes on {topic}" for topic in topics)
+    assert sorted(second["notes"]) == sorted(f"findings on {topic}" for topic in topics * 2)
+    assert sorted(second["raw_notes"]) == sorted(f"raw notes on {topic}" for topic in topics * 2)
+
+
+@pytest.mark.parametrize("scope_mode", SCOPE_MODES)
+def test_the_first_plan_counts_against_the_run_token_budget(scope_mode, fake_model, fake_researcher, monkeypatch):
+    from config import Config
+    from workflow import build_deep_research_agent
+
+    monkeypatch.setattr(Config, "SCOPE_MODE", scope_mode)
+    monkeypatch.setattr(Config, "RESEARCH_MEMO_ENABLED", False)
+    # used up by the first supervisor plan alone
+    monkeypatch.setattr(Config, "RUN_MAX_TOKENS", 1)
+
+    agent = build_deep_research_agent()
+    asyncio.run(agent.ainvoke(
+        {"messages": [HumanMessage(content="Research the benchmark topics.")]},
+        config={"configurable": {"thread_id": f"token-budget-{scope_mode}"}},
+    ))
+
+    assert fake_researcher.calls == []
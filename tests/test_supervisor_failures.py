@@ -0,0 +1,44 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from fake_llm import RESEARCH_TOPICS
+
+
+def run_supervisor() -> dict:
+    from research_supervisor_agent import supervisor_agent
+
+    brief = "Research the benchmark topics."
+    return asyncio.run(supervisor_agent.ainvoke(
+        {"research_brief": brief, "supervisor_messages": [HumanMessage(content=brief)]},
+        config={"configurable": {"thread_id": "supervisor-failures"}},
+    ))
+
+
+def research_answers(state: dict) -> dict[str, ToolMessage]:
+    """ConductResearch answers by research question."""
+    questions = {
+        tool_call["id"]: tool_call["args"]["research_question"]
+        for message in state["supervisor_messages"] if isinstance(message, AIMessage)
+        for tool_call in message.tool_calls if tool_call["name"] == "ConductResearch"
+    }
+    return {
+        questions[message.tool_call_id]: message
+        for message in state["supervisor_messages"]
+        if isinstance(message, ToolMessage) and message.tool_call_id in questions
+    }
+
+
+def test_failed_researcher_keeps_the_other_findings(fake_model, fake_researcher):
+    failing, *succeeding = RESEARCH_TOPICS[:3]
+    fake_researcher.fail = (failing,)
+
+    state = run_supervisor()
+
+    answers = research_answers(state)
+    assert answers[failing].status == "error"
+    for question in succeeding:
+        assert answers[question].content == f"findings on {question}"
+    # the failure is not a finding
+    assert sorted(state["notes"]) == sorted(f"findings on {question}" for question in succeeding)
+    assert sorted(state["raw_notes"]) == sorted(f"raw notes on {question}" for question in succeeding)
@@ -0,0 +1,39 @@
+import json
+import time
+
+from tracing import JsonSpanExporter, Span
+
+
+def make_span(i: int) -> Span:
+    return Span(name=f"node {i}", kind="node", trace_id="t", span_id=str(i), parent_span_id=None, start_time_unix_nano=i, end_time_unix_nano=i + 1)
+
+
+def read_names(path) -> list[str]:
+    return [json.loads(line)["name"] for line in path.read_text(encoding="utf-8").splitlines()] if path.exists() else []
+
+
+def test_export_only_queues_until_shutdown(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonSpanExporter(str(path), max_batch=100, flush_interval=60)
+    for i in range(3):
+        exporter.export(make_span(i))
+    # nothing written on the caller's thread
+    assert read_names(path) == []
+
+    exporter.shutdown()
+    assert read_names(path) == ["node 0", "node 1", "node 2"]
+    # spans finishing after shutdown are dropped, not written on the caller's thread
+    exporter.export(make_span(3))
+    assert len(read_names(path)) == 3
+
+
+def test_full_batch_is_written_before_the_interval(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonSpanExporter(str(path), max_batch=2, flush_interval=60)
+    exporter.export(make_span(0))
+    exporter.export(make_span(1))
+    deadline = time.monotonic() + 5
+    while len(read_names(path)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert read_names(path) == ["node 0", "node 1"]
+    exporter.shutdown()